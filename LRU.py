@@ -1,23 +1,23 @@
-def lru_page_replacement(pages, capacity):
-    memory = []
+from replacement import make_policy
+
+def page_replacement(pages, capacity, policy="lru"):
+    replacement = make_policy(policy, capacity, pages)
     page_faults = 0
 
     for page in pages:
-        if page not in memory:
+        hit, _ = replacement.reference(page)
+        if not hit:
             page_faults += 1
-            if len(memory) == capacity:
-                memory.pop(0)  # Remove LRU
-            memory.append(page)  # Add new page as most recently used
-        else:
-            # Move the page to the end (most recently used)
-            memory.remove(page)
-            memory.append(page)
-        print(f"Page: {page} -> Memory: {memory}")
+        print(f"Page: {page} -> Memory: {list(replacement)}")
 
     print(f"\nTotal Page Faults: {page_faults}")
     return page_faults
 
+def lru_page_replacement(pages, capacity):
+    return page_replacement(pages, capacity, "lru")
+
 # Example usage:
-pages = [7, 0, 1, 2, 0, 3, 0, 4, 2, 3, 0, 3]
-capacity = 4
-lru_page_replacement(pages, capacity)
+if __name__ == "__main__":
+    pages = [7, 0, 1, 2, 0, 3, 0, 4, 2, 3, 0, 3]
+    capacity = 4
+    lru_page_replacement(pages, capacity)
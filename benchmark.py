@@ -0,0 +1,633 @@
+import argparse
+import os
+import threading
+import time
+import tracemalloc
+import random
+from memory import MemoryManager, FrameTable
+from replacement import POLICIES, make_policy
+from trace_sim import StreamingSimulation, read_trace, write_trace, simulate_trace
+from sweep import sweep
+from main import Process, Scheduler, Kernel, ResourceManager
+import scheduling
+from protocol import CODECS, encode_frame, decode_payload
+
+
+def make_process(pid, pages, page_size_kb=1):
+    p = Process(f"bench-{pid}", 5, 1, 0, str(pid))
+    p.memory_required = pages * page_size_kb
+    return p
+
+
+def bench_allocator(frame_counts=(16, 256, 4096, 65536, 1_000_000), pages_per_process=64, rounds=2):
+    # Fill memory `rounds` times over so the later allocations all go through eviction
+    print(f"{'frames':>10} {'pages':>10} {'us/page':>10}")
+    for frames in frame_counts:
+        mm = MemoryManager(total_memory_kb=frames, page_size_kb=1)
+        total_pages = max(frames * rounds, pages_per_process * 16)
+        count = total_pages // pages_per_process
+        procs = [make_process(i, pages_per_process) for i in range(count)]
+        start = time.perf_counter()
+        for p in procs:
+            mm.allocate_memory(p)
+        elapsed = time.perf_counter() - start
+        for p in procs:
+            mm.deallocate_memory(p)
+        print(f"{frames:>10} {count * pages_per_process:>10} {elapsed / (count * pages_per_process) * 1e6:>10.2f}")
+
+
+class LegacyPage:
+    # The per-frame object layout MemoryManager.memory used before FrameTable
+    def __init__(self, pid, page_number):
+        self.pid = pid
+        self.page_number = page_number
+
+
+def _traced(build):
+    tracemalloc.start()
+    obj = build()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del obj
+    return size
+
+
+def bench_frame_table(frame_counts=(10_000, 100_000, 1_000_000), pages_per_process=64):
+    # Fully populated memory, owners spread over frames // pages_per_process pids
+    print(f"{'frames':>10} {'objects MB':>12} {'columns MB':>12} {'ratio':>8}")
+    for frames in frame_counts:
+        pids = [str(i) for i in range(frames // pages_per_process + 1)]
+
+        def build_objects():
+            return [LegacyPage(pids[i // pages_per_process], i % pages_per_process) for i in range(frames)]
+
+        def build_columns():
+            table = FrameTable(frames)
+            for i in range(frames):
+                table.set(i, pids[i // pages_per_process], i % pages_per_process)
+            return table
+
+        objects = _traced(build_objects)
+        columns = _traced(build_columns)
+        print(f"{frames:>10} {objects / 2**20:>12.2f} {columns / 2**20:>12.2f} {objects / columns:>8.1f}")
+
+
+def zipf_trace(length, seed=0, alpha=1.2):
+    rng = random.Random(seed)
+    return [int(rng.paretovariate(alpha)) for _ in range(length)]
+
+
+def bench_replacement(length=1_000_000, capacity=256):
+    trace = zipf_trace(length)
+    print(f"{'policy':>8} {'faults':>10} {'fault %':>8} {'seconds':>8}")
+    for name in POLICIES:
+        start = time.perf_counter()
+        policy = make_policy(name, capacity, trace)
+        reference = policy.reference
+        faults = 0
+        for page in trace:
+            if not reference(page)[0]:
+                faults += 1
+        elapsed = time.perf_counter() - start
+        print(f"{name:>8} {faults:>10} {faults / length * 100:>8.2f} {elapsed:>8.2f}")
+
+
+def bench_stream(lengths=(100_000, 1_000_000, 4_000_000), capacity=256, path="bench_trace.i32"):
+    # Peak traced memory should not grow with trace length
+    print(f"{'refs':>10} {'faults':>10} {'peak KB':>10} {'seconds':>8}")
+    for length in lengths:
+        rng = random.Random(length)
+        write_trace(path, (int(rng.paretovariate(1.2)) for _ in range(length)))
+        tracemalloc.start()
+        start = time.perf_counter()
+        sim = StreamingSimulation(capacity, "lru")
+        for _ in sim.run(read_trace(path)):
+            pass
+        elapsed = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(f"{length:>10} {sim.faults:>10} {peak / 1024:>10.1f} {elapsed:>8.2f}")
+    os.remove(path)
+
+
+def bench_sweep(length=500_000, page_sizes_kb=(4, 8, 16, 32, 64), capacities=(4, 8, 16, 32, 64, 128), workers=4):
+    rng = random.Random(7)
+    addresses = [int(rng.paretovariate(1.1) * 4096) + rng.randrange(65536) for _ in range(length)]
+    grid = len(page_sizes_kb) * len(capacities) * 2
+
+    start = time.perf_counter()
+    for size in page_sizes_kb:
+        pages = [a // (size * 1024) for a in addresses]
+        for capacity in capacities:
+            for policy in ("fifo", "lru"):
+                simulate_trace(pages, capacity, policy)
+    naive = time.perf_counter() - start
+
+    start = time.perf_counter()
+    sweep(addresses, page_sizes_kb, capacities)
+    batched = time.perf_counter() - start
+
+    start = time.perf_counter()
+    sweep(addresses, page_sizes_kb, capacities, workers=workers)
+    pooled = time.perf_counter() - start
+    print(f"{grid} configurations over {length} addresses")
+    print(f"per-config simulation: {naive:.2f}s, sweep: {batched:.2f}s, sweep with {workers} workers: {pooled:.2f}s")
+
+
+def bench_dispatch(process_counts=(1_000, 10_000, 100_000, 1_000_000), dispatches=20_000):
+    # Steady-state priority dispatch: the running process goes back to the ready queue each time
+    print(f"{'ready':>10} {'dispatch/s':>12} {'reprioritize/s':>15}")
+    rng = random.Random(3)
+    for count in process_counts:
+        scheduler = Scheduler()
+        procs = [make_process(i, 1) for i in range(count)]
+        for p in procs:
+            p.priority = rng.randint(0, 10)
+            scheduler.admit(p)
+        start = time.perf_counter()
+        for _ in range(dispatches):
+            scheduler.dispatch_priority()
+        dispatch_rate = dispatches / (time.perf_counter() - start)
+        start = time.perf_counter()
+        for i in range(dispatches):
+            scheduler.change_priority(procs[i % count], rng.randint(0, 10))
+        reprioritize_rate = dispatches / (time.perf_counter() - start)
+        print(f"{count:>10} {dispatch_rate:>12.0f} {reprioritize_rate:>15.0f}")
+
+
+def bench_schedule(job_count=1_000_000, quantum=3):
+    rng = random.Random(1)
+    clock = 0.0
+    jobs = []
+    for pid in range(job_count):
+        clock += rng.expovariate(1 / 5)
+        jobs.append((pid, int(clock), rng.randint(1, 9), rng.randint(0, 10)))
+    print(f"{'policy':>20} {'seconds':>8} {'avg wait':>10} {'switches':>10}")
+    for policy in scheduling.POLICIES:
+        start = time.perf_counter()
+        result = scheduling.simulate(jobs, policy, quantum=quantum, aging=50)
+        elapsed = time.perf_counter() - start
+        print(f"{policy:>20} {elapsed:>8.2f} {result.metrics['avg_wait']:>10.1f} {result.metrics['context_switches']:>10}")
+
+
+def bench_process_table(counts=(10_000, 100_000, 200_000)):
+    # Total time should grow linearly with the number of processes
+    print(f"{'processes':>10} {'create s':>10} {'lookup s':>10} {'destroy s':>10}")
+    for count in counts:
+        kernel = Kernel()
+        start = time.perf_counter()
+        pids = [kernel.create_process(f"p{i}", i % 11, 1, 0).pid for i in range(count)]
+        created = time.perf_counter() - start
+        start = time.perf_counter()
+        for pid in pids:
+            kernel.get_pcb_info(pid)
+        looked_up = time.perf_counter() - start
+        start = time.perf_counter()
+        for pid in pids:
+            kernel.destroy_process(pid)
+        destroyed = time.perf_counter() - start
+        print(f"{count:>10} {created:>10.2f} {looked_up:>10.2f} {destroyed:>10.2f}")
+
+
+def bench_ipc(process_count=10_000, sender_threads=16, messages_per_thread=50_000):
+    # Senders and receivers run concurrently; every message is delivered exactly once
+    kernel = Kernel()
+    kernel.mailboxes.capacity = 1_000_000
+    pids = [kernel.create_process(f"p{i}", 5, 1, 0).pid for i in range(process_count)]
+    total = sender_threads * messages_per_thread
+    received = [0] * sender_threads
+    done = threading.Event()
+
+    def sender(index):
+        rng = random.Random(index)
+        for n in range(messages_per_thread):
+            kernel.send_message(pids[index], pids[rng.randrange(process_count)], n)
+
+    def receiver(index):
+        mine = pids[index::sender_threads]
+        while True:
+            finished = done.is_set()  # Once set, every message is already in a mailbox
+            got = 0
+            for pid in mine:
+                got += len(kernel.receive_many(pid))
+            received[index] += got
+            if finished and not got:
+                break
+
+    threads = [threading.Thread(target=sender, args=(i,)) for i in range(sender_threads)]
+    readers = [threading.Thread(target=receiver, args=(i,)) for i in range(sender_threads)]
+    start = time.perf_counter()
+    for t in threads + readers:
+        t.start()
+    for t in threads:
+        t.join()
+    done.set()
+    for t in readers:
+        t.join()
+    elapsed = time.perf_counter() - start
+    print(f"{process_count} processes, {sender_threads} sender and receiver threads")
+    print(f"{sum(received)}/{total} messages delivered in {elapsed:.2f}s: {total / elapsed:.0f} msg/s")
+
+    # Shared segments: each group's leader creates "data", and the members it
+    # started in its group attach to it; the threads then write and read them
+    groups, members, operations = 100, 10, 20_000
+    segments = []
+    for g in range(groups):
+        leader = kernel.create_process(f"leader-{g}", 5, 1, 0)
+        segments.append(kernel.create_segment(leader.pid, "data", 4096))
+        for m in range(members):
+            member = kernel.create_process(f"member-{g}-{m}", 5, 1, 0, pgid=leader.pid)
+            kernel.attach_segment(member.pid, "data")
+    try:
+        kernel.attach_segment(pids[0], "data")
+        raise AssertionError("a process outside every group attached to a segment")
+    except KeyError:
+        pass
+
+    def sharer(index):
+        rng = random.Random(index)
+        for n in range(operations):
+            segment = segments[rng.randrange(groups)]
+            if n % 4 == 0:
+                segment.write(n.to_bytes(8, "little"))
+            else:
+                with segment.reading(0, 8) as view:
+                    int.from_bytes(view, "little")
+
+    threads = [threading.Thread(target=sharer, args=(i,)) for i in range(sender_threads)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+    attached = sum(len(segment.attached) for segment in segments)
+    print(f"{groups} groups, {attached} attached processes: {sender_threads * operations / elapsed:.0f} "
+          f"segment accesses/s")
+
+
+def bench_deadlock(process_count=10_000, resource_count=1_000, requests=50_000):
+    # Random multi-instance requests; each new wait runs the incremental cycle check
+    rng = random.Random(11)
+    names = [f"R{i}" for i in range(resource_count)]
+    manager = ResourceManager({name: rng.randint(1, 4) for name in names})
+    outcomes = {}
+    start = time.perf_counter()
+    for _ in range(requests):
+        pid = str(rng.randrange(process_count))
+        if pid in manager.waiting_for:
+            continue
+        name = rng.choice(names)
+        if rng.random() < 0.3 and manager.held.get(pid):
+            manager.release(pid, rng.choice(list(manager.held[pid])))
+            continue
+        result = manager.acquire(pid, name, 1)
+        outcomes[result] = outcomes.get(result, 0) + 1
+    incremental = time.perf_counter() - start
+    start = time.perf_counter()
+    cycles = manager.detect_deadlocks()
+    full = time.perf_counter() - start
+    print(f"{process_count} processes, {resource_count} resources, {requests} operations: {outcomes}")
+    print(f"incremental checks: {incremental / requests * 1e6:.1f} us/operation, "
+          f"full detection: {full * 1e3:.1f} ms ({len(cycles)} cycles, {len(manager.waiting_for)} waiting)")
+
+
+def kernel_invariant_errors(kernel):
+    # Frames owned once and matching the page tables; queues matching process states
+    errors = []
+    mm = kernel.memory_manager
+    owned = {}
+    for frame in range(len(mm.memory)):
+        page = mm.memory[frame]
+        if page is not None:
+            key = (page.pid, page.page_number)
+            if key in owned:
+                errors.append(f"{key} resident in frames {owned[key]} and {frame}")
+            owned[key] = frame
+    if len(set(mm.free_frames)) != len(mm.free_frames):
+        errors.append("a frame is on the free list twice")
+    for frame in set(mm.free_frames) & set(owned.values()):
+        errors.append(f"frame {frame} is both free and owned")
+    for pid, table in mm.page_table.items():
+        if pid not in kernel.processes:
+            errors.append(f"destroyed process {pid} still has a page table")
+        for page_number, entry in table.items():
+            if entry.present and owned.get((pid, page_number)) != entry.frame:
+                errors.append(f"page table of {pid} maps page {page_number} to a frame it does not own")
+    if len(owned) + len(mm.free_frames) != len(mm.memory):
+        errors.append(f"{len(mm.memory) - len(owned) - len(mm.free_frames)} frames lost")
+
+    sched = kernel.scheduler
+    queues = {"ready": sched.ready_queue, "blocked": sched.blocked_queue, "suspended": sched.suspended_queue}
+    for state, q in queues.items():
+        for proc in q:
+            if proc.state != state or kernel.processes.get(proc.pid) is not proc:
+                errors.append(f"{proc.pid} is in the {state} queue but is {proc.state}")
+    running = sched.running_process
+    if running is not None and (running.state != "running" or running.pid not in kernel.processes):
+        errors.append(f"{running.pid} occupies the CPU but is {running.state}")
+    for proc in kernel.processes.values():
+        q = queues.get(proc.state)
+        if q is not None and proc not in q:
+            errors.append(f"{proc.pid} is {proc.state} but not in that queue")
+        if proc.state == "running" and running is not proc:
+            errors.append(f"{proc.pid} is running but not on the CPU")
+    return errors
+
+
+def bench_concurrency(thread_count=64, operations=2_000):
+    # Stress test: threads create, move, destroy and message processes at random,
+    # then the kernel's invariants are checked
+    kernel = Kernel()
+    states = ["ready", "blocked", "suspended", "running"]
+    failures = []
+
+    def worker(index):
+        rng = random.Random(index)
+        mine = []
+        try:
+            for _ in range(operations):
+                op = rng.random()
+                if op < 0.3 or not mine:
+                    mine.append(kernel.create_process(f"t{index}", rng.randrange(11), 1, 0).pid)
+                elif op < 0.5:
+                    kernel.destroy_process(mine.pop(rng.randrange(len(mine))))
+                elif op < 0.75:
+                    kernel.change_state(rng.choice(mine), rng.choice(states))
+                elif op < 0.8:
+                    kernel.scheduler.dispatch_priority()
+                elif op < 0.9:
+                    kernel.memory_manager.touch(rng.choice(mine), rng.randrange(2), rng.random() < 0.5)
+                else:
+                    kernel.send_message(rng.choice(mine), rng.choice(mine), "ping")
+                    kernel.receive_message(rng.choice(mine))
+            for pid in mine[::2]:
+                kernel.destroy_process(pid)
+        except Exception as e:
+            failures.append(f"thread {index}: {e!r}")
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(thread_count)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+    errors = failures + kernel_invariant_errors(kernel)
+    total = thread_count * operations
+    print(f"{thread_count} threads, {total} operations in {elapsed:.2f}s ({total / elapsed:.0f} ops/s), "
+          f"{len(kernel.processes)} processes left")
+    print(f"{'lock':>14} {'acquired':>10} {'contended':>10} {'wait ms':>10}")
+    for name, stats in kernel.lock_stats().items():
+        print(f"{name:>14} {stats['acquisitions']:>10} {stats['contended']:>10} {stats['wait_ms']:>10.1f}")
+    if errors:
+        print(f"{len(errors)} invariant violations, e.g.:")
+        for error in errors[:10]:
+            print(f"  {error}")
+        raise SystemExit(1)
+    print("invariants hold")
+
+
+def bench_wire(counts=(1_000, 10_000, 100_000), repeats=3):
+    # A list_processes response with the common PCB fields, through every codec available
+    print(f"{'processes':>10} {'codec':>8} {'encode ms':>10} {'decode ms':>10} {'bytes':>12}")
+    for count in counts:
+        rows = [{"pid": f"n1-{i}", "name": f"worker-{i}", "state": ("ready", "blocked", "running")[i % 3],
+                 "priority": i % 11, "burst": 1 + i % 20, "arrival": i // 10} for i in range(count)]
+        message = {"status": "success", "processes": rows, "id": 1}
+        for name, codec in CODECS.items():
+            encode = decode = float("inf")
+            for _ in range(repeats):
+                start = time.perf_counter()
+                frame = encode_frame(message, codec)
+                encode = min(encode, time.perf_counter() - start)
+                start = time.perf_counter()
+                decoded = decode_payload(frame[4:], codec)
+                decode = min(decode, time.perf_counter() - start)
+            if decoded != message:
+                raise SystemExit(f"{name} did not round-trip")
+            print(f"{count:>10} {name:>8} {encode * 1e3:>10.2f} {decode * 1e3:>10.2f} {len(frame):>12}")
+    # Edge cases: rows with no fields, rows that do not share their keys, and a
+    # column of ints and floats, with an int too large for a float64 to hold exactly
+    for message in ({"status": "success", "processes": [{}, {}]},
+                    {"status": "success", "processes": [{"pid": 1}, {"name": "a"}]},
+                    {"status": "success", "processes": [{"burst": 2**53 + 1}, {"burst": 1.5}, {"burst": 3}]}):
+        for name, codec in CODECS.items():
+            if decode_payload(encode_frame(message, codec)[4:], codec) != message:
+                raise SystemExit(f"{name} did not round-trip {message['processes']}")
+
+
+def bench_tlb(length=200_000, pages=1024, entries=(16, 64, 256), ways=(1, 4, 16), frames=512):
+    # Replays a Zipf address trace through access_many; memory holds half the pages,
+    # so the fault count is the same for every TLB shape and only the hit rate moves
+    rng = random.Random(1)
+    addresses = [min(page, pages) * 1024 - 1 - rng.randrange(1024) for page in zipf_trace(length, seed=1)]
+    print(f"{'entries':>8} {'ways':>6} {'hit %':>8} {'faults':>8} {'us/access':>10}")
+    for size in entries:
+        for associativity in ways:
+            if size % associativity:
+                continue
+            mm = MemoryManager(total_memory_kb=frames, page_size_kb=1, tlb_entries=size, tlb_associativity=associativity)
+            mm.allocate_memory(make_process(0, pages))
+            start = time.perf_counter()
+            mm.access_many("0", addresses)
+            elapsed = time.perf_counter() - start
+            stats = mm.translation_stats("0")
+            print(f"{size:>8} {associativity:>6} {stats['tlb_hit_rate'] * 100:>8.2f} {stats['page_faults']:>8} "
+                  f"{elapsed / length * 1e6:>10.2f}")
+
+
+def bench_swap(length=100_000, pages=2048, frame_counts=(256, 1024, 1536), write_ratio=0.3, read_ahead=(0, 4)):
+    # Swap traffic as memory shrinks below the process' pages, for a trace that
+    # mostly walks forward from a random start (so read-ahead can pay off);
+    # only dirty evictions are written
+    rng = random.Random(2)
+    trace = []
+    while len(trace) < length:
+        start = rng.randrange(pages)
+        trace.extend((start + i) % pages for i in range(rng.randrange(1, 16)))
+    del trace[length:]
+    writes = [rng.random() < write_ratio for _ in trace]
+    print(f"{'frames':>7} {'ahead':>6} {'faults':>8} {'MB out':>8} {'MB in':>8} {'us/out':>8} {'us/in':>8} {'seconds':>8}")
+    for frames in frame_counts:
+        for ahead in read_ahead:
+            mm = MemoryManager(total_memory_kb=frames * 4, page_size_kb=4, swap_kb=pages * 8, read_ahead=ahead)
+            mm.allocate_memory(make_process(0, pages, 4))
+            start = time.perf_counter()
+            mm.access_many("0", [page * 4096 for page in trace], writes)
+            mm.swap.flush()
+            elapsed = time.perf_counter() - start
+            stats = mm.swap_stats()
+            print(f"{frames:>7} {ahead:>6} {mm.translation_stats('0')['page_faults']:>8} "
+                  f"{stats['bytes_out'] / 2**20:>8.1f} {stats['bytes_in'] / 2**20:>8.1f} "
+                  f"{stats['out_us_per_page']:>8.2f} {stats['in_us_per_page']:>8.2f} {elapsed:>8.2f}")
+            mm.swap.close()
+
+
+def kernel_with(*args, **kwargs):
+    # A Kernel whose memory manager is built from these arguments instead of
+    # config.json; the one it started with is closed first
+    kernel = Kernel()
+    kernel.memory_manager.close()
+    kernel.memory_manager = MemoryManager(*args, **kwargs)
+    return kernel
+
+
+def bench_fork(workers=(100, 1_000, 10_000), template_kb=256, memory_kb=65536, page_size_kb=4):
+    # Spawning workers the size of a template process: fork shares the template's
+    # frames, create allocates a full set per worker (evicting once memory is full)
+    print(f"{'workers':>8} {'how':>8} {'us/proc':>10} {'frames':>8} {'cow copies':>11}")
+    for count in workers:
+        for how in ("create", "fork"):
+            kernel = kernel_with(memory_kb, page_size_kb)
+            mm = kernel.memory_manager
+            template = kernel.create_process("template", 5, 10, 0, template_kb)
+            free = len(mm.free_frames)
+            start = time.perf_counter()
+            for i in range(count):
+                if how == "fork":
+                    kernel.fork_process(template.pid)
+                else:
+                    kernel.create_process(f"worker-{i}", 5, 10, 0, template_kb)
+            elapsed = time.perf_counter() - start
+            used = free - len(mm.free_frames)
+            print(f"{count:>8} {how:>8} {elapsed / count * 1e6:>10.2f} {used:>8} "
+                  f"{mm.sharing_stats()['cow_copies']:>11}")
+            mm.close()
+
+
+def phased_trace(length, pages, working_set, rng, phase=5_000, locality=0.95):
+    # Mostly inside a window of `working_set` pages that moves every `phase` references
+    trace = []
+    base = 0
+    for i in range(length):
+        if i % phase == 0:
+            base = rng.randrange(pages - working_set + 1)
+        trace.append(base + rng.randrange(working_set) if rng.random() < locality else rng.randrange(pages))
+    return trace
+
+
+def bench_thrashing(processes=8, pages=96, working_set=40, frames=256, accesses=20_000, quantum=500,
+                    fault_cost=200):
+    # Overcommitted round robin: the working sets add up to more than memory. Time
+    # is one unit per access plus `fault_cost` per page fault (the paging device);
+    # throughput is accesses per 1000 units
+    rng = random.Random(3)
+    traces = [phased_trace(accesses, pages, working_set, rng) for _ in range(processes)]
+    print(f"{'mode':>7} {'faults':>8} {'fault %':>8} {'suspends':>9} {'throughput':>11} {'seconds':>8}")
+    for mode in (None, "ws", "pff"):
+        kernel = kernel_with(frames * 4, 4, swap_kb=processes * pages * 4,
+                             resident_sets=mode, resident_set_window=quantum)
+        mm = kernel.memory_manager
+        procs = [kernel.create_process(f"worker-{i}", 5, 10, 0, pages * 4) for i in range(processes)]
+        done = [0] * processes
+        start = time.perf_counter()
+        while any(d < accesses for d in done):
+            for i, p in enumerate(procs):
+                if done[i] >= accesses or p.state == "suspended":
+                    continue
+                for page in traces[i][done[i]:done[i] + quantum]:
+                    kernel.access_memory(p.pid, page * 4096, page % 4 == 0)
+                done[i] = min(done[i] + quantum, accesses)
+                if done[i] == accesses:
+                    kernel.destroy_process(p.pid)
+        elapsed = time.perf_counter() - start
+        stats = mm.translation_stats()
+        suspends = mm.resident_set_stats()["suspensions"] if mode else 0
+        total = processes * accesses
+        print(f"{mode or 'global':>7} {stats['page_faults']:>8} {stats['page_faults'] / total * 100:>8.2f} "
+              f"{suspends:>9} {total / (total + stats['page_faults'] * fault_cost) * 1000:>11.1f} {elapsed:>8.2f}")
+        mm.close()
+
+
+def largest_free_run(mm):
+    # What fragmentation stats would cost without the allocator: a frame table scan
+    owner, free = mm.memory.owner, FrameTable.FREE
+    best = run = 0
+    for frame in range(mm.total_pages):
+        run = run + 1 if owner[frame] == free else 0
+        best = max(best, run)
+    return best
+
+
+def bench_buddy(memory_kb=65536, page_size_kb=4, live=200, operations=5_000, accesses=20):
+    # Churn of processes from 4 KB to 1 MB (most of them small) with some paging
+    # between; counts processes that got adjacent frames and times the stats
+    rng = random.Random(5)
+    sizes = [int(rng.choice((4, 8, 16, 32, 64, 128, 256, 512, 1024)) * rng.choice((1, 1, 1, 0.75)))
+             for _ in range(operations)]
+    print(f"{'allocator':>9} {'contiguous':>10} {'us/create':>10} {'faults':>8} {'run':>6} {'block':>6} "
+          f"{'ext frag':>8} {'stats us':>9} {'scan us':>8}")
+    for allocator in ("frames", "buddy"):
+        kernel = kernel_with(memory_kb, page_size_kb, swap_kb=memory_kb * 4, allocator=allocator)
+        mm = kernel.memory_manager
+        pids = []
+        contiguous = 0
+        create_time = 0.0
+        for i, size in enumerate(sizes):
+            if len(pids) >= live:
+                kernel.destroy_process(pids.pop(rng.randrange(len(pids))))
+            start = time.perf_counter()
+            p = kernel.create_process(f"p{i}", 5, 1, 0, size)
+            create_time += time.perf_counter() - start
+            frames = [entry.frame for entry in p.page_table.entries.values() if entry.present]
+            contiguous += frames == list(range(frames[0], frames[0] + len(frames)))
+            pids.append(p.pid)
+            for _ in range(accesses):
+                pid = rng.choice(pids)
+                kernel.access_memory(pid, rng.randrange(kernel.processes[pid].memory_required * 1024))
+        start = time.perf_counter()
+        for _ in range(100):
+            stats = kernel.fragmentation_stats()
+        stats_us = (time.perf_counter() - start) / 100 * 1e6
+        start = time.perf_counter()
+        run = largest_free_run(mm)
+        scan_us = (time.perf_counter() - start) * 1e6
+        if stats:
+            block, fragmentation = stats["largest_free_block"], f"{stats['external_fragmentation']:.1%}"
+        else:
+            block, fragmentation, stats_us = "-", "-", 0.0
+        print(f"{allocator:>9} {contiguous / operations:>10.1%} {create_time / operations * 1e6:>10.1f} "
+              f"{kernel.translation_stats()['page_faults']:>8} {run:>6} {block:>6} {fragmentation:>8} "
+              f"{stats_us:>9.1f} {scan_us:>8.0f}")
+        mm.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="SimOS micro-benchmarks")
+    parser.add_argument("suite", choices=["allocator", "frame_table", "replacement", "stream", "sweep", "dispatch", "schedule", "process_table", "ipc", "deadlock", "concurrency", "wire", "tlb", "swap", "fork", "thrashing", "buddy"])
+    args = parser.parse_args()
+    if args.suite == "allocator":
+        bench_allocator()
+    elif args.suite == "frame_table":
+        bench_frame_table()
+    elif args.suite == "replacement":
+        bench_replacement()
+    elif args.suite == "stream":
+        bench_stream()
+    elif args.suite == "sweep":
+        bench_sweep()
+    elif args.suite == "dispatch":
+        bench_dispatch()
+    elif args.suite == "schedule":
+        bench_schedule()
+    elif args.suite == "process_table":
+        bench_process_table()
+    elif args.suite == "ipc":
+        bench_ipc()
+    elif args.suite == "deadlock":
+        bench_deadlock()
+    elif args.suite == "concurrency":
+        bench_concurrency()
+    elif args.suite == "wire":
+        bench_wire()
+    elif args.suite == "tlb":
+        bench_tlb()
+    elif args.suite == "swap":
+        bench_swap()
+    elif args.suite == "fork":
+        bench_fork()
+    elif args.suite == "thrashing":
+        bench_thrashing()
+    elif args.suite == "buddy":
+        bench_buddy()
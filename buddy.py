@@ -0,0 +1,123 @@
+# Binary buddy allocator over frame numbers, for MemoryManager's "buddy" mode.
+# Free memory is held as aligned blocks of 2**order frames, one free list per
+# order. An allocation takes a block from the smallest order that fits and
+# splits it down; a freed block merges with its buddy (the block it was split
+# from) for as long as the buddy is free too. Both walk at most one step per
+# order, so they cost O(log n).
+#
+# The allocator stands in for MemoryManager's stack of free frames: append()
+# frees one frame and pop() takes one, from the smallest free block, so single
+# pages leave the large blocks whole for contiguous requests.
+
+class BuddyAllocator:
+    def __init__(self, total_frames):
+        self.total_frames = total_frames
+        self.max_order = max(total_frames, 1).bit_length() - 1
+        self.free_lists = [{} for _ in range(self.max_order + 1)]  # Order -> {start: None}, newest last
+        self.order_of = {}  # Start of each free block -> its order
+        self.free = 0  # Free frames
+        self.allocations = self.failures = 0  # Contiguous requests served and refused
+        # A size that is not a power of two starts as several blocks, largest first
+        start = 0
+        for order in range(self.max_order, -1, -1):
+            if total_frames - start >= 1 << order:
+                self._push(start, order)
+                start += 1 << order
+
+    def __len__(self):
+        return self.free
+
+    def __iter__(self):
+        # Every free frame, for checks and displays
+        for start, order in self.order_of.items():
+            yield from range(start, start + (1 << order))
+
+    def __contains__(self, frame):
+        return any(start <= frame < start + (1 << order) for start, order in self.order_of.items())
+
+    def _push(self, start, order):
+        self.free_lists[order][start] = None
+        self.order_of[start] = order
+        self.free += 1 << order
+
+    def _take(self, start, order):
+        del self.free_lists[order][start]
+        del self.order_of[start]
+        self.free -= 1 << order
+
+    def alloc(self, order):
+        # Start of a free block of 2**order frames, or None
+        for have in range(order, self.max_order + 1):
+            if self.free_lists[have]:
+                break
+        else:
+            return None
+        start = next(reversed(self.free_lists[have]))
+        self._take(start, have)
+        while have > order:
+            have -= 1
+            self._push(start + (1 << have), have)  # The upper half stays free
+        return start
+
+    def release(self, start, order):
+        while order < self.max_order:
+            buddy = start ^ (1 << order)
+            if self.order_of.get(buddy) != order:
+                break
+            self._take(buddy, order)
+            start = min(start, buddy)
+            order += 1
+        self._push(start, order)
+
+    def alloc_exact(self, count):
+        # Start of `count` contiguous frames, or None. The block is rounded up
+        # to a power of two and the frames past `count` are freed again.
+        if count <= 0:
+            raise ValueError("Allocation must be at least one frame")
+        order = (count - 1).bit_length()
+        start = self.alloc(order) if order <= self.max_order else None
+        if start is None:
+            self.failures += 1
+            return None
+        self.allocations += 1
+        self.free_range(start + count, (1 << order) - count)
+        return start
+
+    def free_range(self, start, count):
+        # Frees any run of frames, as the largest aligned blocks it holds
+        end = start + count
+        while start < end:
+            order = (start & -start).bit_length() - 1 if start else self.max_order
+            while start + (1 << order) > end:
+                order -= 1
+            self.release(start, order)
+            start += 1 << order
+
+    def pop(self):
+        start = self.alloc(0)
+        if start is None:
+            raise IndexError("pop from an empty allocator")
+        return start
+
+    def append(self, frame):
+        self.release(frame, 0)
+
+    def largest_free(self):
+        # Frames in the largest free block, the biggest request alloc_exact can serve
+        for order in range(self.max_order, -1, -1):
+            if self.free_lists[order]:
+                return 1 << order
+        return 0
+
+    def stats(self):
+        largest = self.largest_free()
+        return {
+            "free_frames": self.free,
+            "largest_free_block": largest,
+            # Share of free memory outside the largest block, which no single request
+            # can use; adjacent blocks that are not buddies still make longer free runs
+            "external_fragmentation": 1 - largest / self.free if self.free else 0.0,
+            "free_blocks": {1 << order: len(blocks) for order, blocks in enumerate(self.free_lists) if blocks},
+            "contiguous_allocations": self.allocations,
+            "contiguous_failures": self.failures
+        }
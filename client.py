@@ -0,0 +1,217 @@
+import asyncio
+import itertools
+import queue
+import socket
+import threading
+import time
+from main import CONFIG
+from protocol import CODECS, JSON, PREFERRED_CODECS, ProtocolError, encode_frame, read_frame, recv_frame, send_frame
+
+# Client library for OSServer and the cluster coordinator. Client keeps a pool of
+# persistent blocking sockets and is safe to share between threads; AsyncClient
+# pipelines requests over one connection. Both raise RemoteError for error
+# responses and retry dropped connections - for any request that had not been
+# sent yet, and for read-only actions also after sending. New connections offer
+# `codecs` in a hello (see protocol.py); servers without it are spoken to in JSON.
+
+READ_ONLY = {"list_processes", "get_pcbs", "stats"}
+
+class RemoteError(Exception):
+    pass
+
+def merge_frames(frames):
+    # A streamed list_processes comes back as several frames; join their rows
+    response = frames[0]
+    for frame in frames[1:]:
+        response["processes"].extend(frame["processes"])
+    response.pop("more", None)
+    return response
+
+def _hello_request(codecs):
+    return {"action": "hello", "codecs": list(codecs)}
+
+def _hello_codec(response):
+    # Older servers answer "Invalid request" and stay on JSON
+    return CODECS.get(response.get("codec"), JSON) if response.get("status") == "success" else JSON
+
+def _checked(response):
+    if response.get("status") != "success":
+        raise RemoteError(response.get("message", "Request failed"))
+    return response
+
+class Client:
+    def __init__(self, host=None, port=None, timeout=None, retries=2, pool_size=4, codecs=None):
+        self.host = host or CONFIG.get("server_host", "localhost")
+        self.port = port or CONFIG.get("server_port", 9999)
+        self.timeout = timeout or CONFIG.get("request_timeout", 5.0)
+        self.retries = retries
+        self.codecs = list(codecs or CONFIG.get("wire_codecs", PREFERRED_CODECS))
+        self.idle = queue.LifoQueue()  # (socket, codec) pairs not in use
+        self.slots = threading.BoundedSemaphore(pool_size)  # Caps open connections
+
+    def _checkout(self):
+        # An idle socket the server has closed (e.g. it restarted) reads as EOF
+        # without blocking; those are dropped rather than failing the request
+        while True:
+            try:
+                sock, codec = self.idle.get_nowait()
+            except queue.Empty:
+                return self._connect()
+            sock.setblocking(False)
+            try:
+                alive = sock.recv(1, socket.MSG_PEEK) != b""
+            except BlockingIOError:
+                alive = True
+            except OSError:
+                alive = False
+            if alive:
+                sock.settimeout(self.timeout)
+                return sock, codec
+            sock.close()
+
+    def _connect(self):
+        sock = socket.create_connection((self.host, self.port), self.timeout)
+        codec = JSON
+        if self.codecs != ["json"]:
+            try:
+                send_frame(sock, _hello_request(self.codecs))
+                codec = _hello_codec(recv_frame(sock))
+            except Exception:
+                sock.close()
+                raise
+        return sock, codec
+
+    def call(self, request):
+        attempt = 0
+        while True:
+            if not self.slots.acquire(timeout=self.timeout):
+                raise TimeoutError("No free connection in the pool")
+            sock, sent = None, False
+            try:
+                sock, codec = self._checkout()
+                send_frame(sock, request, codec)
+                sent = True
+                frames = [recv_frame(sock, codec)]
+                while frames[-1].get("more"):
+                    frames.append(recv_frame(sock, codec))
+                self.idle.put((sock, codec))
+                return _checked(merge_frames(frames))
+            except ProtocolError:
+                sock.close()  # Out of step with the server, so not reusable
+                raise
+            except OSError:  # Includes ConnectionError and socket timeouts
+                if sock is not None:
+                    sock.close()
+                attempt += 1
+                if attempt > self.retries or (sent and request.get("action") not in READ_ONLY):
+                    raise
+                time.sleep(0.05 * 2 ** attempt)
+            finally:
+                self.slots.release()
+
+    def close(self):
+        while True:
+            try:
+                self.idle.get_nowait()[0].close()
+            except queue.Empty:
+                return
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+class AsyncClient:
+    # Requests carry ids, so any number can be outstanding on the one connection
+    def __init__(self, host=None, port=None, timeout=None, retries=2, codecs=None):
+        self.host = host or CONFIG.get("server_host", "localhost")
+        self.port = port or CONFIG.get("server_port", 9999)
+        self.timeout = timeout or CONFIG.get("request_timeout", 5.0)
+        self.retries = retries
+        self.codecs = list(codecs or CONFIG.get("wire_codecs", PREFERRED_CODECS))
+        self.codec = JSON
+        self.ids = itertools.count(1)
+        self.pending = {}  # request id -> (future, frames so far)
+        self.reader = self.writer = self.reader_task = None
+        self._connecting = None
+
+    async def connect(self):
+        if self.writer is not None and not self.writer.is_closing():
+            return
+        if self._connecting is None:
+            self._connecting = asyncio.ensure_future(self._open())
+        try:
+            await self._connecting
+        finally:
+            self._connecting = None
+
+    async def _open(self):
+        reader, writer = await asyncio.wait_for(asyncio.open_connection(self.host, self.port), self.timeout)
+        codec = JSON
+        if self.codecs != ["json"]:
+            try:
+                writer.write(encode_frame(_hello_request(self.codecs)))
+                codec = _hello_codec(await asyncio.wait_for(read_frame(reader), self.timeout) or {})
+            except Exception:
+                writer.close()
+                raise
+        self.reader, self.writer, self.codec = reader, writer, codec
+        self.reader_task = asyncio.create_task(self._read_responses(reader, writer, codec))
+
+    async def _read_responses(self, reader, writer, codec):
+        try:
+            while True:
+                frame = await read_frame(reader, codec)
+                if frame is None:
+                    break
+                request_id = frame.pop("id", None)
+                entry = self.pending.get(request_id)
+                if entry is None:
+                    continue
+                future, frames = entry
+                frames.append(frame)
+                if not frame.get("more"):
+                    del self.pending[request_id]
+                    if not future.done():
+                        future.set_result(merge_frames(frames))
+        except Exception:
+            pass
+        finally:
+            writer.close()
+            if self.writer is writer:
+                self.writer = None
+            for future, _ in self.pending.values():
+                if not future.done():
+                    future.set_exception(ConnectionError("Connection to server lost"))
+            self.pending.clear()
+
+    async def call(self, request):
+        return _checked(await self.send(request))
+
+    async def send(self, request):
+        # Like call, but returns error responses instead of raising
+        attempt = 0
+        while True:
+            sent = False
+            request_id = next(self.ids)
+            try:
+                await self.connect()
+                future = asyncio.get_running_loop().create_future()
+                self.pending[request_id] = (future, [])
+                self.writer.write(encode_frame(dict(request, id=request_id), self.codec))
+                sent = True
+                await self.writer.drain()
+                return await asyncio.wait_for(future, self.timeout)
+            except (OSError, asyncio.TimeoutError):
+                self.pending.pop(request_id, None)
+                attempt += 1
+                if attempt > self.retries or (sent and request.get("action") not in READ_ONLY):
+                    raise
+                await asyncio.sleep(0.05 * 2 ** attempt)
+
+    async def close(self):
+        if self.writer is not None:
+            self.writer.close()
+        if self.reader_task is not None:
+            self.reader_task.cancel()
@@ -0,0 +1,338 @@
+import argparse
+import asyncio
+import bisect
+import hashlib
+import signal
+import subprocess
+import sys
+from client import AsyncClient
+from main import CONFIG
+from protocol import JSON, ProtocolError, encode_frame, negotiate, read_frame, wait_for_port
+from server import DEFAULT_FIELDS, process_rows
+
+# Cluster mode: several OSServer nodes, each with its own Kernel (and its own OS
+# process, so they run on separate cores), behind a Coordinator that speaks the
+# same protocol as a single server. Node pids are prefixed "<node>-", so a pid
+# names the node that created it; migrated pids are tracked separately.
+
+class HashRing:
+    # Consistent hashing with `replicas` virtual points per node, so adding or
+    # removing a node only moves the keys next to its points
+    def __init__(self, nodes, replicas=64):
+        self.points = sorted((self._hash(f"{node}#{i}"), node) for node in nodes for i in range(replicas))
+        self.hashes = [h for h, _ in self.points]
+
+    @staticmethod
+    def _hash(key):
+        return int.from_bytes(hashlib.md5(key.encode()).digest()[:8], "big")
+
+    def node_for(self, key):
+        i = bisect.bisect(self.hashes, self._hash(key)) % len(self.points)
+        return self.points[i][1]
+
+class Coordinator:
+    # placement "least_loaded" sends a process to the node with the shortest ready
+    # queue (then fewest used frames), from node stats refreshed every `refresh`
+    # seconds and counted up locally between refreshes. "hash" places by
+    # consistent hashing of the request's "key", or its name.
+    def __init__(self, nodes, host="localhost", port=9999, placement="least_loaded", refresh=0.5,
+                 max_in_flight=256, node_timeout=60.0):
+        if placement not in ("least_loaded", "hash"):
+            raise ValueError(f"Unknown placement: {placement}")
+        if not nodes:
+            raise ValueError("A cluster needs at least one node")
+        # One persistent, pipelined connection per node
+        self.clients = {name: AsyncClient(node_host, node_port, timeout=node_timeout)
+                        for name, node_host, node_port in nodes}
+        self.ring = HashRing(self.clients)
+        self.load = {name: [0, 0] for name in self.clients}  # name -> [ready, used frames]
+        self.moved = {}  # pid -> node, for processes migrated off the node in their pid
+        self.host = host
+        self.port = port
+        self.placement = placement
+        self.refresh = refresh
+        self.max_in_flight = max_in_flight
+        self.refresher = None  # Task refreshing self.load, while started with least_loaded
+        self.handlers = {
+            "create_process": self.create_process,
+            "create_processes": self.create_processes,
+            "destroy_processes": self.destroy_processes,
+            "get_pcbs": self.get_pcbs,
+            "list_processes": self.list_processes,
+            "migrate_process": self.migrate_process,
+            "set_process_group": self.set_process_group,
+            "stats": self.stats
+        }
+
+    def place(self, spec):
+        # A process joining a group goes to the node its group lives on
+        if spec.get("pgid") is not None:
+            node = self.locate(spec["pgid"])
+            if node is not None:
+                return node
+        if self.placement == "hash":
+            return self.ring.node_for(str(spec.get("key", spec["name"])))
+        name = min(self.load, key=lambda node: self.load[node])
+        self.load[name][0] += 1
+        return name
+
+    def locate(self, pid):
+        node = self.moved.get(pid) or str(pid).rpartition("-")[0]
+        return node if node in self.clients else None
+
+    async def create_process(self, request):
+        node = self.place(request)
+        response = await self.clients[node].send(dict(request, action="create_process"))
+        response["node"] = node
+        return response
+
+    async def create_processes(self, request):
+        by_node = {}
+        for index, spec in enumerate(request["processes"]):
+            by_node.setdefault(self.place(spec), []).append(index)
+        results = [None] * len(request["processes"])
+
+        async def create_on(node, indexes):
+            response = await self.clients[node].send(
+                {"action": "create_processes", "processes": [request["processes"][i] for i in indexes]})
+            for index, result in zip(indexes, response.get("results") or ()):
+                result["node"] = node
+                results[index] = result
+            for index in indexes:
+                if results[index] is None:
+                    results[index] = {"status": "error", "message": response.get("message"), "node": node}
+
+        await asyncio.gather(*(create_on(node, indexes) for node, indexes in by_node.items()))
+        return {"status": "success", "results": results}
+
+    async def _per_pid(self, request, action, missing):
+        # Sends each node its share of request["pids"] and merges the results in order
+        by_node = {}
+        results = [None] * len(request["pids"])
+        for index, pid in enumerate(request["pids"]):
+            node = self.locate(pid)
+            if node is None:
+                results[index] = missing(pid)
+            else:
+                by_node.setdefault(node, []).append(index)
+
+        async def call(node, indexes):
+            response = await self.clients[node].send({"action": action, "pids": [request["pids"][i] for i in indexes]})
+            for index, result in zip(indexes, response["results"]):
+                result["node"] = node
+                results[index] = result
+
+        await asyncio.gather(*(call(node, indexes) for node, indexes in by_node.items()))
+        return {"status": "success", "results": results}
+
+    async def destroy_processes(self, request):
+        response = await self._per_pid(request, "destroy_processes", lambda pid: {"pid": pid, "status": "not found"})
+        for result in response["results"]:
+            if result["status"] == "success":
+                self.moved.pop(result["pid"], None)
+        return response
+
+    async def set_process_group(self, request):
+        node = self.locate(request["pid"])
+        if node is None:
+            return {"status": "error", "message": f"Process {request['pid']} not found"}
+        return await self.clients[node].send(request)
+
+    async def get_pcbs(self, request):
+        return await self._per_pid(request, "get_pcbs", lambda pid: {"PID": pid, "status": "not found"})
+
+    async def _fan_out(self, request):
+        names = list(self.clients)
+        responses = await asyncio.gather(*(self.clients[name].send(request) for name in names))
+        return dict(zip(names, responses))
+
+    async def list_processes(self, request):
+        # Nodes are queried in parallel; rows come back node by node with a "node" field.
+        # For a page, no node needs to send more than the rows up to its end.
+        fields = request.get("fields") or DEFAULT_FIELDS
+        offset = request.get("offset", 0)
+        limit = request.get("limit")
+        query = {"action": "list_processes", "fields": fields}
+        if limit is not None:
+            query["limit"] = offset + limit
+        responses = await self._fan_out(query)
+        rows = []
+        for node, response in responses.items():
+            if response["status"] != "success":
+                raise ValueError(f"{node}: {response['message']}")
+            for row in response["processes"]:
+                row["node"] = node
+                rows.append(row)
+        rows = rows[offset:None if limit is None else offset + limit]
+        return process_rows(rows, request.get("chunk"))
+
+    async def migrate_process(self, request):
+        pid, target = request["pid"], request["to"]
+        source = self.locate(pid)
+        if source is None:
+            raise ValueError(f"Process {pid} not found")
+        if target not in self.clients:
+            raise ValueError(f"Unknown node {target}")
+        if source == target:
+            raise ValueError(f"Process {pid} is already on {target}")
+        exported = await self.clients[source].send({"action": "export_process", "pid": pid})
+        if exported["status"] != "success":
+            return exported
+        imported = await self.clients[target].send({"action": "import_process", "process": exported["process"]})
+        if imported["status"] != "success":
+            # Put it back where it was
+            await self.clients[source].send({"action": "import_process", "process": exported["process"]})
+            return imported
+        if target == str(pid).rpartition("-")[0]:
+            self.moved.pop(pid, None)
+        else:
+            self.moved[pid] = target
+        return {"status": "success", "pid": pid, "from": source, "to": target}
+
+    async def stats(self, request):
+        responses = await self._fan_out({"action": "stats"})
+        return {"status": "success", "nodes": {node: r.get("stats") for node, r in responses.items()}}
+
+    async def _refresh_load(self):
+        # Runs for the coordinator's lifetime; a node that fails or answers with an
+        # error keeps its last figures until a later refresh succeeds
+        while True:
+            try:
+                names = list(self.clients)
+                responses = await asyncio.gather(*(self.clients[name].send({"action": "stats"}) for name in names),
+                                                 return_exceptions=True)
+                for node, response in zip(names, responses):
+                    if isinstance(response, Exception):
+                        print(f"Load refresh from {node} failed: {response!r}")
+                    elif response.get("status") == "success":
+                        stats = response["stats"]
+                        self.load[node] = [stats["ready"], stats["total_frames"] - stats["free_frames"]]
+            except Exception as e:
+                print(f"Load refresh failed: {e!r}")
+            await asyncio.sleep(self.refresh)
+
+    async def handle_request(self, request):
+        handler = self.handlers.get(request.get("action"))
+        if handler is None:
+            responses = [{"status": "error", "message": "Invalid request"}]
+        else:
+            try:
+                responses = await handler(request)
+            except Exception as e:
+                responses = {"status": "error", "message": str(e)}
+            if isinstance(responses, dict):
+                responses = [responses]
+        if "id" in request:
+            for response in responses:
+                response["id"] = request["id"]
+        return responses
+
+    async def _respond(self, request, writer, slots, codec):
+        try:
+            responses = await self.handle_request(request)
+            writer.write(b"".join(encode_frame(response, codec) for response in responses))
+            await writer.drain()
+        finally:
+            slots.release()
+
+    async def handle_connection(self, reader, writer):
+        # Requests on a connection are served concurrently (responses carry their
+        # id); once `max_in_flight` are outstanding the coordinator stops reading
+        slots = asyncio.Semaphore(self.max_in_flight)
+        tasks = set()
+        codec = JSON
+        try:
+            while True:
+                request = await read_frame(reader, codec)
+                if request is None:
+                    break
+                if request.get("action") == "hello":
+                    # Answered in line, since every later frame depends on it
+                    chosen = negotiate(request.get("codecs"))
+                    response = {"status": "success", "codec": chosen.name}
+                    if "id" in request:
+                        response["id"] = request["id"]
+                    writer.write(encode_frame(response, codec))
+                    codec = chosen
+                    continue
+                await slots.acquire()
+                task = asyncio.create_task(self._respond(request, writer, slots, codec))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+        except ProtocolError as e:
+            writer.write(encode_frame({"status": "error", "message": str(e)}, codec))
+        except ConnectionError:
+            pass
+        finally:
+            if tasks:
+                await asyncio.gather(*tasks, return_exceptions=True)
+            writer.close()
+
+    async def start(self):
+        for client in self.clients.values():
+            await client.connect()
+        if self.placement == "least_loaded":
+            self.refresher = asyncio.create_task(self._refresh_load())
+        server = await asyncio.start_server(self.handle_connection, self.host, self.port)
+        self.port = server.sockets[0].getsockname()[1]
+        print(f"Coordinator for {', '.join(self.clients)} started on {self.host}:{self.port}")
+        return server
+
+    async def close(self):
+        # Stops the load refresh and closes the node connections
+        if self.refresher is not None:
+            self.refresher.cancel()
+            await asyncio.gather(self.refresher, return_exceptions=True)
+            self.refresher = None
+        for client in self.clients.values():
+            await client.close()
+
+    async def serve(self):
+        server = await self.start()
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            await self.close()
+
+def spawn_nodes(count, host="localhost", base_port=10000):
+    # Starts `count` node servers as local OS processes; returns (processes, node list)
+    procs, nodes = [], []
+    for i in range(1, count + 1):
+        name, port = f"n{i}", base_port + i
+        procs.append(subprocess.Popen([sys.executable, "server.py", "--host", host, "--port", str(port),
+                                       "--node", name], stdout=subprocess.DEVNULL))
+        nodes.append((name, host, port))
+    for _, node_host, port in nodes:
+        wait_for_port(node_host, port)
+    return procs, nodes
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="SimOS cluster coordinator")
+    parser.add_argument("--host", default=CONFIG.get("server_host", "localhost"))
+    parser.add_argument("--port", type=int, default=CONFIG.get("server_port", 9999))
+    parser.add_argument("--nodes", type=int, default=4, help="Local node servers to start")
+    parser.add_argument("--base-port", type=int, default=10000)
+    parser.add_argument("--join", nargs="*", default=[], metavar="NAME=HOST:PORT",
+                        help="Running nodes (started with server.py --node NAME) to use instead of local ones")
+    parser.add_argument("--placement", default="least_loaded", choices=["least_loaded", "hash"])
+    args = parser.parse_args()
+
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))  # Still stop the nodes on terminate
+    procs = []
+    if args.join:
+        nodes = []
+        for spec in args.join:
+            name, _, address = spec.partition("=")
+            node_host, _, node_port = address.rpartition(":")
+            nodes.append((name, node_host, int(node_port)))
+    else:
+        procs, nodes = spawn_nodes(args.nodes, args.host, args.base_port)
+    try:
+        asyncio.run(Coordinator(nodes, args.host, args.port, args.placement).serve())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for proc in procs:
+            proc.terminate()
+            proc.wait()
@@ -1,8 +1,11 @@
 import tkinter as tk
 from tkinter import ttk, simpledialog, messagebox
+import queue
+from concurrent.futures import ThreadPoolExecutor
 from main import Kernel
-import socket
-import json
+from client import Client
+from scheduling import ScheduleResult
+from widgets import TableSource, VirtualTable, show_table
 
 class OSControlPanel:
     def __init__(self, root):
@@ -11,6 +14,13 @@ class OSControlPanel:
         self.master.geometry("600x600")
         self.kernel = Kernel()
 
+        # Remote calls run on worker threads; their results come back through a
+        # queue that the Tk thread polls, since Tk may only be used from its own thread
+        self.client = Client()
+        self.remote_pool = ThreadPoolExecutor(max_workers=4)
+        self.remote_results = queue.Queue()
+        self.master.after(50, self._poll_remote)
+
         # Configure styles
         style = ttk.Style()
         style.theme_use("clam")
@@ -55,6 +65,7 @@ class OSControlPanel:
         actions = [
             ("Create Process", self.create_process),
             ("Destroy Process", self.destroy_process),
+            ("Fork Process", self.fork_process),
             ("Suspend Process", lambda: self.change_state("suspended")),
             ("Resume Process", lambda: self.change_state("ready")),
             ("Block Process", lambda: self.change_state("blocked")),
@@ -72,7 +83,12 @@ class OSControlPanel:
         ttk.Label(parent, text="Scheduler", style="Group.TLabel").pack(pady=10)
         actions = [
             ("Run FCFS", self.run_fcfs),
+            ("Run SJF", lambda: self.run_schedule("sjf", "SJF")),
+            ("Run SRTF", lambda: self.run_schedule("srtf", "SRTF")),
             ("Run Priority", self.run_priority),
+            ("Run Preemptive Priority", self.run_preemptive_priority),
+            ("Run Round Robin", self.run_round_robin),
+            ("Run MLFQ", self.run_mlfq),
             ("View Queues", self.view_queues)
         ]
         for text, cmd in actions:
@@ -83,7 +99,8 @@ class OSControlPanel:
         actions = [
             ("Set Page Size", self.set_page_size),
             ("Simulate Paging", self.simulate_paging),
-            ("Simulate LRU", self.simulate_lru),
+            ("Simulate Page Replacement", self.simulate_lru),
+            ("LRU Miss Ratio Curve", self.miss_ratio_curve),
             ("View Memory Map", self.view_memory_map)
         ]
         for text, cmd in actions:
@@ -94,7 +111,8 @@ class OSControlPanel:
         actions = [
             ("Acquire Resource", self.acquire_resource),
             ("Release Resource", self.release_resource),
-            ("View Resource Status", self.view_resource_status)
+            ("View Resource Status", self.view_resource_status),
+            ("Detect Deadlocks", self.detect_deadlocks)
         ]
         for text, cmd in actions:
             ttk.Button(parent, text=text, command=cmd, width=30).pack(pady=5, padx=10)
@@ -103,7 +121,10 @@ class OSControlPanel:
         ttk.Label(parent, text="Distributed OS", style="Group.TLabel").pack(pady=10)
         actions = [
             ("Create Remote Process", self.create_remote_process),
-            ("View Remote Processes", self.view_remote_processes)
+            ("Create Remote Processes (Batch)", self.create_remote_batch),
+            ("View Remote Processes", self.view_remote_processes),
+            ("Migrate Remote Process", self.migrate_remote_process),
+            ("Cluster Stats", self.view_cluster_stats)
         ]
         for text, cmd in actions:
             ttk.Button(parent, text=text, command=cmd, width=30).pack(pady=5, padx=10)
@@ -114,8 +135,9 @@ class OSControlPanel:
             priority = simpledialog.askinteger("Input", "Priority (0-10):", minvalue=0, maxvalue=10)
             burst = simpledialog.askinteger("Input", "Burst Time:", minvalue=1)
             arrival = simpledialog.askinteger("Input", "Arrival Time:", minvalue=0)
-            if all([name, priority is not None, burst, arrival]):
-                proc = self.kernel.create_process(name, priority, burst, arrival)
+            memory_kb = simpledialog.askinteger("Input", "Memory (KB):", minvalue=1, initialvalue=128)
+            if all([name, priority is not None, burst, arrival, memory_kb]):
+                proc = self.kernel.create_process(name, priority, burst, arrival, memory_kb)
                 messagebox.showinfo("Success", f"Created {proc}")
             else:
                 raise ValueError("Incomplete input")
@@ -132,6 +154,15 @@ class OSControlPanel:
         except Exception as e:
             messagebox.showerror("Error", str(e))
 
+    def fork_process(self):
+        try:
+            pid = simpledialog.askstring("Input", "Enter PID to fork:")
+            if pid:
+                child = self.kernel.fork_process(pid)
+                messagebox.showinfo("Success", f"Forked {child}")
+        except Exception as e:
+            messagebox.showerror("Error", str(e))
+
     def change_state(self, state):
         try:
             pid = simpledialog.askstring("Input", f"Enter PID to {state}:")
@@ -155,8 +186,8 @@ class OSControlPanel:
 
     def process_communicate(self):
         try:
-            mode = simpledialog.askstring("Input", "Mode (message, shared_memory_write, shared_memory_read):")
-            if mode not in ["message", "shared_memory_write", "shared_memory_read"]:
+            mode = simpledialog.askstring("Input", "Mode (message, receive, shared_memory_write, shared_memory_read):")
+            if mode not in ["message", "receive", "shared_memory_write", "shared_memory_read"]:
                 raise ValueError("Invalid mode")
             pid = simpledialog.askstring("Input", "Enter PID:")
             if mode == "message":
@@ -174,7 +205,7 @@ class OSControlPanel:
                     messagebox.showinfo("Success", result)
                 else:
                     raise ValueError("Incomplete input")
-            else:  # shared_memory_read
+            else:  # receive, shared_memory_read
                 if pid:
                     result = self.kernel.process_communicate(pid, None, None, mode)
                     messagebox.showinfo("Success", result)
@@ -199,14 +230,10 @@ class OSControlPanel:
             if not procs:
                 messagebox.showinfo("Info", "No processes")
                 return
-            win = tk.Toplevel(self.master)
-            win.title("All Processes")
-            tree = ttk.Treeview(win, columns=("PID", "Name", "State", "Priority", "Burst"), show="headings")
-            for col in tree["columns"]:
-                tree.heading(col, text=col)
-            for p in procs:
-                tree.insert("", "end", values=(p.pid, p.name, p.state, p.priority, p.burst))
-            tree.pack(fill="both", expand=True, padx=10, pady=10)
+            # Kept up to date from a fresh snapshot every second
+            source = TableSource(("PID", "Name", "State", "Priority", "Burst"), procs,
+                                 lambda p: (p.pid, p.name, p.state, p.priority, p.burst))
+            show_table(self.master, "All Processes", source, reload=self.kernel.list_all_processes)
         except Exception as e:
             messagebox.showerror("Error", str(e))
 
@@ -228,77 +255,58 @@ class OSControlPanel:
         except Exception as e:
             messagebox.showerror("Error", str(e))
 
-    def run_fcfs(self):
+    def run_schedule(self, policy, title, priority=False, **options):
         try:
-            procs = self.kernel.list_all_processes()
-            if not procs:
+            if not self.kernel.list_all_processes():
                 messagebox.showerror("Error", "No processes")
                 return
-            procs.sort(key=lambda p: p.arrival)
-            current_time = 0
-            results = []
-            for p in procs:
-                start = max(current_time, p.arrival)
-                finish = start + p.burst
-                wait = start - p.arrival
-                turnaround = finish - p.arrival
-                results.append((p.pid, p.arrival, p.burst, start, finish, wait, turnaround))
-                current_time = finish
-            self._show_schedule("FCFS", results)
+            result = self.kernel.simulate_schedule(policy, **options)
+            self._show_schedule(title, result, priority)
         except Exception as e:
             messagebox.showerror("Error", str(e))
 
+    def run_fcfs(self):
+        self.run_schedule("fcfs", "FCFS")
+
     def run_priority(self):
-        try:
-            procs = self.kernel.list_all_processes()
-            if not procs:
-                messagebox.showerror("Error", "No processes")
-                return
-            procs.sort(key=lambda p: (p.priority, p.arrival))
-            current_time = 0
-            results = []
-            for p in procs:
-                start = max(current_time, p.arrival)
-                finish = start + p.burst
-                wait = start - p.arrival
-                turnaround = finish - p.arrival
-                results.append((p.pid, p.arrival, p.burst, p.priority, start, finish, wait, turnaround))
-                current_time = finish
-            self._show_schedule("Priority", results, priority=True)
-        except Exception as e:
-            messagebox.showerror("Error", str(e))
+        self.run_schedule("priority", "Priority", priority=True)
 
-    def _show_schedule(self, title, results, priority=False):
-        win = tk.Toplevel(self.master)
-        win.title(f"{title} Schedule")
+    def run_preemptive_priority(self):
+        aging = simpledialog.askinteger("Input", "Aging interval (0 for none):", minvalue=0, initialvalue=0)
+        if aging is not None:
+            self.run_schedule("priority_preemptive", "Preemptive Priority", priority=True, aging=aging or None)
+
+    def run_round_robin(self):
+        quantum = simpledialog.askinteger("Input", "Time quantum:", minvalue=1, initialvalue=4)
+        if quantum:
+            self.run_schedule("rr", f"Round Robin (q={quantum})", quantum=quantum)
+
+    def run_mlfq(self):
+        quantum = simpledialog.askinteger("Input", "Top-level time quantum:", minvalue=1, initialvalue=4)
+        if quantum:
+            self.run_schedule("mlfq", f"MLFQ (q={quantum})", quantum=quantum)
+
+    def _show_schedule(self, title, result, priority=False):
         cols = ["PID", "Arrival", "Burst"]
         if priority:
             cols.append("Priority")
         cols.extend(["Start", "Finish", "Wait", "Turnaround"])
-        tree = ttk.Treeview(win, columns=cols, show="headings")
-        for col in cols:
-            tree.heading(col, text=col)
-            tree.column(col, width=100)
-        for row in results:
-            tree.insert("", "end", values=row)
-        avg_wait = sum(r[-2] for r in results) / len(results)
-        avg_turn = sum(r[-1] for r in results) / len(results)
-        tree.insert("", "end", values=("Avg", "", "", "", "", "", f"{avg_wait:.2f}", f"{avg_turn:.2f}")[:len(cols)])
-        tree.pack(fill="both", expand=True, padx=10, pady=10)
+        source = TableSource(cols, result.jobs, lambda j: ScheduleResult.row(j, priority))
+        metrics = result.metrics
+        show_table(self.master, f"{title} Schedule", source, dict.fromkeys(cols, 100),
+                   footer=f"Avg wait: {metrics['avg_wait']:.2f}   Avg turnaround: {metrics['avg_turnaround']:.2f}\n"
+                          f"Throughput: {metrics['throughput']:.3f} jobs/unit   "
+                          f"CPU utilization: {metrics['cpu_utilization'] * 100:.1f}%   "
+                          f"Context switches: {metrics['context_switches']}")
 
     def view_queues(self):
         try:
-            queues = self.kernel.scheduler.view_queues()
-            win = tk.Toplevel(self.master)
-            win.title("Queues")
-            tree = ttk.Treeview(win, columns=("Queue", "Processes"), show="headings")
-            tree.heading("Queue", text="Queue")
-            tree.heading("Processes", text="Processes")
-            tree.column("Queue", width=100)
-            tree.column("Processes", width=400)
-            for q, procs in queues.items():
-                tree.insert("", "end", values=(q, ", ".join(p.pid for p in procs)))
-            tree.pack(fill="both", expand=True, padx=10, pady=10)
+            # One row per queued process rather than one per queue, so long queues scroll
+            def entries():
+                return [(q, p) for q, procs in self.kernel.scheduler.view_queues().items() for p in procs]
+            source = TableSource(("Queue", "PID", "Name", "Priority"), entries(),
+                                 lambda e: (e[0], e[1].pid, e[1].name, e[1].priority))
+            show_table(self.master, "Queues", source, reload=entries)
         except Exception as e:
             messagebox.showerror("Error", str(e))
 
@@ -318,19 +326,13 @@ class OSControlPanel:
             if not proc:
                 messagebox.showerror("Error", "Process not found")
                 return
-            frames = self.kernel.memory_manager.get_page_table(pid)
-            if not frames:
-                frames = self.kernel.memory_manager.allocate_memory(proc)
-            win = tk.Toplevel(self.master)
-            win.title(f"Page Table for {pid}")
-            tree = ttk.Treeview(win, columns=("Page", "Frame"), show="headings")
-            tree.heading("Page", text="Page")
-            tree.heading("Frame", text="Frame")
-            tree.column("Page", width=100)
-            tree.column("Frame", width=100)
-            for i, frame in enumerate(frames):
-                tree.insert("", "end", values=(i, frame))
-            tree.pack(fill="both", expand=True, padx=10, pady=10)
+            page_table = self.kernel.memory_manager.get_page_table(pid)
+            if not page_table:
+                self.kernel.memory_manager.allocate_memory(proc)
+                page_table = self.kernel.memory_manager.get_page_table(pid)
+            source = TableSource(("Page", "Frame"), list(page_table.items()),
+                                 lambda e: (e[0], e[1].frame if e[1].present else "Not present"))
+            show_table(self.master, f"Page Table for {pid}", source, {"Page": 100, "Frame": 100})
         except Exception as e:
             messagebox.showerror("Error", str(e))
 
@@ -338,46 +340,80 @@ class OSControlPanel:
         try:
             pages = simpledialog.askstring("Input", "Enter page references (comma-separated):")
             capacity = simpledialog.askinteger("Input", "Memory capacity (pages):", minvalue=1)
-            if pages and capacity:
+            policy = simpledialog.askstring("Input", "Policy (fifo, lru, clock, lfu, opt, arc):", initialvalue="lru")
+            if pages and capacity and policy:
+                pages = [int(p.strip()) for p in pages.split(",")]
+                history, faults = self.kernel.memory_manager.simulate(pages, capacity, policy.strip().lower())
+                # Steps are rebuilt from the history's checkpoints as they scroll into view
+                source = TableSource(("Step", "Page", "Memory", "Faults"), range(len(history)),
+                                     lambda i: (i + 1, history.pages[i], str(history.memory_at(i)), history.faults[i]),
+                                     keys={"Step": int, "Page": history.pages.__getitem__,
+                                           "Faults": history.faults.__getitem__})
+                show_table(self.master, f"{policy.strip().upper()} Simulation", source,
+                           {"Step": 80, "Page": 100, "Memory": 300, "Faults": 100},
+                           footer=f"Total Page Faults: {faults}")
+        except Exception as e:
+            messagebox.showerror("Error", str(e))
+
+    def miss_ratio_curve(self):
+        try:
+            pages = simpledialog.askstring("Input", "Enter page references (comma-separated):")
+            max_capacity = simpledialog.askinteger("Input", "Largest capacity (pages):", minvalue=1)
+            if pages and max_capacity:
                 pages = [int(p.strip()) for p in pages.split(",")]
-                history, faults = self.kernel.memory_manager.simulate_lru(pages, capacity)
+                curve = self.kernel.memory_manager.miss_ratio_curve(pages, max_capacity)
                 win = tk.Toplevel(self.master)
-                win.title("LRU Simulation")
-                tree = ttk.Treeview(win, columns=("Page", "Memory", "Faults"), show="headings")
-                tree.heading("Page", text="Page")
-                tree.heading("Memory", text="Memory")
-                tree.heading("Faults", text="Faults")
-                tree.column("Page", width=100)
-                tree.column("Memory", width=200)
-                tree.column("Faults", width=100)
-                for page, mem, fault in history:
-                    tree.insert("", "end", values=(page, str(mem), fault))
-                tree.pack(fill="both", expand=True, padx=10, pady=10)
-                messagebox.showinfo("Result", f"Total Page Faults: {faults}")
+                win.title("LRU Miss Ratio Curve")
+                width, height, margin = 500, 300, 40
+                canvas = tk.Canvas(win, width=width, height=height, bg="white")
+                canvas.create_line(margin, height - margin, width - margin, height - margin)
+                canvas.create_line(margin, margin, margin, height - margin)
+                canvas.create_text(width // 2, height - 15, text="Capacity (pages)")
+                canvas.create_text(margin, margin - 15, text="Miss ratio")
+                canvas.create_text(margin - 10, height - margin, text="0", anchor="e")
+                canvas.create_text(margin - 10, margin, text="1", anchor="e")
+                canvas.create_text(width - margin, height - margin + 12, text=str(max_capacity))
+                points = []
+                for capacity, _, miss_ratio in curve:
+                    x = margin + (capacity - 1) / max(max_capacity - 1, 1) * (width - 2 * margin)
+                    y = height - margin - miss_ratio * (height - 2 * margin)
+                    points.extend((x, y))
+                if len(points) >= 4:
+                    canvas.create_line(*points, fill="blue", width=2)
+                canvas.pack(padx=10, pady=10)
+                source = TableSource(("Capacity", "Faults", "Miss Ratio"), curve,
+                                     lambda c: (c[0], c[1], f"{c[2]:.3f}"))
+                table = VirtualTable(win, source, dict.fromkeys(source.columns, 120), height=8)
+                table.pack(fill="both", expand=True, padx=10, pady=10)
         except Exception as e:
             messagebox.showerror("Error", str(e))
 
     def view_memory_map(self):
         try:
-            mem = self.kernel.memory_manager.view_memory_map()
-            win = tk.Toplevel(self.master)
-            win.title("Memory Map")
-            tree = ttk.Treeview(win, columns=("Frame", "Content"), show="headings")
-            tree.heading("Frame", text="Frame")
-            tree.heading("Content", text="Content")
-            tree.column("Frame", width=100)
-            tree.column("Content", width=400)
-            for frame, content in mem:
-                tree.insert("", "end", values=(frame, content))
-            tree.pack(fill="both", expand=True, padx=10, pady=10)
+            # Frames are read from the frame table as they come into view, and the
+            # visible ones are re-read every second
+            memory_manager = self.kernel.memory_manager
+            frames = lambda: range(len(memory_manager.memory))
+            source = TableSource(("Frame", "Content"), frames(), memory_manager.frame_content,
+                                 keys={"Frame": int})
+            footer = None
+            fragmentation = self.kernel.fragmentation_stats()
+            if fragmentation:
+                footer = (f"{fragmentation['free_frames']} frames free, largest free block "
+                          f"{fragmentation['largest_free_block']}, external fragmentation "
+                          f"{fragmentation['external_fragmentation']:.1%}")
+            show_table(self.master, "Memory Map", source, {"Frame": 100, "Content": 400}, reload=frames,
+                       footer=footer)
         except Exception as e:
             messagebox.showerror("Error", str(e))
 
     def acquire_resource(self):
         try:
             pid = simpledialog.askstring("Input", "Enter PID to acquire resource:")
-            if pid:
-                result = self.kernel.acquire_resource(pid)
+            resource = simpledialog.askstring("Input", "Resource:", initialvalue="Printer")
+            count = simpledialog.askinteger("Input", "Instances:", minvalue=1, initialvalue=1)
+            if pid and resource and count:
+                result = self.kernel.acquire_resource(pid, resource, count)
                 messagebox.showinfo("Success", result)
             else:
                 raise ValueError("Invalid PID")
@@ -387,8 +423,9 @@ class OSControlPanel:
     def release_resource(self):
         try:
             pid = simpledialog.askstring("Input", "Enter PID to release resource:")
-            if pid:
-                result = self.kernel.release_resource(pid)
+            resource = simpledialog.askstring("Input", "Resource:", initialvalue="Printer")
+            if pid and resource:
+                result = self.kernel.release_resource(pid, resource)
                 messagebox.showinfo("Success", result)
             else:
                 raise ValueError("Invalid PID")
@@ -402,58 +439,104 @@ class OSControlPanel:
         except Exception as e:
             messagebox.showerror("Error", str(e))
 
+    def detect_deadlocks(self):
+        try:
+            cycles = self.kernel.detect_deadlocks()
+            if cycles:
+                messagebox.showwarning("Deadlock", "\n".join(" -> ".join(cycle) for cycle in cycles))
+            else:
+                messagebox.showinfo("Deadlock", "No deadlock detected")
+        except Exception as e:
+            messagebox.showerror("Error", str(e))
+
+    def run_remote(self, request, on_success, error_title):
+        def work():
+            try:
+                self.remote_results.put((on_success, self.client.call(request), None))
+            except Exception as e:
+                self.remote_results.put((None, None, f"{error_title}: {e}"))
+        self.remote_pool.submit(work)
+
+    def _poll_remote(self):
+        while True:
+            try:
+                on_success, response, error = self.remote_results.get_nowait()
+            except queue.Empty:
+                break
+            if error:
+                messagebox.showerror("Error", error)
+            else:
+                on_success(response)
+        self.master.after(50, self._poll_remote)
+
     def create_remote_process(self):
         try:
             name = simpledialog.askstring("Input", "Process Name:")
             priority = simpledialog.askinteger("Input", "Priority (0-10):", minvalue=0, maxvalue=10)
             burst = simpledialog.askinteger("Input", "Burst Time:", minvalue=1)
             arrival = simpledialog.askinteger("Input", "Arrival Time:", minvalue=0)
-            if all([name, priority is not None, burst, arrival]):
-                # Connect to server
-                with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
-                    s.connect(("localhost", 9999))  # Replace with server's actual IP
-                    request = {
-                        "action": "create_process",
-                        "name": name,
-                        "priority": priority,
-                        "burst": burst,
-                        "arrival": arrival
-                    }
-                    s.send(json.dumps(request).encode())
-                    response = json.loads(s.recv(1024).decode())
-                    if response["status"] == "success":
-                        messagebox.showinfo("Success", f"Remote process created with PID: {response['pid']}")
-                    else:
-                        messagebox.showerror("Error", response["message"])
-            else:
+            memory_kb = simpledialog.askinteger("Input", "Memory (KB):", minvalue=1, initialvalue=128)
+            if not all([name, priority is not None, burst, arrival is not None, memory_kb]):
                 raise ValueError("Incomplete input")
+            request = {"action": "create_process", "name": name, "priority": priority, "burst": burst,
+                       "arrival": arrival, "memory_kb": memory_kb}
+            self.run_remote(request, lambda r: messagebox.showinfo(
+                "Success", f"Remote process created with PID: {r['pid']}"), "Failed to create remote process")
         except Exception as e:
             messagebox.showerror("Error", f"Failed to create remote process: {str(e)}")
 
-    def view_remote_processes(self):
+    def create_remote_batch(self):
         try:
-            with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
-                s.connect(("localhost", 9999))  # Replace with server's actual IP
-                request = {"action": "list_processes"}
-                s.send(json.dumps(request).encode())
-                response = json.loads(s.recv(1024).decode())
-                if response["status"] == "success":
-                    win = tk.Toplevel(self.master)
-                    win.title("Remote Processes")
-                    tree = ttk.Treeview(win, columns=("PID", "Name", "State"), show="headings")
-                    tree.heading("PID", text="PID")
-                    tree.heading("Name", text="Name")
-                    tree.heading("State", text="State")
-                    tree.column("PID", width=100)
-                    tree.column("Name", width=200)
-                    tree.column("State", width=100)
-                    for proc in response["processes"]:
-                        tree.insert("", "end", values=(proc["pid"], proc["name"], proc["state"]))
-                    tree.pack(fill="both", expand=True, padx=10, pady=10)
-                else:
-                    messagebox.showerror("Error", response["message"])
+            prefix = simpledialog.askstring("Input", "Name prefix:")
+            count = simpledialog.askinteger("Input", "Number of processes:", minvalue=1, maxvalue=100000)
+            priority = simpledialog.askinteger("Input", "Priority (0-10):", minvalue=0, maxvalue=10)
+            burst = simpledialog.askinteger("Input", "Burst Time:", minvalue=1)
+            if not (prefix and count and priority is not None and burst):
+                raise ValueError("Incomplete input")
+            specs = [{"name": f"{prefix}-{i}", "priority": priority, "burst": burst, "arrival": 0}
+                     for i in range(count)]
+
+            def done(response):
+                failed = [r["message"] for r in response["results"] if r["status"] != "success"]
+                summary = f"{count - len(failed)} of {count} remote processes created"
+                if failed:
+                    summary += f"\nFirst error: {failed[0]}"
+                messagebox.showinfo("Batch Create", summary)
+
+            self.run_remote({"action": "create_processes", "processes": specs}, done,
+                            "Failed to create remote processes")
         except Exception as e:
-            messagebox.showerror("Error", f"Failed to fetch remote processes: {str(e)}")
+            messagebox.showerror("Error", f"Failed to create remote processes: {str(e)}")
+
+    def view_remote_processes(self):
+        def show(response):
+            source = TableSource(("PID", "Name", "State"), response["processes"],
+                                 lambda p: (p["pid"], p["name"], p["state"]))
+            show_table(self.master, "Remote Processes", source, {"PID": 100, "Name": 200, "State": 100})
+
+        # Streamed in chunks so a large table never travels as one frame
+        self.run_remote({"action": "list_processes", "fields": ["pid", "name", "state"], "chunk": 1000}, show,
+                        "Failed to fetch remote processes")
+
+    def migrate_remote_process(self):
+        # Needs the coordinator from cluster.py
+        pid = simpledialog.askstring("Input", "PID to migrate:")
+        node = simpledialog.askstring("Input", "Target node:")
+        if not (pid and node):
+            messagebox.showerror("Error", "Incomplete input")
+            return
+        self.run_remote({"action": "migrate_process", "pid": pid, "to": node}, lambda r: messagebox.showinfo(
+            "Success", f"{pid} moved from {r['from']} to {r['to']}"), "Failed to migrate process")
+
+    def view_cluster_stats(self):
+        def show(response):
+            nodes = response["nodes"] if "nodes" in response else {response.get("node") or "server": response["stats"]}
+            lines = [f"{node}: {s['processes']} processes, {s['ready']} ready, "
+                     f"{s['total_frames'] - s['free_frames']}/{s['total_frames']} frames used"
+                     for node, s in nodes.items() if s]
+            messagebox.showinfo("Cluster Stats", "\n".join(lines))
+
+        self.run_remote({"action": "stats"}, show, "Failed to fetch stats")
 
 if __name__ == "__main__":
     root = tk.Tk()
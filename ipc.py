@@ -0,0 +1,214 @@
+import itertools
+import os
+import queue
+import threading
+import weakref
+from contextlib import contextmanager
+from multiprocessing import shared_memory
+
+# Inter-process communication primitives used by the Kernel.
+
+_segment_ids = itertools.count(1)
+
+class MailboxRegistry:
+    # One bounded FIFO mailbox per pid. Send and receive touch only the receiver's
+    # mailbox, so they are O(1) and callers for different pids never contend.
+    def __init__(self, capacity=1024):
+        self.capacity = capacity
+        self.mailboxes = {}  # pid -> queue.Queue of (sender pid, message)
+
+    def create(self, pid):
+        self.mailboxes[pid] = queue.Queue(self.capacity)
+
+    def remove(self, pid):
+        self.mailboxes.pop(pid, None)
+
+    def send(self, sender_pid, receiver_pid, message, timeout=0):
+        # timeout=0 never blocks, None blocks until there is room; raises queue.Full
+        mailbox = self.mailboxes.get(receiver_pid)
+        if mailbox is None:
+            raise KeyError(receiver_pid)
+        mailbox.put((sender_pid, message), timeout != 0, timeout or None)
+
+    def receive(self, pid, timeout=0):
+        # Returns (sender pid, message), or None if nothing arrived within `timeout`
+        mailbox = self.mailboxes.get(pid)
+        if mailbox is None:
+            raise KeyError(pid)
+        try:
+            return mailbox.get(timeout != 0, timeout or None)
+        except queue.Empty:
+            return None
+
+    def receive_many(self, pid, max_items=None, timeout=0):
+        # Waits up to `timeout` for the first message, then drains without blocking
+        first = self.receive(pid, timeout)
+        if first is None:
+            return []
+        messages = [first]
+        mailbox = self.mailboxes.get(pid)
+        while mailbox is not None and (max_items is None or len(messages) < max_items):
+            try:
+                messages.append(mailbox.get_nowait())
+            except queue.Empty:
+                break
+        return messages
+
+    def pending(self, pid):
+        mailbox = self.mailboxes.get(pid)
+        return mailbox.qsize() if mailbox else 0
+
+class RWLock:
+    # Any number of readers or a single writer. Waiting writers block new readers
+    # so a steady stream of readers cannot starve them.
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._readers = 0
+        self._writer = False
+        self._waiting_writers = 0
+
+    def acquire_read(self):
+        with self._cond:
+            while self._writer or self._waiting_writers:
+                self._cond.wait()
+            self._readers += 1
+
+    def release_read(self):
+        with self._cond:
+            self._readers -= 1
+            if not self._readers:
+                self._cond.notify_all()
+
+    def acquire_write(self):
+        with self._cond:
+            self._waiting_writers += 1
+            while self._writer or self._readers:
+                self._cond.wait()
+            self._waiting_writers -= 1
+            self._writer = True
+
+    def release_write(self):
+        with self._cond:
+            self._writer = False
+            self._cond.notify_all()
+
+    @contextmanager
+    def reading(self):
+        self.acquire_read()
+        try:
+            yield
+        finally:
+            self.release_read()
+
+    @contextmanager
+    def writing(self):
+        self.acquire_write()
+        try:
+            yield
+        finally:
+            self.release_write()
+
+class SharedSegment:
+    # A named block of OS shared memory. Other OS processes (e.g. server workers)
+    # can map the same bytes with shared_memory.SharedMemory(name=segment.os_name);
+    # the reader-writer lock orders the threads of this process.
+    def __init__(self, group, name, size):
+        if size <= 0:
+            raise ValueError("Segment size must be positive")
+        self.group = group
+        self.name = name
+        self.os_name = f"simos{os.getpid()}_{next(_segment_ids)}"
+        self.shm = shared_memory.SharedMemory(name=self.os_name, create=True, size=size)
+        self.size = size
+        self.lock = RWLock()
+        self.attached = set()  # pids using the segment
+
+    def write(self, data, offset=0):
+        data = memoryview(data).cast("B")
+        if offset < 0 or offset + len(data) > self.size:
+            raise ValueError(f"Write of {len(data)} bytes at {offset} overflows segment '{self.name}' ({self.size} bytes)")
+        with self.lock.writing():
+            self.shm.buf[offset:offset + len(data)] = data
+        return len(data)
+
+    @contextmanager
+    def reading(self, offset=0, length=None):
+        # Yields a read-only memoryview straight onto the shared bytes (no copy),
+        # valid only inside the with block
+        end = self.size if length is None else offset + length
+        with self.lock.reading():
+            view = self.shm.buf[offset:end].toreadonly()
+            try:
+                yield view
+            finally:
+                view.release()
+
+    def read(self, offset=0, length=None):
+        with self.reading(offset, length) as view:
+            return bytes(view)
+
+    def close(self):
+        self.shm.close()
+        self.shm.unlink()
+
+class SharedMemoryRegistry:
+    # Segments are named within a process group, so groups cannot see each other's data
+    def __init__(self):
+        self.segments = {}  # (group, name) -> SharedSegment
+        self.by_pid = {}  # pid -> set of (group, name) it is attached to
+        self._lock = threading.Lock()
+        # Unlinks the segments when the registry is collected or at exit, whichever
+        # comes first, without keeping the registry (and its Kernel) alive
+        self._finalizer = weakref.finalize(self, _close_segments, self.segments, self.by_pid)
+
+    def create(self, group, name, size, pid):
+        with self._lock:
+            if (group, name) in self.segments:
+                raise ValueError(f"Shared segment '{name}' already exists in group {group}")
+            segment = self.segments[(group, name)] = SharedSegment(group, name, size)
+            self._attach(segment, pid)
+            return segment
+
+    def attach(self, group, name, pid):
+        with self._lock:
+            segment = self.segments.get((group, name))
+            if segment is None:
+                raise KeyError(f"No shared segment '{name}' in group {group}")
+            self._attach(segment, pid)
+            return segment
+
+    def _attach(self, segment, pid):
+        segment.attached.add(pid)
+        self.by_pid.setdefault(pid, set()).add((segment.group, segment.name))
+
+    def get(self, group, name):
+        return self.segments.get((group, name))
+
+    def get_or_create(self, group, name, size, pid):
+        # The segment, created first if missing, in one step so racing callers share it
+        with self._lock:
+            segment = self.segments.get((group, name))
+            if segment is None:
+                segment = self.segments[(group, name)] = SharedSegment(group, name, size)
+            self._attach(segment, pid)
+            return segment
+
+    def detach_all(self, pid):
+        # Segments are unlinked once their last process detaches
+        with self._lock:
+            for key in self.by_pid.pop(pid, ()):
+                segment = self.segments[key]
+                segment.attached.discard(pid)
+                if not segment.attached:
+                    del self.segments[key]
+                    segment.close()
+
+    def close_all(self):
+        with self._lock:
+            _close_segments(self.segments, self.by_pid)
+
+def _close_segments(segments, by_pid):
+    for segment in segments.values():
+        segment.close()
+    segments.clear()
+    by_pid.clear()
@@ -0,0 +1,91 @@
+import argparse
+import asyncio
+import subprocess
+import sys
+import time
+from protocol import CODECS, JSON, encode_frame, read_frame, wait_for_port
+
+# Load generator for OSServer: each connection keeps `window` requests in flight
+# and matches responses to requests by id.
+
+async def client(host, port, requests, window, action, latencies, batch=100, codec="json"):
+    reader, writer = await asyncio.open_connection(host, port)
+    wire = JSON
+    if codec != "json":
+        writer.write(encode_frame({"action": "hello", "codecs": [codec]}))
+        wire = CODECS[(await read_frame(reader))["codec"]]
+    sent_at = {}
+    next_id = 0
+    received = 0
+    errors = 0
+
+    def send_more():
+        nonlocal next_id
+        while next_id < requests and len(sent_at) < window:
+            if action == "create_process":
+                request = {"action": "create_process", "name": f"load-{next_id}", "priority": next_id % 11,
+                           "burst": 1, "arrival": 0, "id": next_id}
+            elif action == "create_processes":
+                request = {"action": "create_processes", "id": next_id,
+                           "processes": [{"name": f"load-{next_id}-{i}", "priority": i % 11, "burst": 1, "arrival": 0}
+                                         for i in range(batch)]}
+            else:
+                request = {"action": action, "id": next_id}
+            sent_at[next_id] = time.perf_counter()
+            writer.write(encode_frame(request, wire))
+            next_id += 1
+
+    send_more()
+    while received < requests:
+        await writer.drain()
+        response = await read_frame(reader, wire)
+        if response is None:
+            raise ConnectionError("Server closed the connection")
+        latencies.append(time.perf_counter() - sent_at.pop(response["id"]))
+        if response.get("status") != "success":
+            errors += 1
+        received += 1
+        send_more()
+    writer.close()
+    await writer.wait_closed()
+    return errors
+
+async def run(host, port, connections, requests, window, action, batch=100, codec="json"):
+    latencies = []
+    start = time.perf_counter()
+    errors = await asyncio.gather(*(client(host, port, requests, window, action, latencies, batch, codec)
+                                    for _ in range(connections)))
+    elapsed = time.perf_counter() - start
+    total = connections * requests
+    latencies.sort()
+    print(f"{total} {action} requests over {connections} connections (window {window}, {codec}) in {elapsed:.2f}s")
+    print(f"throughput: {total / elapsed:.0f} req/s, errors: {sum(errors)}")
+    if action == "create_processes":
+        print(f"processes created: {total * batch / elapsed:.0f}/s in batches of {batch}")
+    print(f"latency p50 {latencies[len(latencies) // 2] * 1e3:.2f} ms, "
+          f"p99 {latencies[int(len(latencies) * 0.99)] * 1e3:.2f} ms")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load-test a running OSServer")
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--port", type=int, default=9999)
+    parser.add_argument("--connections", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=10000, help="Requests per connection")
+    parser.add_argument("--window", type=int, default=64, help="Pipelined requests in flight per connection")
+    parser.add_argument("--action", default="create_process", choices=["create_process", "create_processes", "list_processes"])
+    parser.add_argument("--batch", type=int, default=100, help="Processes per create_processes request")
+    parser.add_argument("--codec", default="json", choices=sorted(CODECS))
+    parser.add_argument("--spawn", action="store_true", help="Start a local server process for the run")
+    args = parser.parse_args()
+
+    server = None
+    if args.spawn:
+        server = subprocess.Popen([sys.executable, "server.py", "--host", args.host, "--port", str(args.port)],
+                                  stdout=subprocess.DEVNULL)
+        wait_for_port(args.host, args.port)
+    try:
+        asyncio.run(run(args.host, args.port, args.connections, args.requests, args.window, args.action, args.batch, args.codec))
+    finally:
+        if server:
+            server.terminate()
+            server.wait()
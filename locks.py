@@ -0,0 +1,59 @@
+import threading
+import time
+
+# Locks used inside the Kernel, with contention counters.
+#
+# Lock order: a thread holding one of these may only acquire locks further down
+# the list, never one above it.
+#   1. Kernel.table_lock          (process table writes, snapshots and batches; lookups are lock-free)
+#   2. ResourceManager.lock       (its callbacks move processes between queues)
+#   3. Scheduler queue locks      (ready, blocked, suspended, cpu - in that order)
+#   4. MemoryManager.lock         (frame allocator, page tables, replacement policy)
+# MailboxRegistry, SharedMemoryRegistry and SwapSpace synchronise internally and
+# call no other kernel code, so they can be used under any of the above.
+
+class CountingLock:
+    # Wraps a Lock (or RLock with reentrant=True) and counts acquisitions, how many
+    # of them found the lock taken, and the total time spent waiting for it
+    def __init__(self, name, reentrant=False):
+        self.name = name
+        self._lock = threading.RLock() if reentrant else threading.Lock()
+        self.acquisitions = 0
+        self.contended = 0
+        self.wait_time = 0.0
+        # Let threading.Condition save and restore a reentrant lock's recursion level
+        for attr in ("_release_save", "_acquire_restore", "_is_owned"):
+            if hasattr(self._lock, attr):
+                setattr(self, attr, getattr(self._lock, attr))
+
+    def acquire(self, blocking=True, timeout=-1):
+        if self._lock.acquire(False):
+            self.acquisitions += 1  # Only updated while holding the lock
+            return True
+        if not blocking:
+            return False
+        start = time.perf_counter()
+        if not self._lock.acquire(True, timeout):
+            return False
+        self.acquisitions += 1
+        self.contended += 1
+        self.wait_time += time.perf_counter() - start
+        return True
+
+    def release(self):
+        self._lock.release()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+    def stats(self):
+        return {"acquisitions": self.acquisitions, "contended": self.contended,
+                "wait_ms": round(self.wait_time * 1e3, 3)}
+
+    def reset_stats(self):
+        self.acquisitions = self.contended = 0
+        self.wait_time = 0.0
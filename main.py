@@ -1,23 +1,46 @@
-import uuid
 import json
+import heapq
+import itertools
 import queue
+import struct
 import threading
-from collections import deque
-from memory import MemoryManager
+from collections import OrderedDict
+from contextlib import contextmanager
+from locks import CountingLock
+from memory import MemoryManager, PageTable
+from ipc import MailboxRegistry, SharedMemoryRegistry
+import scheduling
 
 # Load configuration
 try:
     with open("config.json", "r") as f:
         CONFIG = json.load(f)
 except FileNotFoundError:
-    CONFIG = {"page_size_kb": 64, "total_memory_kb": 1024}
+    CONFIG = {"page_size_kb": 64, "total_memory_kb": 1024, "replacement_policy": "lru", "mailbox_capacity": 1024,
+              "shared_memory_kb": 64, "resources": {"Printer": 1}, "banker": False,
+              "server_host": "localhost", "server_port": 9999, "request_timeout": 5.0,
+              "wire_codecs": ["msgpack", "struct", "json"], "tlb_entries": 64, "tlb_associativity": 4,
+              "tlb_policy": "lru", "swap_kb": 0, "swap_file": None, "swap_workers": 2, "swap_read_ahead": 2,
+              "resident_sets": None, "resident_set_window": 1000, "memory_allocator": "frames"}
     with open("config.json", "w") as f:
         json.dump(CONFIG, f, indent=4)
 
+# PID allocation
+class PidAllocator:
+    # Monotonic and never reused, so pids cannot collide however many processes come and go
+    def __init__(self, prefix=""):
+        self.prefix = prefix
+        self._counter = itertools.count(1)
+
+    def allocate(self):
+        return f"{self.prefix}{next(self._counter)}"
+
+DEFAULT_PIDS = PidAllocator()
+
 # Process Control Block (PCB)
 class Process:
-    def __init__(self, name, priority, burst, arrival):
-        self.pid = str(uuid.uuid4())[:4]
+    def __init__(self, name, priority, burst, arrival, pid=None):
+        self.pid = pid or DEFAULT_PIDS.allocate()
         self.name = name
         self.state = "new"
         self.priority = priority
@@ -25,9 +48,10 @@ class Process:
         self.arrival = arrival
         self.parent = None
         self.children = []
+        self.pgid = self.pid  # Process group, shares named memory segments
         self.memory_required = 128  # Default memory in KB
         self.memory_allocated = None
-        self.page_table = []  # List of frame indices
+        self.page_table = PageTable()  # Page number -> frame
         self.registers = {"PC": 0, "ACC": 0, "SP": 0}
         self.processor = "CPU-1"
         self.io_state = "idle"
@@ -37,62 +61,371 @@ class Process:
         return f"{self.pid} - {self.name} ({self.state})"
 
 # Resource Manager for Synchronization
+class ResourceClass:
+    def __init__(self, name, instances):
+        if instances <= 0:
+            raise ValueError("A resource needs at least one instance")
+        self.name = name
+        self.total = instances
+        self.available = instances
+        self.holders = {}  # pid -> instances held
+        self.waiters = OrderedDict()  # pid -> instances requested, FIFO
+
 class ResourceManager:
-    def __init__(self, resource_name="Printer", max_available=1):
-        self.resource_name = resource_name
-        self.semaphore = threading.Semaphore(max_available)
-        self.current_holder = None
-
-    def acquire_resource(self, pid):
-        self.semaphore.acquire()
-        self.current_holder = pid
-        return f"Resource '{self.resource_name}' acquired by {pid}"
-
-    def release_resource(self, pid):
-        if self.current_holder == pid:
-            self.current_holder = None
-            self.semaphore.release()
-            return f"Resource '{self.resource_name}' released by {pid}"
-        return f"Error: {pid} does not hold '{self.resource_name}'"
-
-    def get_status(self):
-        return f"Resource '{self.resource_name}' held by {self.current_holder or 'None'}"
+    # Counting resources with FIFO wait queues. Requests never block the calling
+    # thread unless a timeout is given: a process that has to wait is queued and
+    # reported through on_block (the Kernel moves it to the blocked queue), and
+    # on_wakeup fires once a release grants its request.
+    #
+    # Every new wait is checked for a wait-for cycle starting at the waiter, which is
+    # the only place a cycle can appear. In Banker's mode requests are only granted
+    # if the state stays safe with respect to the claims given to declare_max_claims.
+    def __init__(self, resources=None, banker=False, on_block=None, on_wakeup=None):
+        self.classes = {}
+        for name, instances in (resources or {"Printer": 1}).items():
+            self.add_resource(name, instances)
+        self.banker = banker
+        self.on_block = on_block
+        self.on_wakeup = on_wakeup
+        self.waiting_for = {}  # pid -> resource it is queued on
+        self.held = {}  # pid -> {resource: instances}
+        self.max_claims = {}  # pid -> {resource: maximum instances}
+        self.deadlocks = []  # Cycles found when a wait was added
+        self.lock = CountingLock("resources", reentrant=True)
+        self.granted = threading.Condition(self.lock)
+
+    def add_resource(self, name, instances):
+        if name in self.classes:
+            raise ValueError(f"Resource '{name}' already exists")
+        self.classes[name] = ResourceClass(name, instances)
+
+    def _resource(self, name):
+        resource = self.classes.get(name)
+        if resource is None:
+            raise ValueError(f"Unknown resource '{name}'")
+        return resource
+
+    def declare_max_claims(self, pid, claims):
+        with self.lock:
+            for name, maximum in claims.items():
+                if maximum > self._resource(name).total:
+                    raise ValueError(f"Claim of {maximum} exceeds the {self._resource(name).total} instances of '{name}'")
+            self.max_claims[pid] = dict(claims)
+
+    def acquire(self, pid, name="Printer", count=1, timeout=0, wait=True):
+        # Returns "granted", "waiting", "deadlock", "denied" or "timeout"
+        with self.lock:
+            resource = self._resource(name)
+            if count <= 0 or count > resource.total:
+                raise ValueError(f"Cannot request {count} of {resource.total} instances of '{name}'")
+            if pid in self.waiting_for:
+                raise ValueError(f"{pid} is already waiting for '{self.waiting_for[pid]}'")
+            if self.banker:
+                claim = self.max_claims.get(pid, {}).get(name)
+                if claim is None or self.held.get(pid, {}).get(name, 0) + count > claim:
+                    raise ValueError(f"{pid} would exceed its declared claim on '{name}'")
+            if not resource.waiters and self._can_grant(pid, resource, count):
+                self._grant(pid, resource, count)
+                return "granted"
+            if not wait:
+                return "denied"
+
+            resource.waiters[pid] = count
+            self.waiting_for[pid] = name
+            if self.on_block:
+                self.on_block(pid)
+            cycle = self.find_cycle(pid)
+            if cycle:
+                self.deadlocks.append(cycle)
+                return "deadlock"
+            if not timeout:
+                return "waiting"
+
+            # The caller asked to wait on this thread
+            self.granted.wait_for(lambda: pid not in resource.waiters, timeout)
+            if pid not in resource.waiters:
+                return "granted"
+            self._cancel_wait(pid)
+            if self.on_wakeup:
+                self.on_wakeup(pid)
+            return "timeout"
+
+    def release(self, pid, name="Printer", count=None):
+        # Releases `count` instances (all by default); returns how many were released
+        with self.lock:
+            resource = self._resource(name)
+            held = resource.holders.get(pid, 0)
+            count = held if count is None else min(count, held)
+            if count <= 0:
+                return 0
+            self._take_back(pid, resource, count)
+            self._grant_waiters(resource)
+            return count
+
+    def release_all(self, pid):
+        # For a terminating process: drop its holds and any pending request
+        with self.lock:
+            if pid in self.waiting_for:
+                self._cancel_wait(pid)
+            for name, count in list(self.held.get(pid, {}).items()):
+                resource = self.classes[name]
+                self._take_back(pid, resource, count)
+                self._grant_waiters(resource)
+            self.max_claims.pop(pid, None)
+
+    def _can_grant(self, pid, resource, count):
+        if resource.available < count:
+            return False
+        if not self.banker:
+            return True
+        # Tentatively grant and check the state stays safe
+        self._grant(pid, resource, count)
+        safe = self.is_safe()
+        self._take_back(pid, resource, count)
+        return safe
+
+    def _grant(self, pid, resource, count):
+        resource.available -= count
+        resource.holders[pid] = resource.holders.get(pid, 0) + count
+        held = self.held.setdefault(pid, {})
+        held[resource.name] = held.get(resource.name, 0) + count
+
+    def _take_back(self, pid, resource, count):
+        resource.available += count
+        resource.holders[pid] -= count
+        self.held[pid][resource.name] -= count
+        if not resource.holders[pid]:
+            del resource.holders[pid]
+            del self.held[pid][resource.name]
+            if not self.held[pid]:
+                del self.held[pid]
+
+    def _cancel_wait(self, pid):
+        resource = self.classes[self.waiting_for.pop(pid)]
+        del resource.waiters[pid]
+        self._grant_waiters(resource)  # Whoever queued behind it may fit now
+
+    def _grant_waiters(self, resource):
+        # Strict FIFO: stop at the first request that cannot be granted yet
+        woken = []
+        while resource.waiters:
+            pid, count = next(iter(resource.waiters.items()))
+            if not self._can_grant(pid, resource, count):
+                break
+            del resource.waiters[pid]
+            del self.waiting_for[pid]
+            self._grant(pid, resource, count)
+            woken.append(pid)
+        if woken:
+            self.granted.notify_all()
+            if self.on_wakeup:
+                for pid in woken:
+                    self.on_wakeup(pid)
+
+    def find_cycle(self, start):
+        # Wait-for edges run from a waiting pid to every holder of the resource it
+        # waits on. Returns the pids of a cycle through `start`, or None.
+        path = [start]
+        stacks = [iter(self.classes[self.waiting_for[start]].holders)]
+        on_path = {start}
+        visited = set()
+        while stacks:
+            holder = next(stacks[-1], None)
+            if holder is None:
+                stacks.pop()
+                done = path.pop()
+                visited.add(done)
+                on_path.discard(done)
+                continue
+            if holder == start:
+                return path + [start]
+            if holder in visited or holder in on_path or holder not in self.waiting_for:
+                continue
+            path.append(holder)
+            on_path.add(holder)
+            stacks.append(iter(self.classes[self.waiting_for[holder]].holders))
+        return None
+
+    def detect_deadlocks(self):
+        # Full scan of the wait-for graph in O(V + E): one DFS over all waiting pids
+        # with shared colouring, reporting a cycle for each back edge it meets
+        with self.lock:
+            cycles = []
+            finished = set()
+            for root in self.waiting_for:
+                if root in finished:
+                    continue
+                path = [root]
+                position = {root: 0}  # Pids on the current DFS path
+                stacks = [iter(self.classes[self.waiting_for[root]].holders)]
+                while stacks:
+                    holder = next(stacks[-1], None)
+                    if holder is None:
+                        stacks.pop()
+                        done = path.pop()
+                        del position[done]
+                        finished.add(done)
+                    elif holder in position:
+                        cycles.append(path[position[holder]:] + [holder])
+                    elif holder not in finished and holder in self.waiting_for:
+                        position[holder] = len(path)
+                        path.append(holder)
+                        stacks.append(iter(self.classes[self.waiting_for[holder]].holders))
+            return cycles
+
+    def is_safe(self):
+        # Banker's safety check. Each process is blocked on the resources where its
+        # remaining need exceeds what is free; per-resource needs are sorted so a
+        # finishing process only unblocks the needs its released instances now cover.
+        work = {name: resource.available for name, resource in self.classes.items()}
+        pids = set(self.held) | set(self.max_claims)
+        needs_by_resource = {}
+        blocked_on = {}
+        for pid in pids:
+            held = self.held.get(pid, {})
+            blocked_on[pid] = 0
+            for name, maximum in self.max_claims.get(pid, {}).items():
+                need = maximum - held.get(name, 0)
+                if need > work[name]:
+                    needs_by_resource.setdefault(name, []).append((need, pid))
+                    blocked_on[pid] += 1
+        for needs in needs_by_resource.values():
+            needs.sort(key=lambda item: item[0])
+        cursor = dict.fromkeys(needs_by_resource, 0)
+        ready = [pid for pid, blocked in blocked_on.items() if not blocked]
+        finished = 0
+        while ready:
+            pid = ready.pop()
+            finished += 1
+            for name, count in self.held.get(pid, {}).items():
+                work[name] += count
+                needs = needs_by_resource.get(name)
+                if not needs:
+                    continue
+                i = cursor[name]
+                while i < len(needs) and needs[i][0] <= work[name]:
+                    other = needs[i][1]
+                    blocked_on[other] -= 1
+                    if not blocked_on[other]:
+                        ready.append(other)
+                    i += 1
+                cursor[name] = i
+        return finished == len(pids)
+
+    def get_status(self, name=None):
+        with self.lock:
+            lines = []
+            for resource in ([self._resource(name)] if name else self.classes.values()):
+                holders = ", ".join(f"{pid}x{count}" for pid, count in resource.holders.items()) or "None"
+                waiting = ", ".join(resource.waiters) or "None"
+                lines.append(f"Resource '{resource.name}' ({resource.available}/{resource.total} free) "
+                             f"held by {holders}; waiting: {waiting}")
+            return "\n".join(lines)
 
 # Kernel
 class Kernel:
-    def __init__(self):
-        self.processes = []
+    # Safe to call from many threads; see locks.py for the lock order. Processes are
+    # set up completely before they enter the table and torn down after they leave it.
+    def __init__(self, pid_prefix=""):
+        self.pids = PidAllocator(pid_prefix)
+        self.processes = {}  # Process table, pid -> Process in creation order
+        self.table_lock = CountingLock("process_table", reentrant=True)
         self.scheduler = Scheduler()
         self.memory_manager = MemoryManager(
             total_memory_kb=CONFIG["total_memory_kb"],
-            page_size_kb=CONFIG["page_size_kb"]
+            page_size_kb=CONFIG["page_size_kb"],
+            replacement_policy=CONFIG.get("replacement_policy", "lru"),
+            tlb_entries=CONFIG.get("tlb_entries", 64),
+            tlb_associativity=CONFIG.get("tlb_associativity", 4),
+            tlb_policy=CONFIG.get("tlb_policy", "lru"),
+            swap_kb=CONFIG.get("swap_kb", 0),  # 0 drops evicted pages, as without swap
+            swap_path=CONFIG.get("swap_file"),  # None for a private temporary file
+            swap_workers=CONFIG.get("swap_workers", 2),
+            read_ahead=CONFIG.get("swap_read_ahead", 2),
+            resident_sets=CONFIG.get("resident_sets"),  # None, "ws" or "pff"
+            resident_set_window=CONFIG.get("resident_set_window", 1000),
+            allocator=CONFIG.get("memory_allocator", "frames")  # "frames" or "buddy"
+        )
+        self.resource_manager = ResourceManager(
+            CONFIG.get("resources", {"Printer": 1}),
+            banker=CONFIG.get("banker", False),
+            on_block=lambda pid: self.change_state(pid, "blocked"),
+            on_wakeup=lambda pid: self.change_state(pid, "ready")
         )
-        self.resource_manager = ResourceManager()
-        self.message_queue = queue.Queue()  # For message passing
-        self.shared_memory = {"data": None, "lock": threading.Lock()}  # For shared memory
+        self.mailboxes = MailboxRegistry(CONFIG.get("mailbox_capacity", 1024))  # For message passing
+        self.shared_memory = SharedMemoryRegistry()  # Named segments per process group
+        self.shared_memory_size = CONFIG.get("shared_memory_kb", 64) * 1024
 
-    def create_process(self, name, priority, burst, arrival):
-        if not name or priority < 0 or burst <= 0 or arrival < 0:
+    def create_process(self, name, priority, burst, arrival, memory_kb=None, pgid=None):
+        # memory_kb defaults to Process.memory_required; pgid joins an existing
+        # process group instead of starting a new one
+        if not name or priority < 0 or burst <= 0 or arrival < 0 or (memory_kb is not None and memory_kb <= 0):
             raise ValueError("Invalid process parameters")
-        p = Process(name, priority, burst, arrival)
-        self.memory_manager.allocate_memory(p)
-        self.processes.append(p)
+        if pgid is not None:
+            self._check_group(pgid)
+        p = Process(name, priority, burst, arrival, self.pids.allocate())
+        if memory_kb is not None:
+            p.memory_required = memory_kb
+        if pgid is not None:
+            p.pgid = pgid
+        try:
+            self.memory_manager.allocate_memory(p)
+        except Exception:
+            self.memory_manager.deallocate_memory(p)
+            raise
+        self.mailboxes.create(p.pid)
         self.scheduler.admit(p)
+        with self.table_lock:
+            self.processes[p.pid] = p
+        self._apply_load_control()
         return p
 
+    def fork_process(self, pid):
+        # The child is a copy of the parent in its process group, sharing the
+        # parent's frames copy-on-write, so forking takes no frames until a write
+        parent = self.find_process(pid)
+        if not parent:
+            raise ValueError(f"Process {pid} not found")
+        child = Process(parent.name, parent.priority, parent.burst, parent.arrival, self.pids.allocate())
+        for field in ("pgid", "memory_required", "processor", "io_state", "owner"):
+            setattr(child, field, getattr(parent, field))
+        child.registers = dict(parent.registers)
+        self.memory_manager.fork(parent, child)
+        self.mailboxes.create(child.pid)
+        self.scheduler.admit(child)
+        with self.table_lock:
+            if self.processes.get(pid) is not parent:
+                # The parent went away meanwhile
+                self.memory_manager.deallocate_memory(child)
+                self.mailboxes.remove(child.pid)
+                self.scheduler.remove_process(child)
+                raise ValueError(f"Process {pid} not found")
+            child.parent = parent
+            parent.children.append(child)
+            self.processes[child.pid] = child
+        self._apply_load_control()
+        return child
+
     def destroy_process(self, pid):
-        proc = self.find_process(pid)
+        # Whoever removes the pid from the table does the teardown
+        with self.table_lock:
+            proc = self.processes.pop(pid, None)
         if proc:
-            self.memory_manager.deallocate_memory(proc)
-            self.processes.remove(proc)
+            if proc.parent is not None and proc in proc.parent.children:
+                proc.parent.children.remove(proc)
             self.scheduler.remove_process(proc)
-            if self.resource_manager.current_holder == pid:
-                self.resource_manager.release_resource(pid)
+            self.memory_manager.deallocate_memory(proc)
+            self.mailboxes.remove(pid)
+            self.shared_memory.detach_all(pid)
+            self.resource_manager.release_all(pid)
+            self._apply_load_control()
             return True
         return False
 
     def find_process(self, pid):
-        return next((p for p in self.processes if p.pid == pid), None)
+        # A single dict read is atomic, so lookups skip the table lock; taking it here
+        # convoyed every message send behind the GIL
+        return self.processes.get(pid)
 
     def change_state(self, pid, new_state):
         valid_states = ["new", "ready", "running", "blocked", "suspended", "terminated"]
@@ -100,9 +433,7 @@ class Kernel:
             raise ValueError(f"Invalid state: {new_state}")
         proc = self.find_process(pid)
         if proc:
-            proc.state = new_state
-            self.scheduler.update_queues(proc, new_state)
-            return True
+            return self.scheduler.update_queues(proc, new_state)
         return False
 
     def change_priority(self, pid, new_priority):
@@ -110,47 +441,132 @@ class Kernel:
             raise ValueError("Priority must be between 0 and 10")
         proc = self.find_process(pid)
         if proc:
-            proc.priority = new_priority
+            self.scheduler.change_priority(proc, new_priority)
             return True
         return False
 
-    def acquire_resource(self, pid):
-        return self.resource_manager.acquire_resource(pid)
+    def acquire_resource(self, pid, resource="Printer", count=1, timeout=0):
+        # Never blocks the caller unless timeout > 0; a process that has to wait is blocked
+        if not self.find_process(pid):
+            return f"Process {pid} not found"
+        result = self.resource_manager.acquire(pid, resource, count, timeout)
+        if not self.find_process(pid):
+            # Destroyed while acquiring; its teardown may already have run
+            self.resource_manager.release_all(pid)
+            return f"Process {pid} not found"
+        if result == "granted":
+            return f"Resource '{resource}' acquired by {pid}"
+        if result == "deadlock":
+            cycle = " -> ".join(self.resource_manager.deadlocks[-1])
+            return f"Deadlock detected: {cycle}; {pid} is waiting for '{resource}'"
+        if result == "timeout":
+            return f"Timed out waiting for '{resource}'"
+        return f"{pid} is waiting for '{resource}'"
 
-    def release_resource(self, pid):
-        return self.resource_manager.release_resource(pid)
+    def release_resource(self, pid, resource="Printer", count=None):
+        if self.resource_manager.release(pid, resource, count):
+            return f"Resource '{resource}' released by {pid}"
+        return f"Error: {pid} does not hold '{resource}'"
 
     def get_resource_status(self):
         return self.resource_manager.get_status()
 
-    def send_message(self, sender_pid, receiver_pid, message):
+    def declare_max_claims(self, pid, claims):
+        self.resource_manager.declare_max_claims(pid, claims)
+
+    def detect_deadlocks(self):
+        return self.resource_manager.detect_deadlocks()
+
+    def send_message(self, sender_pid, receiver_pid, message, timeout=0):
         proc = self.find_process(receiver_pid)
         if proc:
-            self.message_queue.put((sender_pid, receiver_pid, message))
+            try:
+                self.mailboxes.send(sender_pid, receiver_pid, message, timeout)
+            except queue.Full:
+                return f"Mailbox of {receiver_pid} is full"
+            except KeyError:
+                return f"Receiver {receiver_pid} not found"
             return f"Message from {sender_pid} to {receiver_pid} queued"
         return f"Receiver {receiver_pid} not found"
 
-    def receive_message(self, pid):
+    def receive_message(self, pid, timeout=0):
+        # timeout=0 polls, a number waits that many seconds, None waits indefinitely
         try:
-            while not self.message_queue.empty():
-                sender, receiver, msg = self.message_queue.get_nowait()
-                if receiver == pid:
-                    return f"Message from {sender}: {msg}"
-            return "No messages for {pid}"
-        except queue.Empty:
-            return "No messages for {pid}"
+            received = self.mailboxes.receive(pid, timeout)
+        except KeyError:
+            return f"Process {pid} not found"
+        if received:
+            sender, msg = received
+            return f"Message from {sender}: {msg}"
+        return f"No messages for {pid}"
+
+    def receive_many(self, pid, max_items=None, timeout=0):
+        # List of (sender pid, message), oldest first
+        try:
+            return self.mailboxes.receive_many(pid, max_items, timeout)
+        except KeyError:
+            return []
+
+    def _check_group(self, pgid):
+        # A group exists while its leader does, or while any process is still in it
+        leader = self.find_process(pgid)
+        if leader is not None and leader.pgid == pgid:
+            return
+        if not any(p.pgid == pgid for p in list(self.processes.values())):
+            raise ValueError(f"Process group {pgid} not found")
+
+    def set_process_group(self, pid, pgid=None):
+        # Moves the process into group `pgid`, or into a new group of its own. It
+        # keeps the segments it has attached; new names resolve in the new group.
+        proc = self.find_process(pid)
+        if not proc:
+            raise ValueError(f"Process {pid} not found")
+        if pgid is None or pgid == pid:
+            proc.pgid = pid
+        else:
+            self._check_group(pgid)
+            proc.pgid = pgid
+        return proc.pgid
+
+    def create_segment(self, pid, name, size):
+        proc = self.find_process(pid)
+        if not proc:
+            raise ValueError(f"Process {pid} not found")
+        return self.shared_memory.create(proc.pgid, name, size, pid)
+
+    def attach_segment(self, pid, name):
+        # Only processes in the creator's group can attach
+        proc = self.find_process(pid)
+        if not proc:
+            raise ValueError(f"Process {pid} not found")
+        return self.shared_memory.attach(proc.pgid, name, pid)
+
+    # The single shared slot of the Process Communication dialog: a kernel-wide
+    # segment holding the writer pid and the text, as two length-prefixed fields
+    _SLOT_HEADER = struct.Struct("<HI")
+
+    def _shared_slot(self):
+        segment = self.shared_memory.get(None, "slot")
+        if segment is None:
+            segment = self.shared_memory.get_or_create(None, "slot", self.shared_memory_size, None)
+        return segment
 
     def write_shared_memory(self, pid, data):
-        with self.shared_memory["lock"]:
-            self.shared_memory["data"] = (pid, data)
-            return f"Shared memory written by {pid}: {data}"
+        writer = str(pid).encode()
+        payload = str(data).encode()
+        record = self._SLOT_HEADER.pack(len(writer), len(payload)) + writer + payload
+        self._shared_slot().write(record)
+        return f"Shared memory written by {pid}: {data}"
 
     def read_shared_memory(self, pid):
-        with self.shared_memory["lock"]:
-            if self.shared_memory["data"]:
-                writer_pid, data = self.shared_memory["data"]
-                return f"Shared memory read by {pid}: {data} (written by {writer_pid})"
-            return "Shared memory is empty"
+        with self._shared_slot().reading() as view:
+            writer_len, data_len = self._SLOT_HEADER.unpack_from(view)
+            if not writer_len:
+                return "Shared memory is empty"
+            start = self._SLOT_HEADER.size
+            writer_pid = str(view[start:start + writer_len], "utf-8")
+            data = str(view[start + writer_len:start + writer_len + data_len], "utf-8")
+        return f"Shared memory read by {pid}: {data} (written by {writer_pid})"
 
     def process_communicate(self, sender_pid, receiver_pid, message, mode="message"):
         if mode == "message":
@@ -159,11 +575,136 @@ class Kernel:
             return self.write_shared_memory(sender_pid, message)
         elif mode == "shared_memory_read":
             return self.read_shared_memory(sender_pid)
+        elif mode == "receive":
+            return self.receive_message(sender_pid)
         else:
             return "Invalid communication mode"
 
+    @contextmanager
+    def batch(self):
+        # Holds the process table for a group of calls, so no other thread creates or
+        # destroys processes in between
+        with self.table_lock:
+            yield self
+
     def list_all_processes(self):
-        return self.processes
+        with self.table_lock:
+            return list(self.processes.values())
+
+    def list_processes(self, offset=0, limit=None):
+        # One page of the table in creation order, without copying the rest of it
+        with self.table_lock:
+            end = None if limit is None else offset + limit
+            return list(itertools.islice(self.processes.values(), offset, end))
+
+    def access_memory(self, pid, vaddr, write=False):
+        # Translates and touches one virtual address; see MemoryManager.access
+        if not self.find_process(pid):
+            raise ValueError(f"Process {pid} not found")
+        address = self.memory_manager.access(pid, vaddr, write)
+        self._apply_load_control()
+        return address
+
+    def _apply_load_control(self):
+        # Carries out the suspends and resumes the resident-set manager decided on
+        # under the memory lock, now that scheduler locks may be taken
+        resident_sets = self.memory_manager.resident_sets
+        if resident_sets is None or not resident_sets.pending:
+            return
+        with self.memory_manager.lock:
+            pending = resident_sets.take_pending()
+        for pid, state in pending:
+            self.change_state(pid, state)
+
+    def translation_stats(self, pid=None):
+        return self.memory_manager.translation_stats(pid)
+
+    def swap_stats(self):
+        return self.memory_manager.swap_stats()
+
+    def sharing_stats(self):
+        return self.memory_manager.sharing_stats()
+
+    def resident_set_stats(self):
+        return self.memory_manager.resident_set_stats()
+
+    def fragmentation_stats(self):
+        return self.memory_manager.fragmentation_stats()
+
+    def simulate_schedule(self, policy="fcfs", **options):
+        # Runs on copies of the current processes; see scheduling.simulate for options
+        return scheduling.simulate(self.list_all_processes(), policy, **options)
+
+    def stats(self):
+        # Load figures a cluster coordinator places processes by
+        sched = self.scheduler
+        mm = self.memory_manager
+        return {
+            "processes": len(self.processes),
+            "ready": len(sched.ready_queue),
+            "blocked": len(sched.blocked_queue),
+            "suspended": len(sched.suspended_queue),
+            "running": 1 if sched.running_process else 0,
+            "free_frames": len(mm.free_frames),
+            "total_frames": mm.total_pages
+        }
+
+    # Migration. The PCB, page table residency and pending messages move; resource
+    # holds and waits are released at the source and shared segments are detached,
+    # as they belong to the source machine. A running process arrives ready.
+    _MIGRATED_FIELDS = ("name", "priority", "burst", "arrival", "pgid", "memory_required",
+                        "registers", "processor", "io_state", "owner")
+
+    def export_process(self, pid):
+        # Removes the process and returns its state as plain (JSON-friendly) data
+        with self.table_lock:
+            proc = self.find_process(pid)
+            if not proc:
+                raise ValueError(f"Process {pid} not found")
+            state = "ready" if proc.state == "running" or pid in self.resource_manager.waiting_for else proc.state
+            exported = {field: getattr(proc, field) for field in self._MIGRATED_FIELDS}
+            exported.update({
+                "pid": pid,
+                "state": state,
+                "parent": proc.parent.pid if proc.parent else None,
+                "children": [child.pid for child in proc.children],
+                "pages": self.memory_manager.export_pages(pid),
+                "messages": [list(item) for item in self.mailboxes.receive_many(pid)]
+            })
+            self.destroy_process(pid)
+            return exported
+
+    def import_process(self, exported):
+        # Recreates a process from export_process under its original pid
+        with self.table_lock:
+            pid = exported["pid"]
+            if pid in self.processes:
+                raise ValueError(f"Process {pid} already exists")
+            p = Process(exported["name"], exported["priority"], exported["burst"], exported["arrival"], pid)
+            for field in self._MIGRATED_FIELDS:
+                setattr(p, field, exported[field])
+            p.parent = self.processes.get(exported["parent"])
+            p.children = [self.processes[c] for c in exported["children"] if c in self.processes]
+            self.memory_manager.import_pages(p, exported["pages"])
+            self.mailboxes.create(pid)
+            for sender, message in exported["messages"]:
+                self.mailboxes.send(sender, pid, message)
+            self.scheduler.admit(p)
+            if exported["state"] in ("blocked", "suspended"):
+                self.scheduler.update_queues(p, exported["state"])
+            self.processes[pid] = p
+        self._apply_load_control()
+        return p
+
+    def lock_stats(self):
+        # Contention counters per lock: acquisitions, contended acquisitions, wait_ms
+        stats = {"process_table": self.table_lock.stats(),
+                 "resources": self.resource_manager.lock.stats(),
+                 "frames": self.memory_manager.lock.stats()}
+        if self.memory_manager.swap is not None:
+            stats["swap"] = self.memory_manager.swap.lock.stats()
+        stats.update(self.scheduler.lock_stats())
+        return stats
 
     def get_pcb_info(self, pid):
         proc = self.find_process(pid)
@@ -180,71 +721,201 @@ class Kernel:
             "Memory Required": f"{proc.memory_required} KB",
             "Memory Allocated": proc.memory_allocated or "None",
             "Page Table": proc.page_table,
+            "Translation": self.memory_manager.translation_stats(pid),
             "CPU Registers": proc.registers,
             "Processor": proc.processor,
             "I/O State": proc.io_state
         }
 
+# Scheduler queues
+class ProcessQueue:
+    # FIFO of processes with O(1) membership tests and removal, indexed by pid
+    def __init__(self):
+        self.items = OrderedDict()
+
+    def append(self, process):
+        self.items[process.pid] = process
+
+    def popleft(self):
+        return self.items.popitem(last=False)[1]
+
+    def remove(self, process):
+        if process not in self:
+            raise ValueError(f"{process.pid} not in queue")
+        del self.items[process.pid]
+
+    def get(self, pid):
+        return self.items.get(pid)
+
+    def __contains__(self, process):
+        return self.items.get(process.pid) is process
+
+    def __iter__(self):
+        return iter(self.items.values())
+
+    def __len__(self):
+        return len(self.items)
+
+class ReadyQueue(ProcessQueue):
+    # Arrival order for FCFS plus one FIFO bucket per priority for priority dispatch.
+    # Priorities with a bucket sit in a min-heap, so dispatch is O(log k) for k distinct priorities.
+    def __init__(self):
+        super().__init__()
+        self.buckets = {}  # priority -> OrderedDict of pid -> process
+        self.priorities = []  # Min-heap of priorities that may have a bucket
+        self.queued_priorities = set()  # Those in the heap, each pushed once
+        self.priority_of = {}  # pid -> priority bucket it is filed under
+
+    def append(self, process):
+        super().append(process)
+        self._file(process, process.priority)
+
+    def popleft(self):
+        process = super().popleft()
+        self._unfile(process)
+        return process
+
+    def remove(self, process):
+        super().remove(process)
+        self._unfile(process)
+
+    def pop_highest_priority(self):
+        # Lowest priority number first, FIFO among equals
+        while self.priorities[0] not in self.buckets:
+            self.queued_priorities.discard(heapq.heappop(self.priorities))
+        bucket = self.buckets[self.priorities[0]]
+        pid, process = next(iter(bucket.items()))
+        del self.items[pid]
+        self._unfile(process)
+        return process
+
+    def reprioritize(self, process, new_priority):
+        self._unfile(process)
+        process.priority = new_priority
+        self._file(process, new_priority)
+
+    def _file(self, process, priority):
+        bucket = self.buckets.get(priority)
+        if bucket is None:
+            bucket = self.buckets[priority] = OrderedDict()
+            if priority not in self.queued_priorities:
+                self.queued_priorities.add(priority)
+                heapq.heappush(self.priorities, priority)
+        bucket[process.pid] = process
+        self.priority_of[process.pid] = priority
+
+    def _unfile(self, process):
+        priority = self.priority_of.pop(process.pid)
+        bucket = self.buckets[priority]
+        del bucket[process.pid]
+        if not bucket:
+            del self.buckets[priority]
+
 # Scheduler
 class Scheduler:
+    # Each queue has its own lock; "cpu" covers the running slot and the states
+    # without a queue. A state change holds the locks of both the old and the new
+    # state, taken in LOCK_ORDER, so process.state always names where the process is.
+    LOCK_ORDER = ("ready", "blocked", "suspended", "cpu")
+
     def __init__(self):
-        self.ready_queue = deque()
-        self.blocked_queue = deque()
-        self.suspended_queue = deque()
+        self.ready_queue = ReadyQueue()
+        self.blocked_queue = ProcessQueue()
+        self.suspended_queue = ProcessQueue()
         self.running_process = None
+        self.locks = {name: CountingLock(name) for name in self.LOCK_ORDER}
+
+    @contextmanager
+    def _locking(self, *states):
+        names = {state if state in ("ready", "blocked", "suspended") else "cpu" for state in states}
+        held = [self.locks[name] for name in self.LOCK_ORDER if name in names]
+        for lock in held:
+            lock.acquire()
+        try:
+            yield
+        finally:
+            for lock in reversed(held):
+                lock.release()
 
     def admit(self, process):
-        process.state = "ready"
-        self.ready_queue.append(process)
+        with self.locks["ready"]:
+            process.state = "ready"
+            self.ready_queue.append(process)
 
     def remove_process(self, process):
+        self.update_queues(process, "terminated")
+
+    def update_queues(self, process, new_state):
+        # Returns False if the process was terminated meanwhile. The state is read
+        # before its lock is held, so the move is retried if it changed under us.
+        while True:
+            current = process.state
+            # A process starting to run displaces the running one into the ready queue
+            states = (current, new_state, "ready") if new_state == "running" else (current, new_state)
+            with self._locking(*states):
+                if process.state != current:
+                    continue
+                if current == "terminated":
+                    return False
+                self._unqueue(process)
+                process.state = new_state
+                if new_state == "ready":
+                    self.ready_queue.append(process)
+                elif new_state == "blocked":
+                    self.blocked_queue.append(process)
+                elif new_state == "suspended":
+                    self.suspended_queue.append(process)
+                elif new_state == "running":
+                    if self.running_process is not None:
+                        self.running_process.state = "ready"
+                        self.ready_queue.append(self.running_process)
+                    self.running_process = process
+                return True
+
+    def _unqueue(self, process):
         if process in self.ready_queue:
             self.ready_queue.remove(process)
         elif process in self.blocked_queue:
             self.blocked_queue.remove(process)
         elif process in self.suspended_queue:
             self.suspended_queue.remove(process)
-        elif self.running_process == process:
+        elif self.running_process is process:
             self.running_process = None
 
-    def update_queues(self, process, new_state):
-        self.remove_process(process)
-        if new_state == "ready":
-            self.ready_queue.append(process)
-        elif new_state == "blocked":
-            self.blocked_queue.append(process)
-        elif new_state == "suspended":
-            self.suspended_queue.append(process)
-        elif new_state == "running":
-            self.running_process = process
+    def change_priority(self, process, new_priority):
+        with self.locks["ready"]:
+            if process in self.ready_queue:
+                self.ready_queue.reprioritize(process, new_priority)
+            else:
+                process.priority = new_priority
 
     def dispatch_fcfs(self):
-        if self.running_process:
-            self.running_process.state = "ready"
-            self.ready_queue.append(self.running_process)
-        if self.ready_queue:
-            self.running_process = self.ready_queue.popleft()
-            self.running_process.state = "running"
-            return self.running_process
-        self.running_process = None
-        return None
+        with self._locking("ready", "running"):
+            return self._dispatch(self.ready_queue.popleft)
 
     def dispatch_priority(self):
+        with self._locking("ready", "running"):
+            return self._dispatch(self.ready_queue.pop_highest_priority)
+
+    def _dispatch(self, pick):
         if self.running_process:
             self.running_process.state = "ready"
             self.ready_queue.append(self.running_process)
         if self.ready_queue:
-            self.running_process = min(self.ready_queue, key=lambda p: p.priority)
-            self.ready_queue.remove(self.running_process)
+            self.running_process = pick()
             self.running_process.state = "running"
             return self.running_process
         self.running_process = None
         return None
 
     def view_queues(self):
-        return {
-            "Ready": list(self.ready_queue),
-            "Blocked": list(self.blocked_queue),
-            "Suspended": list(self.suspended_queue),
-            "Running": [self.running_process] if self.running_process else []
-        }
\ No newline at end of file
+        with self._locking(*self.LOCK_ORDER):
+            return {
+                "Ready": list(self.ready_queue),
+                "Blocked": list(self.blocked_queue),
+                "Suspended": list(self.suspended_queue),
+                "Running": [self.running_process] if self.running_process else []
+            }
+
+    def lock_stats(self):
+        return {name: lock.stats() for name, lock in self.locks.items()}
\ No newline at end of file
@@ -1,30 +1,266 @@
-from collections import deque
+from array import array
+from collections import OrderedDict
+from itertools import islice
 import json
+from buddy import BuddyAllocator
+from locks import CountingLock
+from replacement import make_policy
+from swap import SwapSpace, page_image
+from tlb import TLB
+from workingset import ResidentSetManager
+from trace_sim import simulate_trace, lru_miss_ratio_curve
 
 class Page:
-    def __init__(self, pid, page_number):
+    __slots__ = ("pid", "page_number", "referenced", "dirty")
+
+    def __init__(self, pid, page_number, referenced=False, dirty=False):
         self.pid = pid
         self.page_number = page_number
+        self.referenced = referenced
+        self.dirty = dirty
 
     def __str__(self):
         return f"{self.pid}:{self.page_number}"
 
+class FrameTable:
+    # Column-per-field frame table. Pids are interned to small ints so a frame
+    # costs a few bytes instead of a Python object; Page views are built on demand.
+    FREE = -1
+
+    def __init__(self, total_frames):
+        self.owner = array("i", [self.FREE]) * total_frames
+        self.page_number = array("q", [0]) * total_frames
+        self.referenced = array("B", [0]) * total_frames
+        self.dirty = array("B", [0]) * total_frames
+        self.last_access = array("Q", [0]) * total_frames
+        self.refs = array("I", [0]) * total_frames  # Page tables mapping the frame
+        self.clock = 0
+        self._pid_ids = {}  # pid -> interned id
+        self._pids = []  # interned id -> pid
+        self._free_ids = []
+
+    def intern(self, pid):
+        pid_id = self._pid_ids.get(pid)
+        if pid_id is None:
+            if self._free_ids:
+                pid_id = self._free_ids.pop()
+                self._pids[pid_id] = pid
+            else:
+                pid_id = len(self._pids)
+                self._pids.append(pid)
+            self._pid_ids[pid] = pid_id
+        return pid_id
+
+    def release(self, pid):
+        # Only call once the pid owns no frames
+        pid_id = self._pid_ids.pop(pid, None)
+        if pid_id is not None:
+            self._pids[pid_id] = None
+            self._free_ids.append(pid_id)
+
+    def set(self, frame, pid, page_number):
+        self.owner[frame] = self.intern(pid)
+        self.page_number[frame] = page_number
+        self.referenced[frame] = 1
+        self.dirty[frame] = 0
+        self.refs[frame] = 1
+        self.touch(frame)
+
+    def clear(self, frame):
+        self.owner[frame] = self.FREE
+        self.referenced[frame] = 0
+        self.dirty[frame] = 0
+        self.refs[frame] = 0
+
+    def touch(self, frame, write=False):
+        self.clock += 1
+        self.last_access[frame] = self.clock
+        self.referenced[frame] = 1
+        if write:
+            self.dirty[frame] = 1
+
+    def pid(self, frame):
+        pid_id = self.owner[frame]
+        return None if pid_id == self.FREE else self._pids[pid_id]
+
+    def __getitem__(self, frame):
+        pid_id = self.owner[frame]
+        if pid_id == self.FREE:
+            return None
+        return Page(self._pids[pid_id], self.page_number[frame],
+                    bool(self.referenced[frame]), bool(self.dirty[frame]))
+
+    def __len__(self):
+        return len(self.owner)
+
+    def __iter__(self):
+        return (self[i] for i in range(len(self.owner)))
+
+class PageTableEntry:
+    __slots__ = ("frame", "present", "valid")
+
+    def __init__(self, frame=None, present=False, valid=True):
+        self.frame = frame
+        self.present = present  # Page is resident in `frame`
+        self.valid = valid  # Page belongs to the process' address space
+
+class PageTable:
+    def __init__(self):
+        self.entries = {}  # Maps page number to PageTableEntry
+
+    def map(self, page_number, frame):
+        entry = self.entries.get(page_number)
+        if entry is None:
+            entry = self.entries[page_number] = PageTableEntry()
+        entry.frame = frame
+        entry.present = True
+        entry.valid = True
+
+    def unmap(self, page_number):
+        # The page stays valid, it is just no longer resident
+        entry = self.entries.get(page_number)
+        if entry:
+            entry.frame = None
+            entry.present = False
+
+    def lookup(self, page_number):
+        entry = self.entries.get(page_number)
+        if entry and entry.valid and entry.present:
+            return entry.frame
+        return None
+
+    def frames(self):
+        return [e.frame for e in self.entries.values() if e.present]
+
+    def items(self):
+        return self.entries.items()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __iter__(self):
+        return iter(self.entries)
+
+    def __repr__(self):
+        return str({page: (e.frame if e.present else "-") for page, e in self.entries.items()})
+
+class PagingHistory:
+    # Step-by-step result of MemoryManager.simulate: history[i] is (page, frame
+    # slots after step i, faults so far). Only the slot each step loaded is kept,
+    # plus a copy of all slots every `checkpoint` steps, so a step is rebuilt from
+    # the checkpoint before it instead of storing a list per step.
+    def __init__(self, capacity, checkpoint=256):
+        self.capacity = capacity
+        self.checkpoint = checkpoint
+        self.pages = array("q")
+        self.slots = array("i")  # Slot loaded at each step, -1 on a hit
+        self.faults = array("Q")  # Running fault count
+        self.checkpoints = []  # Slots before steps 0, checkpoint, 2 * checkpoint, ...
+        self._memory = [None] * capacity
+
+    def record(self, page, slot, faults):
+        if len(self.slots) % self.checkpoint == 0:
+            self.checkpoints.append(list(self._memory))
+        if slot >= 0:
+            self._memory[slot] = page
+        try:
+            self.pages.append(page)
+        except (TypeError, OverflowError):
+            self.pages = list(self.pages)  # Pages that are not 64-bit ints
+            self.pages.append(page)
+        self.slots.append(slot)
+        self.faults.append(faults)
+
+    def memory_at(self, step):
+        memory = list(self.checkpoints[step // self.checkpoint])
+        for i in range(step - step % self.checkpoint, step + 1):
+            if self.slots[i] >= 0:
+                memory[self.slots[i]] = self.pages[i]
+        return memory
+
+    def __len__(self):
+        return len(self.slots)
+
+    def __getitem__(self, step):
+        if isinstance(step, slice):
+            return [self[i] for i in range(*step.indices(len(self)))]
+        if step < 0:
+            step += len(self)
+        if not 0 <= step < len(self):
+            raise IndexError("history index out of range")
+        return (self.pages[step], self.memory_at(step), self.faults[step])
+
+    def __iter__(self):
+        memory = [None] * self.capacity
+        for page, slot, faults in zip(self.pages, self.slots, self.faults):
+            if slot >= 0:
+                memory[slot] = page
+            yield (page, list(memory), faults)
+
 class MemoryManager:
-    def __init__(self, total_memory_kb=1024, page_size_kb=64):
+    def __init__(self, total_memory_kb=1024, page_size_kb=64, replacement_policy="lru",
+                 tlb_entries=64, tlb_associativity=4, tlb_policy="lru",
+                 swap_kb=0, swap_path=None, swap_workers=2, read_ahead=0, resident_sets=None,
+                 resident_set_window=1000, allocator="frames"):
+        if allocator not in ("frames", "buddy"):
+            raise ValueError(f"Unknown allocator: {allocator}")
         self.page_size_kb = page_size_kb
         self.total_pages = total_memory_kb // page_size_kb
-        self.memory = [None] * self.total_pages  # Each slot is a frame
-        self.lru_queue = deque()  # Tracks frame indices for LRU
-        self.page_table = {}  # Maps pid to list of frame indices
+        self.memory = FrameTable(self.total_pages)  # Each slot is a frame
+        self.allocator = allocator
+        self.free_frames = self._make_free_frames()
+        self.replacement_policy = replacement_policy
+        self.replacement = make_policy(replacement_policy, max(self.total_pages, 1))  # Resident (pid, page) keys
+        self.page_table = {}  # Maps pid to PageTable; self.memory is the inverted frame -> (pid, page) table
+        self.tlb = TLB(tlb_entries, tlb_associativity, tlb_policy)
+        self.faults = {}  # pid -> page faults taken in access()
+        self.retired_faults = 0  # Faults of pids since deallocated
+        # Evicted dirty pages go to swap and come back on a fault; swap_kb=0 drops them
+        self.swap_kb = swap_kb
+        self.swap_path = swap_path
+        self.swap_workers = swap_workers
+        self.read_ahead = read_ahead  # Swapped-out pages after a faulting one to load with it
+        self.swap = self._make_swap()
+        # With swap, every page of every process must fit in frames plus swap
+        # slots (see _commit); allocations past that are refused before they
+        # take anything
+        self.committed_pages = 0
+        self.clean_evictions = 0  # Evictions that needed no write
+        self.read_ahead_pages = 0
+        # Frames shared copy-on-write after a fork, frame -> pids mapping it. The
+        # frame table names one of them as owner, and only the owner's key is in
+        # the replacement policy; evicting the frame unmaps it from all of them.
+        self.sharers = {}
+        self.cow_copies = 0
+        # Per-process frame quotas and local replacement ("ws" or "pff", see
+        # workingset.py); None leaves every process to the global policy
+        self.resident_set_mode = resident_sets
+        self.resident_set_window = resident_set_window
+        self.resident_sets = self._make_resident_sets()
+        # Under resident sets: pid -> OrderedDict of the pages it maps alone, least
+        # recently used first, so a local victim is found without scanning
+        self.private_lru = {}
+        self.lock = CountingLock("frames")  # Guards frames, page tables, the policy and the TLB
 
     def set_page_size(self, new_size_kb):
         if new_size_kb <= 0:
             raise ValueError("Page size must be positive")
-        self.page_size_kb = new_size_kb
-        self.total_pages = 1024 // self.page_size_kb
-        self.memory = [None] * self.total_pages
-        self.lru_queue.clear()
-        self.page_table.clear()
+        with self.lock:
+            self.page_size_kb = new_size_kb
+            self.total_pages = 1024 // self.page_size_kb
+            self.memory = FrameTable(self.total_pages)
+            self.free_frames = self._make_free_frames()
+            self.replacement = make_policy(self.replacement_policy, max(self.total_pages, 1))
+            self.page_table.clear()
+            self.tlb.flush()
+            self.sharers = {}
+            self.cow_copies = 0
+            self.committed_pages = 0
+            if self.swap is not None:
+                self.swap.close()
+            self.swap = self._make_swap()
+            self.resident_sets = self._make_resident_sets()
+            self.private_lru = {}
         # Update configuration file
         with open("config.json", "r") as f:
             config = json.load(f)
@@ -32,81 +268,522 @@ class MemoryManager:
         with open("config.json", "w") as f:
             json.dump(config, f, indent=4)
 
+    def close(self):
+        # Writes out queued pages and releases the swap file and its threads
+        with self.lock:
+            if self.swap is not None:
+                self.swap.close()
+
+    def _make_free_frames(self):
+        # A stack of frame numbers, lowest on top, or with the "buddy" allocator a
+        # BuddyAllocator, which serves the same calls and also hands out runs of
+        # adjacent frames
+        if self.allocator == "buddy":
+            return BuddyAllocator(self.total_pages)
+        return list(range(self.total_pages - 1, -1, -1))
+
+    def _make_swap(self):
+        slots = self.swap_kb // self.page_size_kb
+        if slots <= 0:
+            return None
+        return SwapSpace(self.page_size_kb * 1024, slots, self.swap_path, self.swap_workers)
+
+    def _make_resident_sets(self):
+        if not self.resident_set_mode:
+            return None
+        return ResidentSetManager(self.total_pages, self.resident_set_mode, self.resident_set_window)
+
     def allocate_memory(self, process):
+        with self.lock:
+            return self._allocate(process)
+
+    def deallocate_memory(self, process):
+        with self.lock:
+            self._deallocate(process)
+            self.tlb.forget(process.pid)
+            self.retired_faults += self.faults.pop(process.pid, 0)
+            if self.resident_sets is not None:
+                self.resident_sets.forget(process.pid)
+                self._enforce_quotas()
+
+    def _allocate(self, process):
+        if process.pid in self.page_table:
+            self._deallocate(process)
         pages_needed = -(-process.memory_required // self.page_size_kb)  # Ceiling division
-        allocated_frames = []
+        self._commit(pages_needed)
+        # Register the table first so pages evicted by this same allocation are unmapped too
+        page_table = self.page_table[process.pid] = PageTable()
+        process.page_table = page_table
+        self.committed_pages += pages_needed
+        try:
+            return self._load(process, page_table, pages_needed)
+        except Exception:
+            # Leaves no half-built process behind; _deallocate uncommits the pages in the table
+            self.committed_pages -= pages_needed - len(page_table)
+            self._deallocate(process)
+            raise
+
+    def _load(self, process, page_table, pages_needed):
+        # Under resident-set control only the quota is loaded; the rest is demand paged
+        resident = pages_needed
+        if self.resident_sets is not None:
+            resident = self.resident_sets.admit(process.pid, pages_needed)
+            for page_num in range(resident, pages_needed):
+                page_table.entries[page_num] = PageTableEntry()
+            self._enforce_quotas()
 
-        for page_num in range(pages_needed):
-            frame_index = self._get_free_or_lru_frame()
-            self.memory[frame_index] = Page(process.pid, page_num)
-            allocated_frames.append(frame_index)
-            self._update_lru(frame_index)
+        # The buddy allocator places a process in adjacent frames where it can
+        frames = None
+        if self.allocator == "buddy" and resident:
+            frames = self._contiguous_frames(resident, (process.pid, 0))
+        for page_num in range(resident):
+            key = (process.pid, page_num)
+            frame_index = self._get_free_or_victim_frame(key) if frames is None else frames[page_num]
+            self.memory.set(frame_index, process.pid, page_num)
+            page_table.map(page_num, frame_index)
+            self.replacement.insert(key)
+            self._mapped_private(process.pid, page_num)
 
-        self.page_table[process.pid] = allocated_frames
-        process.page_table = allocated_frames
+        allocated_frames = page_table.frames()
         process.memory_allocated = f"{len(allocated_frames)} pages in frames {allocated_frames}"
         return allocated_frames
 
-    def deallocate_memory(self, process):
-        if process.pid in self.page_table:
-            for frame_index in self.page_table[process.pid]:
-                self.memory[frame_index] = None
-                if frame_index in self.lru_queue:
-                    self.lru_queue.remove(frame_index)
-            del self.page_table[process.pid]
-            process.page_table = []
+    def _commit(self, pages):
+        # One slot is held back for the page being evicted to make room for another
+        if self.swap is not None and self.committed_pages + pages > self.total_pages + self.swap.slots - 1:
+            raise MemoryError(f"Out of memory: {pages} more pages do not fit in memory and swap")
+
+    def _deallocate(self, process):
+        page_table = self.page_table.pop(process.pid, None)
+        if page_table is not None:
+            self.committed_pages -= len(page_table)
+            for page_num, entry in page_table.items():
+                if entry.present and entry.frame in self.sharers:
+                    self._unshare(process.pid, page_num, entry.frame)
+                    self.tlb.invalidate(process.pid, page_num)
+                elif entry.present:
+                    self.memory.clear(entry.frame)
+                    self.replacement.remove((process.pid, page_num))
+                    self.free_frames.append(entry.frame)
+                    self.tlb.invalidate(process.pid, page_num)
+                if self.swap is not None:
+                    self.swap.free((process.pid, page_num))
+            self.memory.release(process.pid)
+            self.private_lru.pop(process.pid, None)
+            process.page_table = PageTable()
             process.memory_allocated = None
 
-    def _get_free_or_lru_frame(self):
-        # Check for free frame
-        for i, frame in enumerate(self.memory):
-            if frame is None:
-                return i
-
-        # Replace LRU frame if no free frame is available
-        if self.lru_queue:
-            lru_index = self.lru_queue.popleft()
-            victim = self.memory[lru_index]
-            if victim and victim.pid in self.page_table:
-                self.page_table[victim.pid].remove(lru_index)
-            self.memory[lru_index] = None
-            return lru_index
+    def fork(self, parent, child):
+        # Gives `child` the parent's address space without copying: resident pages
+        # map the same frames, swapped-out pages share the parent's swap copy, and
+        # whichever side writes a shared page first gets its own frame
+        with self.lock:
+            parent_table = self.page_table.get(parent.pid)
+            if parent_table is None:
+                raise ValueError(f"Process {parent.pid} has no memory")
+            if child.pid in self.page_table:
+                self._deallocate(child)
+            self._commit(len(parent_table))
+            page_table = self.page_table[child.pid] = PageTable()
+            child.page_table = page_table
+            self.committed_pages += len(parent_table)
+            refs = self.memory.refs
+            entries = page_table.entries
+            self.private_lru.pop(parent.pid, None)  # Every resident page of the parent is shared now
+            for page_num, entry in parent_table.items():
+                if entry.present:
+                    frame = entry.frame
+                    entries[page_num] = PageTableEntry(frame, True)
+                    refs[frame] += 1
+                    pids = self.sharers.get(frame)
+                    if pids is None:
+                        pids = self.sharers[frame] = {parent.pid}
+                    pids.add(child.pid)
+                else:
+                    entries[page_num] = PageTableEntry(valid=entry.valid)
+                    if self.swap is not None:
+                        self.swap.share((parent.pid, page_num), (child.pid, page_num))
+            if self.resident_sets is not None:
+                self.resident_sets.admit(child.pid, len(page_table))
+                self._enforce_quotas()
+            frames = page_table.frames()
+            child.memory_allocated = f"{len(frames)} pages shared with {parent.pid}"
+            return frames
+
+    def _unshare(self, pid, page_num, frame):
+        # Drops pid's mapping of a shared frame, handing ownership on if it was the owner
+        sharers = self.sharers[frame]
+        sharers.discard(pid)
+        self.memory.refs[frame] -= 1
+        if self.memory.pid(frame) == pid:
+            heir = next(iter(sharers))
+            self.memory.owner[frame] = self.memory.intern(heir)
+            self.replacement.remove((pid, page_num))
+            self.replacement.insert((heir, page_num))
+        if len(sharers) == 1:
+            del self.sharers[frame]
+            if self.resident_sets is not None:
+                # The page now counts against the last sharer's quota
+                self.resident_sets.trims.update(sharers)
+                self._mapped_private(next(iter(sharers)), page_num)
+
+    def _copy_on_write(self, pid, page_num, frame, page_table):
+        # First write to a shared frame: this pid moves to a private copy
+        self.cow_copies += 1
+        key = (pid, page_num)
+        self._unshare(pid, page_num, frame)
+        page_table.unmap(page_num)
+        self.tlb.invalidate(pid, page_num)
+        if self.resident_sets is not None:
+            copy = self._local_frame(key)
+        else:
+            copy = self._get_free_or_victim_frame(key)
+        self.memory.set(copy, pid, page_num)
+        page_table.map(page_num, copy)
+        self.replacement.insert(key)
+        self._mapped_private(pid, page_num)
+        self.tlb.insert(pid, page_num, copy)
+        return copy
+
+    def export_pages(self, pid):
+        # [page, resident, dirty] for every page of `pid`, for moving it to another memory
+        with self.lock:
+            page_table = self.page_table.get(pid)
+            if page_table is None:
+                return []
+            return [[page_num, entry.present, bool(entry.present and self.memory.dirty[entry.frame])]
+                    for page_num, entry in page_table.items()]
+
+    def import_pages(self, process, pages):
+        # Rebuilds a page table from export_pages: resident pages get frames here,
+        # the rest stay valid but not present
+        with self.lock:
+            if process.pid in self.page_table:
+                self._deallocate(process)
+            self._commit(len(pages))
+            page_table = self.page_table[process.pid] = PageTable()
+            process.page_table = page_table
+            self.committed_pages += len(pages)
+            try:
+                return self._import(process, page_table, pages)
+            except Exception:
+                self.committed_pages -= len(pages) - len(page_table)
+                self._deallocate(process)
+                raise
+
+    def _import(self, process, page_table, pages):
+        for page_num, resident, dirty in pages:
+            if not resident:
+                page_table.entries[page_num] = PageTableEntry()
+                continue
+            key = (process.pid, page_num)
+            frame_index = self._get_free_or_victim_frame(key)
+            self.memory.set(frame_index, process.pid, page_num)
+            if dirty:
+                self.memory.dirty[frame_index] = 1
+            page_table.map(page_num, frame_index)
+            self.replacement.insert(key)
+            self._mapped_private(process.pid, page_num)
+        if self.resident_sets is not None:
+            self.resident_sets.admit(process.pid, len(pages))
+            self.resident_sets.trims.add(process.pid)
+            self._enforce_quotas()
+        allocated_frames = page_table.frames()
+        process.memory_allocated = f"{len(allocated_frames)} pages in frames {allocated_frames}"
+        return allocated_frames
+
+    def _get_free_or_victim_frame(self, incoming):
+        # Take a free frame if there is one
+        if self.free_frames:
+            return self.free_frames.pop()
+
+        # Otherwise let the replacement policy pick a resident page to evict
+        if len(self.replacement):
+            return self._evict(self.replacement.evict(incoming))
         raise MemoryError("No available frames")
 
-    def _update_lru(self, frame_index):
-        if frame_index in self.lru_queue:
-            self.lru_queue.remove(frame_index)
-        self.lru_queue.append(frame_index)
+    def _contiguous_frames(self, count, incoming):
+        # A range of `count` adjacent frames, or None if there is no free block that
+        # big. Pages are evicted in policy order only while fewer than `count`
+        # frames are free, as placing the pages one by one would evict as many.
+        buddy = self.free_frames
+        while len(buddy) < count <= self.total_pages and buddy.largest_free() < count and len(self.replacement):
+            buddy.append(self._evict(self.replacement.evict(incoming)))
+        start = buddy.alloc_exact(count)
+        return None if start is None else range(start, start + count)
+
+    def _evict(self, victim):
+        # Empties the frame of `victim`, a resident key just taken out of the
+        # replacement policy, and returns it
+        victim_pid, victim_page = victim
+        frame_index = self.page_table[victim_pid].lookup(victim_page)
+        if self.swap is not None:
+            # A clean page's swap copy (or zero fill) is still good
+            if self.memory.dirty[frame_index]:
+                image = page_image(victim, self.swap.page_bytes)
+                try:
+                    try:
+                        self.swap.write(victim, image)
+                    except MemoryError:
+                        self._reclaim_swap()
+                        self.swap.write(victim, image)
+                except MemoryError:
+                    self.replacement.insert(victim)  # Stays resident
+                    raise
+            else:
+                self.clean_evictions += 1
+        sharers = self.sharers.pop(frame_index, ())
+        if self.swap is not None:
+            for pid in sharers:
+                if pid != victim_pid:
+                    self.swap.share(victim, (pid, victim_page))
+        for pid in sharers or (victim_pid,):
+            self.page_table[pid].unmap(victim_page)
+            self.tlb.invalidate(pid, victim_page)
+        if not sharers and victim_pid in self.private_lru:
+            self.private_lru[victim_pid].pop(victim_page, None)
+        self.memory.clear(frame_index)
+        return frame_index
+
+    def _reclaim_swap(self):
+        # Swap is full: waits for freed slots still being written, then drops the
+        # swap copies of resident pages, which are marked dirty to be written
+        # again. The commit limit leaves a slot for every page out of memory once
+        # all frames are in use, so an eviction from full memory always fits.
+        self.swap.flush()
+        for pid, page in self.swap.keys():
+            page_table = self.page_table.get(pid)
+            frame = page_table.lookup(page) if page_table else None
+            if frame is not None:
+                self.swap.free((pid, page))
+                self.memory.dirty[frame] = 1
+
+    def _mapped_private(self, pid, page):
+        # `page` became resident in a frame only `pid` maps; shared pages are not
+        # charged to any one quota
+        if self.resident_sets is not None:
+            pages = self.private_lru.get(pid)
+            if pages is None:
+                pages = self.private_lru[pid] = OrderedDict()
+            pages[page] = None
+            pages.move_to_end(page)
+
+    def _used_private(self, pid, page):
+        pages = self.private_lru.get(pid)
+        if pages is not None and page in pages:
+            pages.move_to_end(page)
+
+    def _enforce_quotas(self):
+        # Evicts pages of processes now over their quota (all of them once suspended)
+        for pid in self.resident_sets.take_trims():
+            pages = self.private_lru.get(pid)
+            if not pages:
+                continue
+            over = len(pages) - self.resident_sets.quota(pid)
+            for page in list(islice(pages, max(0, over))):
+                self.replacement.remove((pid, page))
+                try:
+                    self.free_frames.append(self._evict((pid, page)))
+                except MemoryError:
+                    break  # No room in swap; stays over its quota for now
+
+    def touch(self, pid, page_number, write=False):
+        with self.lock:
+            page_table = self.page_table.get(pid)
+            frame_index = page_table.lookup(page_number) if page_table else None
+            if frame_index is not None:
+                if write and self.memory.refs[frame_index] > 1:
+                    frame_index = self._copy_on_write(pid, page_number, frame_index, page_table)
+                self.memory.touch(frame_index, write)
+                self.replacement.touch((self.memory.pid(frame_index), page_number))
+                self._used_private(pid, page_number)
+            return frame_index
+
+    # Address translation. Virtual addresses are byte offsets into the process'
+    # pages. A TLB miss walks the page table; a valid page that is not resident
+    # is loaded (a page fault, evicting by the replacement policy) and an address
+    # outside the process' pages raises ValueError.
+
+    def translate(self, pid, vaddr):
+        # Physical address of `vaddr`, without marking the page used
+        with self.lock:
+            return self._translate(pid, vaddr)[2]
+
+    def access(self, pid, vaddr, write=False):
+        # Physical address of `vaddr`; the page becomes referenced (and dirty on a
+        # write) and most recently used
+        with self.lock:
+            return self._access(pid, vaddr, write)
+
+    def access_many(self, pid, addresses, write=False):
+        # access() for a whole array of addresses under one lock, e.g. to replay a
+        # trace; `write` is one flag or a sequence of one per address
+        writes = write if hasattr(write, "__len__") else None
+        physical = array("q")
+        with self.lock:
+            for i, vaddr in enumerate(addresses):
+                physical.append(self._access(pid, int(vaddr), bool(writes[i]) if writes is not None else write))
+        return physical
+
+    def _access(self, pid, vaddr, write):
+        faults = self.faults.get(pid, 0)
+        page, frame, address = self._translate(pid, vaddr)
+        if write and self.memory.refs[frame] > 1:
+            frame = self._copy_on_write(pid, page, frame, self.page_table[pid])
+            address = frame * self.page_size_kb * 1024 + address % (self.page_size_kb * 1024)
+        self.memory.touch(frame, write)
+        self.replacement.touch((self.memory.pid(frame), page))
+        if self.resident_sets is not None:
+            self._used_private(pid, page)
+            self.resident_sets.record(pid, page, self.faults.get(pid, 0) != faults)
+            if self.resident_sets.trims:
+                self._enforce_quotas()
+        return address
+
+    def _translate(self, pid, vaddr):
+        # (page, frame, physical address)
+        page_bytes = self.page_size_kb * 1024
+        page, offset = divmod(vaddr, page_bytes)
+        frame = self.tlb.lookup(pid, page)
+        if frame is None:
+            page_table = self.page_table.get(pid)
+            entry = page_table.entries.get(page) if page_table else None
+            if entry is None or not entry.valid:
+                raise ValueError(f"Segmentation fault: {pid} has no page at address {vaddr:#x}")
+            frame = entry.frame if entry.present else self._page_fault(pid, page, page_table)
+            self.tlb.insert(pid, page, frame)
+        return page, frame, frame * page_bytes + offset
+
+    def _page_fault(self, pid, page, page_table):
+        self.faults[pid] = self.faults.get(pid, 0) + 1
+        key = (pid, page)
+        if self.resident_sets is not None:
+            frame_index = self._local_frame(key)
+        else:
+            if self.swap is not None and self.read_ahead:
+                # First, so that making room for them cannot evict the faulting page
+                self._read_ahead(pid, page, page_table)
+            frame_index = self._get_free_or_victim_frame(key)
+        if self.swap is not None:
+            self.swap.read(key)  # None for a page never written out, which is zero filled
+        self.memory.set(frame_index, pid, page)
+        page_table.map(page, frame_index)
+        self.replacement.insert(key)
+        self._mapped_private(pid, page)
+        return frame_index
+
+    def _local_frame(self, key):
+        # A process at its quota replaces its own least recently used page; below
+        # it, it takes a free frame (or, if none are left, the global victim).
+        # Read-ahead is skipped here, as it would load pages past the quota.
+        pid = key[0]
+        pages = self.private_lru.get(pid)
+        if pages and len(pages) >= self.resident_sets.quota(pid):
+            victim = (pid, next(iter(pages)))
+            self.replacement.remove(victim)
+            try:
+                return self._evict(victim)
+            except MemoryError:
+                pass  # No room in swap for it; take a frame from outside the quota
+        return self._get_free_or_victim_frame(key)
+
+    def _read_ahead(self, pid, page, page_table):
+        # Swapped-out pages following `page` come in with it, left unreferenced
+        for next_page in range(page + 1, page + 1 + self.read_ahead):
+            entry = page_table.entries.get(next_page)
+            if entry is None or entry.present or not entry.valid or (pid, next_page) not in self.swap:
+                continue
+            frame_index = self._get_free_or_victim_frame((pid, next_page))
+            self.swap.read((pid, next_page))
+            self.memory.set(frame_index, pid, next_page)
+            self.memory.referenced[frame_index] = 0
+            page_table.map(next_page, frame_index)
+            self.replacement.insert((pid, next_page))
+            self._mapped_private(pid, next_page)
+            self.read_ahead_pages += 1
+
+    def translation_stats(self, pid=None):
+        # TLB and fault counters for `pid`, or totals over every process so far
+        with self.lock:
+            hits, misses = self.tlb.hits_misses(pid)
+            faults = self.faults.get(pid, 0) if pid is not None else self.retired_faults + sum(self.faults.values())
+        accesses = hits + misses
+        return {"accesses": accesses, "tlb_hits": hits, "tlb_misses": misses,
+                "tlb_hit_rate": hits / accesses if accesses else 0.0, "page_faults": faults}
+
+    def swap_stats(self):
+        # Swap I/O counters, or None without swap
+        if self.swap is None:
+            return None
+        stats = self.swap.stats()
+        stats.update(clean_evictions=self.clean_evictions, read_ahead_pages=self.read_ahead_pages)
+        return stats
+
+    def resident_set_stats(self):
+        # Quotas, working sets, fault rates and suspensions, or None without resident-set control
+        if self.resident_sets is None:
+            return None
+        with self.lock:
+            return self.resident_sets.stats()
+
+    def fragmentation_stats(self):
+        # Free block sizes and contiguous allocations, or None without the buddy allocator
+        if self.allocator != "buddy":
+            return None
+        with self.lock:
+            return self.free_frames.stats()
+
+    def sharing_stats(self):
+        with self.lock:
+            return {"shared_frames": len(self.sharers),
+                    "mappings_saved": sum(len(pids) - 1 for pids in self.sharers.values()),
+                    "cow_copies": self.cow_copies}
 
     def view_memory_map(self):
-        return [(i, str(page) if page else "Free") for i, page in enumerate(self.memory)]
+        with self.lock:
+            return [(i, str(page) if page else "Free") for i, page in enumerate(self.memory)]
+
+    def frame_content(self, frame):
+        # One row of view_memory_map, read when it is needed
+        with self.lock:
+            page = self.memory[frame]
+        return (frame, str(page) if page else "Free")
 
     def simulate_lru(self, pages, capacity):
-        memory = [None] * capacity
+        return self.simulate(pages, capacity, "lru")
+
+    def simulate(self, pages, capacity, policy="lru"):
+        pages = list(pages)
+        replacement = make_policy(policy, capacity, pages)
+        slots = {}  # page -> frame slot
+        free_slots = list(range(capacity - 1, -1, -1))
         page_faults = 0
-        lru_queue = deque()
-        history = []
+        history = PagingHistory(capacity)
 
         for page in pages:
-            if page not in [p.page_number if p else None for p in memory]:
+            hit, victim = replacement.reference(page)
+            slot = -1
+            if not hit:
                 page_faults += 1
-                if len(lru_queue) == capacity:
-                    lru_page = lru_queue.popleft()
-                    for i in range(len(memory)):
-                        if memory[i] and memory[i].page_number == lru_page:
-                            memory[i] = None
-                            break
-                for i in range(len(memory)):
-                    if memory[i] is None:
-                        memory[i] = Page("simulated", page)
-                        break
-                lru_queue.append(page)
-            else:
-                lru_queue.remove(page)
-                lru_queue.append(page)
-            history.append((page, [p.page_number if p else None for p in memory], page_faults))
+                if victim is not None:
+                    free_slots.append(slots.pop(victim))
+                slot = slots[page] = free_slots.pop()
+            history.record(page, slot, page_faults)
 
         return history, page_faults
 
+    def simulate_stream(self, references, capacity, policy="lru", window=100000):
+        # Aggregate counters only; `references` may be a lazy trace_sim.read_trace generator
+        return simulate_trace(references, capacity, policy, window)
+
+    def miss_ratio_curve(self, references, max_capacity=None):
+        # LRU faults for every capacity 1..max_capacity from a single pass over the trace
+        return lru_miss_ratio_curve(references, max_capacity)
+
+    def lookup(self, pid, page_number):
+        with self.lock:
+            page_table = self.page_table.get(pid)
+            return page_table.lookup(page_number) if page_table else None
+
     def get_page_table(self, pid):
-        return self.page_table.get(pid, [])
\ No newline at end of file
+        return self.page_table.get(pid) or PageTable()
\ No newline at end of file
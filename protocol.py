@@ -0,0 +1,217 @@
+import json
+import socket
+import struct
+import time
+from array import array
+from operator import itemgetter
+
+try:
+    import msgpack
+except ImportError:  # Optional; the struct codec covers the bulk data without it
+    msgpack = None
+
+# Wire protocol shared by OSServer and its clients: every message is an object
+# sent as one frame, a 4-byte big-endian length followed by the payload.
+# Requests may carry an "id", which the server copies into the response so a
+# client can pipeline many requests on one connection.
+#
+# Payloads are JSON unless the connection switches codec: the client sends
+# {"action": "hello", "codecs": [...]} as its first frame and waits for the reply,
+# which names the first codec both sides support ("json" if none). Every frame
+# after that reply, in both directions, uses that codec.
+
+HEADER = struct.Struct("!I")
+MAX_FRAME = 64 * 1024 * 1024
+
+class ProtocolError(Exception):
+    pass
+
+class JSONCodec:
+    name = "json"
+
+    def dumps(self, message):
+        return json.dumps(message, separators=(",", ":")).encode()
+
+    def loads(self, payload):
+        return json.loads(payload)
+
+class MsgpackCodec:
+    name = "msgpack"
+
+    def dumps(self, message):
+        return msgpack.packb(message, use_bin_type=True)
+
+    def loads(self, payload):
+        return msgpack.unpackb(payload, raw=False, strict_map_key=False)
+
+class StructCodec(JSONCodec):
+    # JSON for the message itself, but a "processes" list of rows (as sent by
+    # list_processes and create_processes) goes as packed columns: an int64
+    # array for ints, a float64 array for floats and one NUL-separated UTF-8
+    # block per string column, each converted in a single C-level call. Columns
+    # holding anything else, ints and floats mixed included, fall back to a JSON
+    # list so every value comes back with its own type.
+    name = "struct"
+    ROWS = struct.Struct("<IH")  # Row count, column count
+    COLUMN = struct.Struct("<HcI")  # Name length, type, data length
+    ENVELOPE = struct.Struct("<I")  # Length of the JSON part
+
+    def dumps(self, message):
+        rows = message.get("processes")
+        block = self._pack_rows(rows) if isinstance(rows, list) and rows else None
+        if block is None:
+            return b"\x00" + super().dumps(message)
+        head = super().dumps({key: value for key, value in message.items() if key != "processes"})
+        return b"\x01" + self.ENVELOPE.pack(len(head)) + head + block
+
+    def loads(self, payload):
+        if payload[:1] == b"\x00":
+            return super().loads(payload[1:])
+        (head_length,) = self.ENVELOPE.unpack_from(payload, 1)
+        start = 1 + self.ENVELOPE.size
+        message = super().loads(payload[start:start + head_length])
+        message["processes"] = self._unpack_rows(memoryview(payload)[start + head_length:])
+        return message
+
+    def _pack_rows(self, rows):
+        first = rows[0]
+        if set(map(type, rows)) != {dict} or set(map(len, rows)) != {len(first)}:
+            return None  # Rows must share one set of keys
+        parts = [self.ROWS.pack(len(rows), len(first))]
+        for column in first:
+            try:
+                values = list(map(itemgetter(column), rows))
+            except KeyError:
+                return None
+            kind, data = self._pack_column(values)
+            name = column.encode()
+            parts.append(self.COLUMN.pack(len(name), kind, len(data)) + name + data)
+        return b"".join(parts)
+
+    def _pack_column(self, values):
+        types = set(map(type, values))
+        try:
+            if types == {int}:
+                return b"q", array("q", values).tobytes()
+            if types == {float}:
+                return b"d", array("d", values).tobytes()
+        except OverflowError:
+            pass
+        if types == {str}:
+            joined = "\x00".join(values)
+            if joined.count("\x00") == len(values) - 1:
+                return b"s", joined.encode()
+        return b"j", json.dumps(values, separators=(",", ":")).encode()
+
+    def _unpack_rows(self, view):
+        count, column_count = self.ROWS.unpack_from(view)
+        offset = self.ROWS.size
+        names, columns = [], []
+        for _ in range(column_count):
+            name_length, kind, length = self.COLUMN.unpack_from(view, offset)
+            offset += self.COLUMN.size
+            names.append(str(view[offset:offset + name_length], "utf-8"))
+            data = view[offset + name_length:offset + name_length + length]
+            offset += name_length + length
+            if kind in (b"q", b"d"):
+                numbers = array(kind.decode())
+                numbers.frombytes(data)
+                values = numbers.tolist()
+            elif kind == b"s":
+                values = str(data, "utf-8").split("\x00")
+            else:
+                values = json.loads(bytes(data))
+            if len(values) != count:
+                raise ProtocolError(f"Column '{names[-1]}' has {len(values)} of {count} values")
+            columns.append(values)
+        if not columns:
+            return [{} for _ in range(count)]  # Rows with no fields leave nothing to zip
+        return [dict(zip(names, row)) for row in zip(*columns)]
+
+JSON = JSONCodec()
+CODECS = {"json": JSON, "struct": StructCodec()}
+if msgpack is not None:
+    CODECS["msgpack"] = MsgpackCodec()
+PREFERRED_CODECS = ["msgpack", "struct", "json"]
+
+def negotiate(offered):
+    # The first offered codec this side supports
+    for name in offered or ():
+        if name in CODECS:
+            return CODECS[name]
+    return JSON
+
+def encode_frame(message, codec=JSON):
+    payload = codec.dumps(message)
+    if len(payload) > MAX_FRAME:
+        raise ProtocolError(f"Frame of {len(payload)} bytes exceeds {MAX_FRAME}")
+    return HEADER.pack(len(payload)) + payload
+
+def decode_payload(payload, codec=JSON):
+    try:
+        message = codec.loads(payload)
+    except ProtocolError:
+        raise
+    except Exception as e:
+        raise ProtocolError(f"Malformed frame: {e}")
+    if not isinstance(message, dict):
+        raise ProtocolError("A frame must hold an object")
+    return message
+
+def split_frames(buffer, limit=None, codec=JSON):
+    # Decodes the complete frames at the front of `buffer` (a bytearray), removes
+    # them from it and returns the messages; a trailing partial frame stays put
+    messages = []
+    offset = 0
+    while len(buffer) - offset >= HEADER.size and (limit is None or len(messages) < limit):
+        (length,) = HEADER.unpack_from(buffer, offset)
+        if length > MAX_FRAME:
+            raise ProtocolError(f"Frame of {length} bytes exceeds {MAX_FRAME}")
+        end = offset + HEADER.size + length
+        if end > len(buffer):
+            break
+        messages.append(decode_payload(bytes(buffer[offset + HEADER.size:end]), codec))
+        offset = end
+    del buffer[:offset]
+    return messages
+
+async def read_frame(reader, codec=JSON):
+    # Returns the next message, or None once the peer has closed the connection
+    try:
+        header = await reader.readexactly(HEADER.size)
+    except EOFError:
+        return None
+    (length,) = HEADER.unpack(header)
+    if length > MAX_FRAME:
+        raise ProtocolError(f"Frame of {length} bytes exceeds {MAX_FRAME}")
+    return decode_payload(await reader.readexactly(length), codec)
+
+def send_frame(sock, message, codec=JSON):
+    sock.sendall(encode_frame(message, codec))
+
+def _recv_exactly(sock, size):
+    chunks = []
+    while size:
+        chunk = sock.recv(min(size, 1 << 20))
+        if not chunk:
+            raise ConnectionError("Connection closed by peer")
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b"".join(chunks)
+
+def recv_frame(sock, codec=JSON):
+    (length,) = HEADER.unpack(_recv_exactly(sock, HEADER.size))
+    if length > MAX_FRAME:
+        raise ProtocolError(f"Frame of {length} bytes exceeds {MAX_FRAME}")
+    return decode_payload(_recv_exactly(sock, length), codec)
+
+def wait_for_port(host, port, timeout=10):
+    # Blocks until something accepts connections on host:port
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            socket.create_connection((host, port), 1).close()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise TimeoutError(f"Server on {host}:{port} did not start")
@@ -0,0 +1,320 @@
+import heapq
+from collections import OrderedDict
+from itertools import chain
+
+# Page-replacement policies shared by live allocation (MemoryManager) and the simulators.
+# Keys are whatever the caller pages on: (pid, page_number) for live memory, page numbers
+# for reference-string simulation. Every operation is O(1) or O(log n).
+
+class ReplacementPolicy:
+    name = None
+
+    def __init__(self, capacity):
+        if capacity <= 0:
+            raise ValueError("Capacity must be positive")
+        self.capacity = capacity
+
+    def reference(self, key):
+        # Returns (hit, evicted key or None)
+        if key in self:
+            self.touch(key)
+            return True, None
+        victim = self.evict(key) if len(self) >= self.capacity else None
+        self.insert(key)
+        return False, victim
+
+    def insert(self, key):
+        raise NotImplementedError
+
+    def touch(self, key):
+        raise NotImplementedError
+
+    def remove(self, key):
+        raise NotImplementedError
+
+    def evict(self, incoming=None):
+        raise NotImplementedError
+
+class FIFOPolicy(ReplacementPolicy):
+    name = "fifo"
+
+    def __init__(self, capacity):
+        super().__init__(capacity)
+        self.queue = OrderedDict()  # Oldest first
+
+    def insert(self, key):
+        self.queue[key] = None
+
+    def touch(self, key):
+        pass
+
+    def remove(self, key):
+        self.queue.pop(key, None)
+
+    def evict(self, incoming=None):
+        return self.queue.popitem(last=False)[0]
+
+    def __contains__(self, key):
+        return key in self.queue
+
+    def __len__(self):
+        return len(self.queue)
+
+    def __iter__(self):
+        return iter(self.queue)
+
+class LRUPolicy(FIFOPolicy):
+    name = "lru"
+
+    def touch(self, key):
+        self.queue.move_to_end(key)  # Least recently used stays first
+
+class ClockPolicy(ReplacementPolicy):
+    name = "clock"
+
+    def __init__(self, capacity):
+        super().__init__(capacity)
+        self.slots = []  # Circular buffer of keys, None for an empty slot
+        self.ref_bits = []
+        self.index = {}  # key -> slot
+        self.free_slots = []
+        self.hand = 0
+
+    def insert(self, key):
+        if self.free_slots:
+            slot = self.free_slots.pop()
+            self.slots[slot] = key
+            self.ref_bits[slot] = 1
+        else:
+            slot = len(self.slots)
+            self.slots.append(key)
+            self.ref_bits.append(1)
+        self.index[key] = slot
+
+    def touch(self, key):
+        self.ref_bits[self.index[key]] = 1
+
+    def remove(self, key):
+        slot = self.index.pop(key, None)
+        if slot is not None:
+            self.slots[slot] = None
+            self.ref_bits[slot] = 0
+            self.free_slots.append(slot)
+
+    def evict(self, incoming=None):
+        if not self.index:
+            raise KeyError("evict from an empty policy")
+        # Each pass clears at most one reference bit per slot, so this is amortized O(1)
+        while True:
+            if self.hand >= len(self.slots):
+                self.hand = 0
+            slot = self.hand
+            self.hand += 1
+            key = self.slots[slot]
+            if key is None:
+                continue
+            if self.ref_bits[slot]:
+                self.ref_bits[slot] = 0
+                continue
+            self.remove(key)
+            return key
+
+    def __contains__(self, key):
+        return key in self.index
+
+    def __len__(self):
+        return len(self.index)
+
+    def __iter__(self):
+        return (key for key in self.slots if key is not None)
+
+class LFUPolicy(ReplacementPolicy):
+    name = "lfu"
+
+    def __init__(self, capacity):
+        super().__init__(capacity)
+        self.freq = {}  # key -> use count
+        self.buckets = {}  # use count -> OrderedDict of keys, least recent first
+        # Lowest count with a bucket. New keys start at 1 and a touch moves a key up
+        # one, so it only goes stale after remove() or evict() empty its bucket
+        self.min_count = 0
+
+    def _add(self, key, count):
+        bucket = self.buckets.get(count)
+        if bucket is None:
+            bucket = self.buckets[count] = OrderedDict()
+        bucket[key] = None
+        self.freq[key] = count
+
+    def _discard(self, key):
+        count = self.freq.pop(key)
+        bucket = self.buckets[count]
+        del bucket[key]
+        if not bucket:
+            del self.buckets[count]
+        return count
+
+    def insert(self, key):
+        self._add(key, 1)
+        self.min_count = 1
+
+    def touch(self, key):
+        count = self._discard(key)
+        self._add(key, count + 1)
+        if count == self.min_count and count not in self.buckets:
+            self.min_count = count + 1
+
+    def remove(self, key):
+        if key in self.freq:
+            self._discard(key)
+
+    def evict(self, incoming=None):
+        if self.min_count not in self.buckets:
+            self.min_count = min(self.buckets)  # Only after a remove or an evict without insert
+        key = next(iter(self.buckets[self.min_count]))
+        self._discard(key)
+        return key
+
+    def __contains__(self, key):
+        return key in self.freq
+
+    def __len__(self):
+        return len(self.freq)
+
+    def __iter__(self):
+        return iter(self.freq)
+
+class OPTPolicy(ReplacementPolicy):
+    # Belady's optimal policy; needs the whole reference string up front and
+    # only supports reference(), one call per element of `references`.
+    name = "opt"
+
+    def __init__(self, capacity, references):
+        super().__init__(capacity)
+        references = list(references)
+        never = len(references)
+        self.next_use = [never] * len(references)
+        last_seen = {}
+        for i in range(len(references) - 1, -1, -1):
+            self.next_use[i] = last_seen.get(references[i], never)
+            last_seen[references[i]] = i
+        self.position = 0
+        self.resident = {}  # key -> index of its next use
+        self.heap = []  # (-next use, position, key), stale entries skipped lazily
+
+    def reference(self, key):
+        next_use = self.next_use[self.position]
+        self.position += 1
+        victim = None
+        hit = key in self.resident
+        if not hit and len(self.resident) >= self.capacity:
+            victim = self.evict()
+        self.resident[key] = next_use
+        heapq.heappush(self.heap, (-next_use, self.position, key))
+        return hit, victim
+
+    def remove(self, key):
+        self.resident.pop(key, None)
+
+    def evict(self, incoming=None):
+        while True:
+            neg_use, _, key = heapq.heappop(self.heap)
+            if self.resident.get(key) == -neg_use:
+                del self.resident[key]
+                return key
+
+    def insert(self, key):
+        raise ValueError("OPT only supports reference() over its precomputed trace")
+
+    touch = insert
+
+    def __contains__(self, key):
+        return key in self.resident
+
+    def __len__(self):
+        return len(self.resident)
+
+    def __iter__(self):
+        return iter(self.resident)
+
+class ARCPolicy(ReplacementPolicy):
+    # Adaptive Replacement Cache (Megiddo & Modha). T1/T2 hold resident keys seen
+    # once/repeatedly, B1/B2 are their ghost lists; p is the adaptive T1 target.
+    name = "arc"
+    _NONE = object()
+
+    def __init__(self, capacity):
+        super().__init__(capacity)
+        self.t1, self.t2 = OrderedDict(), OrderedDict()
+        self.b1, self.b2 = OrderedDict(), OrderedDict()
+        self.p = 0.0
+        self._adapted = self._NONE  # Incoming key p was already adapted for
+
+    def _adapt(self, key):
+        if key == self._adapted:
+            return
+        self._adapted = key
+        if key in self.b1:
+            self.p = min(self.capacity, self.p + max(len(self.b2) / len(self.b1), 1))
+        elif key in self.b2:
+            self.p = max(0.0, self.p - max(len(self.b1) / len(self.b2), 1))
+
+    def evict(self, incoming=None):
+        if incoming is not None:
+            self._adapt(incoming)
+        if self.t1 and (not self.t2 or len(self.t1) > self.p
+                        or (incoming in self.b2 and len(self.t1) == self.p)):
+            key = self.t1.popitem(last=False)[0]
+            self.b1[key] = None
+        else:
+            key = self.t2.popitem(last=False)[0]
+            self.b2[key] = None
+        return key
+
+    def insert(self, key):
+        self._adapt(key)
+        self._adapted = self._NONE
+        if key in self.b1:
+            del self.b1[key]
+            self.t2[key] = None
+        elif key in self.b2:
+            del self.b2[key]
+            self.t2[key] = None
+        else:
+            self.t1[key] = None
+        while len(self.t1) + len(self.b1) > self.capacity and self.b1:
+            self.b1.popitem(last=False)
+        while len(self.t1) + len(self.t2) + len(self.b1) + len(self.b2) > 2 * self.capacity and self.b2:
+            self.b2.popitem(last=False)
+
+    def touch(self, key):
+        if key in self.t1:
+            del self.t1[key]
+            self.t2[key] = None
+        else:
+            self.t2.move_to_end(key)
+
+    def remove(self, key):
+        self.t1.pop(key, None)
+        self.t2.pop(key, None)
+
+    def __contains__(self, key):
+        return key in self.t1 or key in self.t2
+
+    def __len__(self):
+        return len(self.t1) + len(self.t2)
+
+    def __iter__(self):
+        return chain(self.t1, self.t2)
+
+POLICIES = {cls.name: cls for cls in (FIFOPolicy, LRUPolicy, ClockPolicy, LFUPolicy, OPTPolicy, ARCPolicy)}
+
+def make_policy(name, capacity, references=None):
+    cls = POLICIES.get(name)
+    if cls is None:
+        raise ValueError(f"Unknown replacement policy: {name}")
+    if cls is OPTPolicy:
+        if references is None:
+            raise ValueError("OPT needs the full reference string and can only be simulated")
+        return cls(capacity, references)
+    return cls(capacity)
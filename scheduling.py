@@ -0,0 +1,286 @@
+import heapq
+from collections import deque
+
+# Discrete-event CPU scheduling simulation, independent of the GUI. Jobs are
+# copied from the input so the caller's processes are never reordered or mutated.
+# Events sit in a heap keyed by time; all events at one instant are applied
+# before the next dispatch decision.
+
+ARRIVAL, SLICE_END, BOOST = 0, 1, 2
+
+class Job:
+    __slots__ = ("pid", "arrival", "burst", "priority", "remaining", "start", "finish",
+                 "level", "ready_since", "seq")
+
+    def __init__(self, pid, arrival, burst, priority=0, seq=0):
+        if burst <= 0 or arrival < 0:
+            raise ValueError(f"Invalid job {pid}: burst must be positive and arrival non-negative")
+        self.pid = pid
+        self.arrival = arrival
+        self.burst = burst
+        self.priority = priority
+        self.remaining = burst
+        self.start = None
+        self.finish = None
+        self.level = 0  # MLFQ queue level
+        self.ready_since = arrival
+        self.seq = seq
+
+    @property
+    def turnaround(self):
+        return self.finish - self.arrival
+
+    @property
+    def wait(self):
+        return self.turnaround - self.burst
+
+    @property
+    def response(self):
+        return self.start - self.arrival
+
+class FCFSQueue:
+    preemptive = False
+
+    def __init__(self):
+        self.queue = deque()
+
+    def push(self, job, now):
+        self.queue.append(job)
+
+    def pop(self, now):
+        return self.queue.popleft()
+
+    def quantum(self, job):
+        return None
+
+    def expire(self, job, now):
+        self.push(job, now)
+
+    def preempts(self, running, now):
+        return False
+
+    def __len__(self):
+        return len(self.queue)
+
+class SJFQueue(FCFSQueue):
+    # Shortest job first on remaining time; preemptive=True gives SRTF
+    def __init__(self, preemptive=False):
+        self.heap = []
+        self.preemptive = preemptive
+
+    def push(self, job, now):
+        heapq.heappush(self.heap, (job.remaining, job.arrival, job.seq, job))
+
+    def pop(self, now):
+        return heapq.heappop(self.heap)[-1]
+
+    def preempts(self, running, now):
+        return self.preemptive and bool(self.heap) and self.heap[0][0] < running.remaining
+
+    def __len__(self):
+        return len(self.heap)
+
+class PriorityQueue(SJFQueue):
+    # Lower number runs first. With aging, a waiting job gains one priority level
+    # every `aging` time units; ordering by priority * aging + ready_since is
+    # equivalent and does not change while jobs wait, so the heap stays valid.
+    def __init__(self, preemptive=True, aging=None):
+        super().__init__(preemptive)
+        self.aging = aging
+
+    def _key(self, job, since):
+        return job.priority * self.aging + since if self.aging else job.priority
+
+    def push(self, job, now):
+        job.ready_since = now
+        heapq.heappush(self.heap, (self._key(job, now), job.arrival, job.seq, job))
+
+    def preempts(self, running, now):
+        return self.preemptive and bool(self.heap) and self.heap[0][0] < self._key(running, now)
+
+class RoundRobinQueue(FCFSQueue):
+    preemptive = True
+
+    def __init__(self, quantum=4):
+        if quantum <= 0:
+            raise ValueError("Quantum must be positive")
+        super().__init__()
+        self.time_quantum = quantum
+
+    def quantum(self, job):
+        return self.time_quantum
+
+class MLFQQueue(FCFSQueue):
+    # One round-robin queue per level; a job that uses its whole quantum drops a
+    # level, a job arriving at a higher level preempts. The last level has no quantum.
+    preemptive = True
+
+    def __init__(self, quanta=(4, 8, None), boost=None):
+        self.levels = [deque() for _ in quanta]
+        self.quanta = list(quanta)
+        self.boost = boost  # Period for moving every job back to the top level
+        self.count = 0
+
+    def push(self, job, now):
+        self.levels[job.level].append(job)
+        self.count += 1
+
+    def pop(self, now):
+        for level in self.levels:
+            if level:
+                self.count -= 1
+                return level.popleft()
+        raise IndexError("pop from an empty queue")
+
+    def quantum(self, job):
+        return self.quanta[job.level]
+
+    def expire(self, job, now):
+        job.level = min(job.level + 1, len(self.levels) - 1)
+        self.push(job, now)
+
+    def preempts(self, running, now):
+        return any(self.levels[level] for level in range(running.level))
+
+    def boost_all(self, running):
+        for level in self.levels[1:]:
+            while level:
+                job = level.popleft()
+                job.level = 0
+                self.levels[0].append(job)
+        if running:
+            running.level = 0
+
+    def __len__(self):
+        return self.count
+
+def make_queue(policy, quantum=4, aging=None, quanta=None, boost=None):
+    if policy == "fcfs":
+        return FCFSQueue()
+    if policy == "sjf":
+        return SJFQueue(preemptive=False)
+    if policy == "srtf":
+        return SJFQueue(preemptive=True)
+    if policy == "priority":
+        return PriorityQueue(preemptive=False, aging=aging)
+    if policy == "priority_preemptive":
+        return PriorityQueue(preemptive=True, aging=aging)
+    if policy == "rr":
+        return RoundRobinQueue(quantum)
+    if policy == "mlfq":
+        return MLFQQueue(quanta or (quantum, 2 * quantum, None), boost)
+    raise ValueError(f"Unknown scheduling policy: {policy}")
+
+POLICIES = ["fcfs", "sjf", "srtf", "priority", "priority_preemptive", "rr", "mlfq"]
+
+class ScheduleResult:
+    def __init__(self, policy, jobs, context_switches, preemptions, busy_time):
+        self.policy = policy
+        self.jobs = jobs  # In input order
+        n = len(jobs)
+        makespan = max((j.finish for j in jobs), default=0) - min((j.arrival for j in jobs), default=0)
+        total_turnaround = sum(j.finish - j.arrival for j in jobs)
+        total_burst = sum(j.burst for j in jobs)
+        total_response = sum(j.start - j.arrival for j in jobs)
+        self.metrics = {
+            "jobs": n,
+            "makespan": makespan,
+            "avg_wait": (total_turnaround - total_burst) / n if n else 0.0,
+            "avg_turnaround": total_turnaround / n if n else 0.0,
+            "avg_response": total_response / n if n else 0.0,
+            "throughput": n / makespan if makespan else 0.0,
+            "cpu_utilization": busy_time / makespan if makespan else 0.0,
+            "context_switches": context_switches,
+            "preemptions": preemptions
+        }
+
+    @staticmethod
+    def row(j, priority=False):
+        # (PID, Arrival, Burst, [Priority], Start, Finish, Wait, Turnaround)
+        head = (j.pid, j.arrival, j.burst, j.priority) if priority else (j.pid, j.arrival, j.burst)
+        return head + (j.start, j.finish, j.wait, j.turnaround)
+
+    def rows(self, priority=False):
+        for j in self.jobs:
+            yield self.row(j, priority)
+
+def simulate(jobs, policy="fcfs", quantum=4, aging=None, quanta=None, boost=None):
+    # `jobs` are (pid, arrival, burst, priority) tuples or objects with those attributes
+    jobs = [job_from(item, seq) for seq, item in enumerate(jobs)]
+    ready = make_queue(policy, quantum, aging, quanta, boost)
+    # Arrivals are already known, so they are merged in from a sorted list and only
+    # slice ends and boosts go through the heap
+    arrivals = sorted(jobs, key=lambda j: j.arrival)
+    next_arrival = 0
+    events = []
+    seq = 0
+    if boost and isinstance(ready, MLFQQueue) and jobs:
+        heapq.heappush(events, (arrivals[0].arrival + boost, BOOST, seq, None))
+        seq += 1
+
+    running = None
+    run_start = 0
+    token = 0  # Identifies the SLICE_END event of the current dispatch
+    pending = len(jobs)
+    context_switches = preemptions = 0
+    busy_time = 0
+    last = None
+    never = float("inf")
+    arrival_time = arrivals[0].arrival if arrivals else never
+
+    while arrival_time != never or events:
+        # Arrivals go before slice ends and boosts at the same instant
+        if arrival_time <= (events[0][0] if events else never):
+            now, kind, payload = arrival_time, ARRIVAL, arrivals[next_arrival]
+            next_arrival += 1
+            arrival_time = arrivals[next_arrival].arrival if next_arrival < len(arrivals) else never
+        else:
+            now, kind, _, payload = heapq.heappop(events)
+        if running is not None:
+            busy_time += now - run_start
+            running.remaining -= now - run_start
+            run_start = now
+
+        if kind == ARRIVAL:
+            ready.push(payload, now)
+            if running is not None and running.remaining > 0 and ready.preempts(running, now):
+                ready.push(running, now)
+                running = None
+                preemptions += 1
+        elif kind == SLICE_END and payload == token and running is not None:
+            if running.remaining == 0:
+                running.finish = now
+                pending -= 1
+            else:
+                ready.expire(running, now)
+            running = None
+        elif kind == BOOST:
+            ready.boost_all(running)
+            if pending:
+                heapq.heappush(events, (now + boost, BOOST, seq, None))
+                seq += 1
+
+        if arrival_time == now or (events and events[0][0] == now):
+            continue  # Apply every event at this instant before dispatching
+        if running is None and len(ready):
+            running = ready.pop(now)
+            if running.start is None:
+                running.start = now
+            if last is not None and last is not running:
+                context_switches += 1
+            last = running
+            run_start = now
+            token += 1
+            slice_length = ready.quantum(running)
+            run_for = running.remaining if slice_length is None else min(slice_length, running.remaining)
+            heapq.heappush(events, (now + run_for, SLICE_END, seq, token))
+            seq += 1
+
+    return ScheduleResult(policy, jobs, context_switches, preemptions, busy_time)
+
+def job_from(item, seq=0):
+    if isinstance(item, tuple):
+        pid, arrival, burst = item[:3]
+        priority = item[3] if len(item) > 3 else 0
+        return Job(pid, arrival, burst, priority, seq)
+    return Job(item.pid, item.arrival, item.burst, item.priority, seq)
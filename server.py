@@ -1,58 +1,186 @@
-import socket
-import json
-import threading
-from main import Kernel
+import argparse
+import asyncio
+from main import CONFIG, Kernel
+from protocol import CODECS, JSON, ProtocolError, encode_frame, negotiate, split_frames
+
+READ_CHUNK = 256 * 1024
+DEFAULT_FIELDS = ("pid", "name", "state")
+PROCESS_FIELDS = {"pid", "name", "state", "priority", "burst", "arrival", "pgid", "memory_required",
+                  "memory_allocated", "processor", "io_state", "owner"}
+
+def process_rows(rows, chunk=None):
+    # A list_processes response, or its frames when streamed `chunk` rows at a time
+    if not chunk:
+        return {"status": "success", "processes": rows}
+    if chunk < 1:
+        raise ValueError("chunk must be positive")
+    return [{"status": "success", "processes": rows[i:i + chunk], "more": i + chunk < len(rows)}
+            for i in range(0, max(len(rows), 1), chunk)]
 
 class OSServer:
-    def __init__(self, host="localhost", port=9999):  # Changed to 0.0.0.0
-        self.kernel = Kernel()
-        self.server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        self.server_socket.bind((host, port))
-        self.server_socket.listen(5)
-        print(f"Server started on {host}:{port}")
-
-    def handle_client(self, client_socket):
-        try:
-            data = client_socket.recv(1024).decode()
-            request = json.loads(data)
-            response = {"status": "error", "message": "Invalid request"}
+    # Serves the kernel over persistent connections carrying length-prefixed JSON
+    # frames (see protocol.py). Clients may pipeline requests; each response
+    # carries the request's "id". At most `max_batch` requests are handled before
+    # yielding to other connections.
+    # `node` names this server within a cluster and prefixes its pids (see cluster.py).
+    def __init__(self, host="localhost", port=9999, max_batch=256, node=None):  # Use 0.0.0.0 to accept remote clients
+        self.node = node
+        self.kernel = Kernel(f"{node}-" if node else "")
+        self.host = host
+        self.port = port
+        self.max_batch = max_batch
+        self.handlers = {
+            "create_process": self.create_process,
+            "create_processes": self.create_processes,
+            "destroy_processes": self.destroy_processes,
+            "get_pcbs": self.get_pcbs,
+            "list_processes": self.list_processes,
+            "stats": self.stats,
+            "hello": self.hello,
+            "export_process": self.export_process,
+            "import_process": self.import_process,
+            "set_process_group": self.set_process_group
+        }
+
+    def _create(self, spec):
+        return self.kernel.create_process(spec["name"], spec["priority"], spec["burst"], spec["arrival"],
+                                          spec.get("memory_kb"), spec.get("pgid"))
+
+    def create_process(self, request):
+        return {"status": "success", "pid": self._create(request).pid}
 
-            if request.get("action") == "create_process":
+    # Batch actions run under one kernel critical section and answer with one
+    # result per item, in request order; a failing item does not stop the rest
+
+    def create_processes(self, request):
+        results = []
+        with self.kernel.batch():
+            for spec in request["processes"]:
                 try:
-                    proc = self.kernel.create_process(
-                        request["name"],
-                        request["priority"],
-                        request["burst"],
-                        request["arrival"]
-                    )
-                    print(f"Process created: PID={proc.pid}, Name={proc.name}, State={proc.state}")
-                    response = {"status": "success", "pid": proc.pid}
+                    results.append({"status": "success", "pid": self._create(spec).pid})
                 except Exception as e:
-                    response = {"status": "error", "message": str(e)}
-            elif request.get("action") == "list_processes":  # Added action
-                processes = self.kernel.list_all_processes()
-                response = {
-                    "status": "success",
-                    "processes": [
-                        {"pid": p.pid, "name": p.name, "state": p.state}
-                        for p in processes
-                    ]
-                }
-
-            client_socket.send(json.dumps(response).encode())
+                    results.append({"status": "error", "message": str(e)})
+        return {"status": "success", "results": results}
+
+    def destroy_processes(self, request):
+        with self.kernel.batch():
+            results = [{"pid": pid, "status": "success" if self.kernel.destroy_process(pid) else "not found"}
+                       for pid in request["pids"]]
+        return {"status": "success", "results": results}
+
+    def get_pcbs(self, request):
+        results = []
+        with self.kernel.batch():
+            for pid in request["pids"]:
+                info = self.kernel.get_pcb_info(pid)
+                if info is None:
+                    results.append({"PID": pid, "status": "not found"})
+                else:
+                    info["Page Table"] = {page: entry.frame for page, entry in info["Page Table"].items()}
+                    results.append(info)
+        return {"status": "success", "results": results}
+
+    def list_processes(self, request):
+        # Optional "fields" (default pid, name, state), "offset"/"limit" for one page,
+        # and "chunk" to stream the rows as several frames, all but the last with "more"
+        fields = request.get("fields") or DEFAULT_FIELDS
+        unknown = set(fields) - PROCESS_FIELDS
+        if unknown:
+            raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}")
+        procs = self.kernel.list_processes(request.get("offset", 0), request.get("limit"))
+        return process_rows([{field: getattr(p, field) for field in fields} for p in procs], request.get("chunk"))
+
+    def hello(self, request):
+        # Codec negotiation; the connection switches once this reply is written
+        return {"status": "success", "codec": negotiate(request.get("codecs")).name}
+
+    def stats(self, request):
+        return {"status": "success", "node": self.node, "stats": self.kernel.stats()}
+
+    def export_process(self, request):
+        return {"status": "success", "process": self.kernel.export_process(request["pid"])}
+
+    def import_process(self, request):
+        return {"status": "success", "pid": self.kernel.import_process(request["process"]).pid}
+
+    def set_process_group(self, request):
+        return {"status": "success", "pgid": self.kernel.set_process_group(request["pid"], request.get("pgid"))}
+
+    def handle_request(self, request):
+        # Returns the list of response frames for `request`, each tagged with its id
+        handler = self.handlers.get(request.get("action"))
+        if handler is None:
+            responses = [{"status": "error", "message": "Invalid request"}]
+        else:
+            try:
+                responses = handler(request)
+            except Exception as e:
+                responses = {"status": "error", "message": str(e)}
+            if isinstance(responses, dict):
+                responses = [responses]
+        if "id" in request:
+            for response in responses:
+                response["id"] = request["id"]
+        return responses
+
+    async def handle_connection(self, reader, writer):
+        # Whatever has arrived is decoded and handled in order, and all the
+        # responses go out in one write. The next read waits for that write to
+        # drain, so a client that stops reading stops being served (backpressure).
+        peer = writer.get_extra_info("peername")
+        print(f"Connection from {peer}")
+        buffer = bytearray()
+        codec = JSON
+        try:
+            while True:
+                data = await reader.read(READ_CHUNK)
+                if not data:
+                    break
+                buffer += data
+                while True:
+                    try:
+                        requests = split_frames(buffer, self.max_batch, codec)
+                    except ProtocolError as e:
+                        # Framing is lost, so the connection ends here
+                        writer.write(encode_frame({"status": "error", "message": str(e)}, codec))
+                        await writer.drain()
+                        return
+                    if not requests:
+                        break
+                    out = []
+                    for request in requests:
+                        responses = self.handle_request(request)
+                        out.extend(encode_frame(response, codec) for response in responses)
+                        if request.get("action") == "hello" and responses[0]["status"] == "success":
+                            codec = CODECS[responses[0]["codec"]]
+                    writer.write(b"".join(out))
+                    await writer.drain()
+        except ConnectionError:
+            pass
         except Exception as e:
-            print(f"Error handling client: {e}")
-            response = {"status": "error", "message": str(e)}
-            client_socket.send(json.dumps(response).encode())
+            print(f"Error handling client {peer}: {e}")
         finally:
-            client_socket.close()
+            writer.close()
+
+    async def start(self):
+        server = await asyncio.start_server(self.handle_connection, self.host, self.port)
+        self.port = server.sockets[0].getsockname()[1]
+        print(f"Server started on {self.host}:{self.port}")
+        return server
+
+    async def serve(self):
+        server = await self.start()
+        async with server:
+            await server.serve_forever()
 
     def run(self):
-        while True:
-            client_socket, addr = self.server_socket.accept()
-            print(f"Connection from {addr}")
-            threading.Thread(target=self.handle_client, args=(client_socket,), daemon=True).start()
+        asyncio.run(self.serve())
 
 if __name__ == "__main__":
-    server = OSServer()
-    server.run()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="SimOS kernel server")
+    parser.add_argument("--host", default=CONFIG.get("server_host", "localhost"))
+    parser.add_argument("--port", type=int, default=CONFIG.get("server_port", 9999))
+    parser.add_argument("--node", help="Node name when serving as part of a cluster")
+    args = parser.parse_args()
+    server = OSServer(args.host, args.port, node=args.node)
+    server.run()
@@ -0,0 +1,155 @@
+import mmap
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from locks import CountingLock
+
+# Backing store for MemoryManager: a file of page-sized slots mapped with mmap.
+# The simulator keeps no page contents, so a page is written as an image stamped
+# with its (pid, page) key, which swap-in checks.
+#
+# Writes are queued and written `batch` at a time on a thread pool; until then a
+# read is served from the queue. A rewritten page gets a fresh slot and its old
+# one is freed once no write to it is in flight, so writes never race on a slot.
+# Pages shared copy-on-write can share a slot too; it is freed with its last key.
+
+def page_image(key, page_bytes):
+    stamp = repr(key).encode()
+    return stamp + bytes(page_bytes - len(stamp))
+
+class SwapSpace:
+    def __init__(self, page_bytes, slots, path=None, workers=2, batch=32):
+        if slots <= 0:
+            raise ValueError("Swap needs at least one slot")
+        self.page_bytes = page_bytes
+        self.slots = slots
+        self.batch = batch
+        self.file = open(path, "w+b") if path else tempfile.TemporaryFile()
+        self.file.truncate(page_bytes * slots)
+        self.map = mmap.mmap(self.file.fileno(), page_bytes * slots)
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="swap")
+        self.lock = CountingLock("swap")
+        self.slot_of = {}  # key -> slot holding its latest copy
+        self.stamps = {}  # slot -> key it was written for
+        self.refs = {}  # slot -> keys using it, where more than one
+        self.free_slots = list(range(slots - 1, -1, -1))
+        self.pending = {}  # slot -> image not yet handed to the pool
+        self.in_flight = {}  # slot -> image being written
+        self.doomed = set()  # In-flight slots to free once written
+        self.futures = set()
+        self.swap_outs = self.swap_ins = 0
+        self.bytes_out = self.bytes_in = 0
+        self.out_time = self.in_time = 0.0
+
+    def __contains__(self, key):
+        return key in self.slot_of
+
+    def write(self, key, image):
+        with self.lock:
+            if not self.free_slots:
+                raise MemoryError("Swap space full")
+            old = self.slot_of.get(key)
+            slot = self.slot_of[key] = self.free_slots.pop()
+            if old is not None:
+                self._release(old)
+            self.stamps[slot] = key
+            self.pending[slot] = image
+            if len(self.pending) >= self.batch:
+                self._submit()
+
+    def read(self, key):
+        # The page's image, or None if it was never written out
+        start = time.perf_counter()
+        with self.lock:
+            slot = self.slot_of.get(key)
+            if slot is None:
+                return None
+            image = self.pending.get(slot) or self.in_flight.get(slot)
+            if image is None:
+                offset = slot * self.page_bytes
+                image = self.map[offset:offset + self.page_bytes]
+            self.swap_ins += 1
+            self.bytes_in += len(image)
+            self.in_time += time.perf_counter() - start
+            stamp = self.stamps[slot]
+        if not image.startswith(repr(stamp).encode()):
+            raise RuntimeError(f"Swap slot {slot} does not hold page {stamp}")
+        return image
+
+    def share(self, key, other):
+        # Makes `other` read whatever `key` has (nothing, if key was never written)
+        with self.lock:
+            slot = self.slot_of.get(key)
+            old = self.slot_of.pop(other, None)
+            if slot is not None:
+                self.slot_of[other] = slot
+                self.refs[slot] = self.refs.get(slot, 1) + 1
+            if old is not None:
+                self._release(old)
+
+    def keys(self):
+        with self.lock:
+            return list(self.slot_of)
+
+    def free(self, key):
+        with self.lock:
+            slot = self.slot_of.pop(key, None)
+            if slot is not None:
+                self._release(slot)
+
+    def _release(self, slot):
+        refs = self.refs.pop(slot, 1) - 1
+        if refs > 1:
+            self.refs[slot] = refs
+        if refs:
+            return
+        if self.pending.pop(slot, None) is not None or slot not in self.in_flight:
+            self.free_slots.append(slot)
+        else:
+            self.doomed.add(slot)
+
+    def _submit(self):
+        batch, self.pending = self.pending, {}
+        self.in_flight.update(batch)
+        future = self.pool.submit(self._write_batch, batch)
+        self.futures.add(future)
+        future.add_done_callback(self.futures.discard)
+
+    def _write_batch(self, batch):
+        start = time.perf_counter()
+        for slot, image in batch.items():
+            offset = slot * self.page_bytes
+            self.map[offset:offset + len(image)] = image
+        elapsed = time.perf_counter() - start
+        with self.lock:
+            for slot in batch:
+                del self.in_flight[slot]
+                if slot in self.doomed:
+                    self.doomed.discard(slot)
+                    self.free_slots.append(slot)
+            self.swap_outs += len(batch)
+            self.bytes_out += sum(map(len, batch.values()))
+            self.out_time += elapsed
+
+    def flush(self):
+        # Writes everything queued and waits for it
+        with self.lock:
+            if self.pending:
+                self._submit()
+            futures = list(self.futures)
+        wait(futures)
+
+    def close(self):
+        self.flush()
+        self.pool.shutdown()
+        self.map.close()
+        self.file.close()
+
+    def stats(self):
+        with self.lock:
+            return {"slots": self.slots, "used_slots": self.slots - len(self.free_slots),
+                    "swap_outs": self.swap_outs, "swap_ins": self.swap_ins,
+                    "bytes_out": self.bytes_out, "bytes_in": self.bytes_in,
+                    "queued": len(self.pending) + len(self.in_flight),
+                    "out_us_per_page": self.out_time / self.swap_outs * 1e6 if self.swap_outs else 0.0,
+                    "in_us_per_page": self.in_time / self.swap_ins * 1e6 if self.swap_ins else 0.0}
@@ -0,0 +1,126 @@
+import argparse
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from trace_sim import lru_stack_distances, read_trace
+
+try:
+    import numpy as np
+except ImportError:  # Pure-Python fallback, same results
+    np = None
+
+# Batch paging analysis over a byte-address trace for a grid of (page size, capacity)
+# configurations. Works on its own copies of the trace and never touches config.json
+# or a live MemoryManager, so sweeps can run side by side.
+
+def translate(addresses, page_sizes_kb):
+    # {page_size_kb: page numbers}, every page size translated in one vectorized pass
+    page_sizes_kb = list(page_sizes_kb)
+    if np is not None:
+        addresses = np.asarray(addresses, dtype=np.int64)
+        divisors = np.asarray(page_sizes_kb, dtype=np.int64)[:, None] * 1024
+        pages = addresses[None, :] // divisors
+        return {size: pages[i] for i, size in enumerate(page_sizes_kb)}
+    return {size: [address // (size * 1024) for address in addresses] for size in page_sizes_kb}
+
+def collapse_runs(pages):
+    # Back-to-back references to the same page always hit and leave FIFO and LRU
+    # state unchanged, so they can be dropped before simulating either policy
+    if np is not None:
+        pages = np.asarray(pages)
+        if len(pages) == 0:
+            return []
+        keep = np.empty(len(pages), dtype=bool)
+        keep[0] = True
+        np.not_equal(pages[1:], pages[:-1], out=keep[1:])
+        return pages[keep].tolist()
+    collapsed = []
+    previous = object()
+    for page in pages:
+        if page != previous:
+            collapsed.append(page)
+            previous = page
+    return collapsed
+
+def fifo_faults(pages, capacity):
+    resident = set()
+    order = deque()
+    faults = 0
+    for page in pages:
+        if page not in resident:
+            faults += 1
+            if len(order) == capacity:
+                resident.discard(order.popleft())
+            order.append(page)
+            resident.add(page)
+    return faults
+
+def lru_faults(pages, capacities):
+    # {capacity: faults} for all capacities from one stack-distance pass
+    histogram, cold, _ = lru_stack_distances(pages)
+    return {capacity: cold + sum(count for distance, count in histogram.items() if distance > capacity)
+            for capacity in capacities}
+
+def _run_task(task):
+    page_size_kb, policy, capacities, pages = task
+    if policy == "lru":
+        faults = lru_faults(pages, capacities)
+    elif policy == "fifo":
+        faults = {capacity: fifo_faults(pages, capacity) for capacity in capacities}
+    else:
+        raise ValueError(f"Unsupported sweep policy: {policy}")
+    return page_size_kb, policy, faults
+
+def sweep(addresses, page_sizes_kb, capacities, policies=("fifo", "lru"), workers=None):
+    # Returns one row per (policy, page size, capacity). With workers > 1 the grid is
+    # fanned out over a process pool: LRU per page size, FIFO per (page size, capacity).
+    capacities = sorted(set(capacities))
+    references = len(addresses)
+    tasks = []
+    for page_size_kb, pages in translate(addresses, page_sizes_kb).items():
+        pages = collapse_runs(pages)
+        for policy in policies:
+            if policy == "fifo" and workers and workers > 1:
+                tasks.extend((page_size_kb, policy, [capacity], pages) for capacity in capacities)
+            else:
+                tasks.append((page_size_kb, policy, capacities, pages))
+
+    if workers and workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_run_task, tasks))
+    else:
+        results = [_run_task(task) for task in tasks]
+
+    rows = []
+    for page_size_kb, policy, faults in results:
+        for capacity, count in faults.items():
+            rows.append({
+                "policy": policy,
+                "page_size_kb": page_size_kb,
+                "capacity": capacity,
+                "memory_kb": page_size_kb * capacity,
+                "references": references,
+                "faults": count,
+                "miss_ratio": count / references if references else 0.0
+            })
+    rows.sort(key=lambda r: (r["policy"], r["page_size_kb"], r["capacity"]))
+    return rows
+
+def format_table(rows):
+    columns = ["policy", "page_size_kb", "capacity", "memory_kb", "references", "faults", "miss_ratio"]
+    lines = ["\t".join(columns)]
+    for row in rows:
+        lines.append("\t".join(f"{row[c]:.6f}" if c == "miss_ratio" else str(row[c]) for c in columns))
+    return "\n".join(lines)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sweep FIFO/LRU fault counts over page sizes and capacities")
+    parser.add_argument("trace", help="Byte-address trace file (text or int32)")
+    parser.add_argument("--format", choices=["text", "int32"], default=None)
+    parser.add_argument("--page-sizes", type=int, nargs="+", default=[4, 16, 64], help="Page sizes in KB")
+    parser.add_argument("--capacities", type=int, nargs="+", default=[4, 8, 16, 32, 64], help="Frame counts")
+    parser.add_argument("--policies", nargs="+", default=["fifo", "lru"])
+    parser.add_argument("--workers", type=int, default=None, help="Process pool size")
+    args = parser.parse_args()
+
+    addresses = list(read_trace(args.trace, args.format))
+    print(format_table(sweep(addresses, args.page_sizes, args.capacities, args.policies, args.workers)))
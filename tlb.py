@@ -0,0 +1,81 @@
+from replacement import make_policy
+
+# Translation lookaside buffer for MemoryManager: caches (pid, page) -> frame.
+# Entries are tagged with the pid, so a context switch needs no flush. The
+# `entries` are split into sets of `associativity` ways; a page's set is picked
+# by its low bits, as in hardware, and each set evicts by its own replacement
+# policy (any in replacement.py but opt).
+
+class TLB:
+    def __init__(self, entries=64, associativity=4, policy="lru"):
+        if entries <= 0 or associativity <= 0 or entries % associativity:
+            raise ValueError("TLB entries must be a positive multiple of the associativity")
+        if policy == "opt":
+            raise ValueError("OPT needs the future and cannot run in a TLB")
+        self.entries = entries
+        self.associativity = associativity
+        self.policy = policy
+        self.set_count = entries // associativity
+        self.sets = [{} for _ in range(self.set_count)]  # (pid, page) -> frame
+        self.policies = [make_policy(policy, associativity) for _ in range(self.set_count)]
+        self.counters = {}  # pid -> [hits, misses]
+        self.retired = [0, 0]  # Hits and misses of pids since forgotten
+
+    def lookup(self, pid, page):
+        # The cached frame, or None on a miss
+        index = page % self.set_count
+        key = (pid, page)
+        frame = self.sets[index].get(key)
+        counters = self.counters.get(pid)
+        if counters is None:
+            counters = self.counters[pid] = [0, 0]
+        if frame is None:
+            counters[1] += 1
+            return None
+        counters[0] += 1
+        self.policies[index].touch(key)
+        return frame
+
+    def insert(self, pid, page, frame):
+        index = page % self.set_count
+        key = (pid, page)
+        entries = self.sets[index]
+        policy = self.policies[index]
+        if key in entries:
+            entries[key] = frame
+            policy.touch(key)
+            return
+        if len(entries) >= self.associativity:
+            del entries[policy.evict(key)]
+        entries[key] = frame
+        policy.insert(key)
+
+    def invalidate(self, pid, page):
+        # Call whenever the page leaves its frame
+        index = page % self.set_count
+        if self.sets[index].pop((pid, page), None) is not None:
+            self.policies[index].remove((pid, page))
+
+    def flush(self, pid=None):
+        # Drops every entry, or only those of `pid`
+        if pid is None:
+            self.sets = [{} for _ in range(self.set_count)]
+            self.policies = [make_policy(self.policy, self.associativity) for _ in range(self.set_count)]
+            return
+        for entries, policy in zip(self.sets, self.policies):
+            for key in [key for key in entries if key[0] == pid]:
+                del entries[key]
+                policy.remove(key)
+
+    def forget(self, pid):
+        # Folds a departed pid's counters into the totals
+        counters = self.counters.pop(pid, None)
+        if counters:
+            self.retired[0] += counters[0]
+            self.retired[1] += counters[1]
+
+    def hits_misses(self, pid=None):
+        if pid is not None:
+            return tuple(self.counters.get(pid, (0, 0)))
+        return (self.retired[0] + sum(c[0] for c in self.counters.values()),
+                self.retired[1] + sum(c[1] for c in self.counters.values()))
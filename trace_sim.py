@@ -0,0 +1,182 @@
+import argparse
+import json
+from array import array
+from replacement import make_policy
+
+# Streaming trace-driven paging simulation. References are consumed lazily and
+# only counters are kept, so memory stays flat however long the trace is.
+
+CHUNK_REFS = 16384
+
+def read_trace(path, fmt=None):
+    # "text": integers separated by whitespace or commas; "int32": native-endian int32s
+    if fmt is None:
+        fmt = "int32" if path.endswith((".bin", ".i32")) else "text"
+    if fmt == "text":
+        with open(path, "r") as f:
+            for line in f:
+                for token in line.replace(",", " ").split():
+                    yield int(token)
+    elif fmt == "int32":
+        chunk_bytes = CHUNK_REFS * 4
+        with open(path, "rb") as f:
+            while True:
+                data = f.read(chunk_bytes)
+                if not data:
+                    break
+                refs = array("i")
+                refs.frombytes(data[:len(data) - len(data) % 4])
+                yield from refs
+    else:
+        raise ValueError(f"Unknown trace format: {fmt}")
+
+def write_trace(path, references):
+    # Writes an int32 trace, chunk by chunk
+    with open(path, "wb") as f:
+        chunk = array("i")
+        for page in references:
+            chunk.append(page)
+            if len(chunk) >= CHUNK_REFS:
+                chunk.tofile(f)
+                chunk = array("i")
+        chunk.tofile(f)
+
+class _Fenwick:
+    def __init__(self, size):
+        self.size = size
+        self.tree = [0] * (size + 1)
+
+    def add(self, i, delta):
+        i += 1
+        while i <= self.size:
+            self.tree[i] += delta
+            i += i & -i
+
+    def prefix(self, i):
+        # Sum of positions 0..i
+        i += 1
+        total = 0
+        while i > 0:
+            total += self.tree[i]
+            i -= i & -i
+        return total
+
+def lru_stack_distances(references):
+    # Mattson stack distances in one pass, O(log n) per reference: the LRU stack
+    # distance of a reuse is 1 + the number of distinct pages touched since the
+    # previous use, counted over a Fenwick tree holding one mark per page at its
+    # last-use position. Positions are compacted when the tree fills, so memory
+    # is O(distinct pages). Returns (histogram {distance: count}, cold misses, references).
+    histogram = {}
+    cold = 0
+    count = 0
+    last = {}  # page -> position of its last use
+    tree = _Fenwick(1024)
+    position = 0
+    for page in references:
+        count += 1
+        if position == tree.size:
+            ordered = sorted(last, key=last.get)
+            tree = _Fenwick(max(1024, 2 * len(ordered)))
+            for new_position, old_page in enumerate(ordered):
+                last[old_page] = new_position
+                tree.add(new_position, 1)
+            position = len(ordered)
+        previous = last.get(page)
+        if previous is None:
+            cold += 1
+        else:
+            distance = len(last) - tree.prefix(previous) + 1
+            histogram[distance] = histogram.get(distance, 0) + 1
+            tree.add(previous, -1)
+        tree.add(position, 1)
+        last[page] = position
+        position += 1
+    return histogram, cold, count
+
+def lru_miss_ratio_curve(references, max_capacity=None):
+    # [(capacity, faults, miss ratio)] for every capacity 1..max_capacity in one pass
+    histogram, cold, count = lru_stack_distances(references)
+    if max_capacity is None:
+        max_capacity = max(histogram, default=1)
+    # A reuse at distance d hits exactly when capacity >= d
+    curve = []
+    faults = cold + sum(histogram.values())
+    for capacity in range(1, max_capacity + 1):
+        faults -= histogram.get(capacity, 0)
+        curve.append((capacity, faults, faults / count if count else 0.0))
+    return curve
+
+class StreamingSimulation:
+    def __init__(self, capacity, policy="lru", window=100000, snapshot_every=0):
+        if policy == "opt":
+            raise ValueError("OPT needs the whole trace up front and cannot be streamed")
+        self.replacement = make_policy(policy, capacity)
+        self.policy = policy
+        self.capacity = capacity
+        self.window = window
+        self.snapshot_every = snapshot_every
+        self.references = 0
+        self.faults = 0
+        self.evictions = 0
+        self.window_evictions = []  # Evictions in each completed window of `window` references
+        self._window_count = 0
+
+    def run(self, references):
+        # Yields (step, page, resident pages, faults so far) every `snapshot_every` references
+        reference = self.replacement.reference
+        snapshot_every = self.snapshot_every
+        window = self.window
+        for page in references:
+            hit, victim = reference(page)
+            self.references += 1
+            if not hit:
+                self.faults += 1
+                if victim is not None:
+                    self.evictions += 1
+                    self._window_count += 1
+            if window and self.references % window == 0:
+                self.window_evictions.append(self._window_count)
+                self._window_count = 0
+            if snapshot_every and self.references % snapshot_every == 0:
+                yield self.references, page, list(self.replacement), self.faults
+
+    def stats(self):
+        return {
+            "policy": self.policy,
+            "capacity": self.capacity,
+            "references": self.references,
+            "faults": self.faults,
+            "hits": self.references - self.faults,
+            "hit_ratio": (self.references - self.faults) / self.references if self.references else 0.0,
+            "evictions": self.evictions,
+            "window": self.window,
+            "window_evictions": self.window_evictions
+        }
+
+def simulate_trace(references, capacity, policy="lru", window=100000):
+    sim = StreamingSimulation(capacity, policy, window)
+    for _ in sim.run(references):
+        pass
+    return sim.stats()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Stream a page reference trace through a replacement policy")
+    parser.add_argument("trace", help="Trace file (text or int32)")
+    parser.add_argument("--capacity", type=int, required=True, help="Frames available")
+    parser.add_argument("--policy", default="lru", help="fifo, lru, clock, lfu or arc")
+    parser.add_argument("--format", choices=["text", "int32"], default=None)
+    parser.add_argument("--window", type=int, default=100000, help="References per eviction-count window")
+    parser.add_argument("--snapshot-every", type=int, default=0, help="Print resident pages every N references")
+    parser.add_argument("--curve", action="store_true", help="Print the LRU miss-ratio curve for capacities 1..capacity instead")
+    args = parser.parse_args()
+
+    if args.curve:
+        for capacity, faults, miss_ratio in lru_miss_ratio_curve(read_trace(args.trace, args.format), args.capacity):
+            print(f"{capacity}\t{faults}\t{miss_ratio:.6f}")
+        raise SystemExit(0)
+
+    sim = StreamingSimulation(args.capacity, args.policy, args.window, args.snapshot_every)
+    for step, page, resident, faults in sim.run(read_trace(args.trace, args.format)):
+        print(f"Step {step}: page {page} -> Memory: {resident} (faults {faults})")
+    print(json.dumps(sim.stats(), indent=4))
@@ -0,0 +1,164 @@
+import tkinter as tk
+from tkinter import ttk
+
+# Virtual-scrolling tables. A VirtualTable keeps only as many Treeview items as
+# fit on screen and fills them from a TableSource as it scrolls, so opening a
+# view costs the same for ten rows as for a million.
+
+def _sort_key(value):
+    # Numbers before text, so a column mixing the two still sorts
+    if isinstance(value, (int, float)):
+        return (0, value, "")
+    return (1, 0, str(value))
+
+class TableSource:
+    # `items` is any sequence (len() and indexing, so it can be lazy) and `row`
+    # turns one item into its tuple of cell values; rows are only built for the
+    # items on screen. Sorting is a permutation of item indexes kept here, not in
+    # the widget. `keys` may map a column to a function giving an item's sort key
+    # for it, so sorting that column does not have to build every row.
+    def __init__(self, columns, items, row=tuple, keys=None):
+        self.columns = tuple(columns)
+        self.items = items
+        self.make_row = row
+        self.keys = keys or {}
+        self.order = None  # Item index per displayed row, once sorted
+        self.sort_column = None
+        self.descending = False
+
+    def __len__(self):
+        return len(self.items)
+
+    def row(self, index):
+        if self.order is not None:
+            index = self.order[index]
+        return self.make_row(self.items[index])
+
+    def sort(self, column, descending=False):
+        self.sort_column, self.descending = column, descending
+        key = self.keys.get(column)
+        if key is None:
+            c = self.columns.index(column)
+            keys = [self.make_row(item)[c] for item in self.items]
+        else:
+            keys = list(map(key, self.items))
+        self.order = sorted(range(len(self.items)), key=lambda i: _sort_key(keys[i]), reverse=descending)
+
+    def set_items(self, items):
+        # New contents (e.g. a fresh snapshot), sorted like the old ones
+        self.items = items
+        self.order = None
+        if self.sort_column is not None:
+            self.sort(self.sort_column, self.descending)
+
+class VirtualTable(ttk.Frame):
+    # A Treeview over a TableSource. Heading clicks sort the source; refresh()
+    # re-reads the rows on screen and only updates the items whose values changed.
+    # With `reload` (a function returning new items) the table refreshes itself
+    # every `interval` ms while it exists.
+    def __init__(self, parent, source, widths=None, height=20, reload=None, interval=1000):
+        super().__init__(parent)
+        self.source = source
+        self.first = 0  # Source row shown in the top item
+        self.visible = height
+        self.items = []  # Treeview item ids, top to bottom
+        self.shown = []  # Values currently in each item
+        self.reload = reload
+        self.interval = interval
+        self._pending = None  # after() id of the next reload
+
+        self.tree = ttk.Treeview(self, columns=source.columns, show="headings", height=height,
+                                 selectmode="none")
+        for col in source.columns:
+            self.tree.heading(col, text=col, command=lambda c=col: self.sort(c))
+            if widths and col in widths:
+                self.tree.column(col, width=widths[col])
+        self.scrollbar = ttk.Scrollbar(self, orient="vertical", command=self._on_scrollbar)
+        self.tree.pack(side="left", fill="both", expand=True)
+        self.scrollbar.pack(side="right", fill="y")
+
+        self.tree.bind("<Configure>", self._on_resize)
+        self.tree.bind("<MouseWheel>", lambda e: self.scroll(-1 if e.delta > 0 else 1, "units"))
+        self.tree.bind("<Button-4>", lambda e: self.scroll(-1, "units"))
+        self.tree.bind("<Button-5>", lambda e: self.scroll(1, "units"))
+        for key, amount, what in (("<Up>", -1, "units"), ("<Down>", 1, "units"),
+                                  ("<Prior>", -1, "pages"), ("<Next>", 1, "pages")):
+            self.tree.bind(key, lambda e, a=amount, w=what: self.scroll(a, w))
+        self.tree.bind("<Home>", lambda e: self.scroll_to(0))
+        self.tree.bind("<End>", lambda e: self.scroll_to(len(self.source)))
+        self.tree.bind("<Enter>", lambda e: self.tree.focus_set())
+
+        self.refresh()
+        if reload is not None:
+            self._pending = self.after(interval, self._reload)
+
+    def sort(self, column):
+        descending = self.source.sort_column == column and not self.source.descending
+        self.source.sort(column, descending)
+        for col in self.source.columns:
+            mark = (" ▼" if descending else " ▲") if col == column else ""
+            self.tree.heading(col, text=col + mark)
+        self.refresh()
+
+    def scroll(self, amount, what="units"):
+        self.scroll_to(self.first + amount * (self.visible if what == "pages" else 1))
+
+    def scroll_to(self, first):
+        first = max(0, min(int(first), len(self.source) - self.visible))
+        if first != self.first:
+            self.first = first
+            self.refresh()
+
+    def refresh(self):
+        total = len(self.source)
+        self.first = max(0, min(self.first, total - self.visible))
+        count = min(self.visible, total - self.first)
+        while len(self.items) < count:
+            self.items.append(self.tree.insert("", "end"))
+            self.shown.append(None)
+        while len(self.items) > count:
+            self.tree.delete(self.items.pop())
+            self.shown.pop()
+        for slot, item in enumerate(self.items):
+            values = self.source.row(self.first + slot)
+            if values != self.shown[slot]:
+                self.tree.item(item, values=values)
+                self.shown[slot] = values
+        if total:
+            self.scrollbar.set(self.first / total, (self.first + count) / total)
+        else:
+            self.scrollbar.set(0, 1)
+
+    def _on_scrollbar(self, command, amount, what=None):
+        if command == "moveto":
+            self.scroll_to(float(amount) * len(self.source))
+        else:
+            self.scroll(int(amount), what)
+
+    def _on_resize(self, event):
+        # As many rows as fit under the headings
+        row_height = int(ttk.Style().lookup("Treeview", "rowheight") or 20)
+        visible = max(1, (event.height - row_height - 4) // row_height)
+        if visible != self.visible:
+            self.visible = visible
+            self.refresh()
+
+    def _reload(self):
+        self.source.set_items(self.reload())
+        self.refresh()
+        self._pending = self.after(self.interval, self._reload)
+
+    def destroy(self):
+        if self._pending is not None:
+            self.after_cancel(self._pending)
+        super().destroy()
+
+def show_table(master, title, source, widths=None, reload=None, footer=None):
+    # A window holding one VirtualTable, plus an optional line of text under it
+    win = tk.Toplevel(master)
+    win.title(title)
+    table = VirtualTable(win, source, widths, reload=reload)
+    table.pack(fill="both", expand=True, padx=10, pady=10)
+    if footer:
+        ttk.Label(win, text=footer).pack(pady=5)
+    return table
@@ -0,0 +1,137 @@
+from collections import OrderedDict
+
+# Resident-set control for MemoryManager (its resident_sets option). Each
+# process gets a frame quota, and a process that faults at its quota replaces
+# one of its own pages instead of taking another process' frame. Every `window`
+# accesses of a process its quota is estimated again:
+#   "ws"  - working set: the distinct pages it touched in the window
+#   "pff" - page-fault frequency: above `upper` faults per access, grow by a
+#           frame per fault in the window; below `lower`, shrink to the pages
+#           it touched
+# When the quotas add up to more than memory, the newest active process is
+# suspended and gives up its frames; suspended processes come back oldest first
+# once the quota they had fits again. Those suspend and resume decisions queue up
+# in `pending` for the Kernel to carry out, since the scheduler's locks come
+# before the memory lock (see locks.py).
+
+class ResidentSet:
+    __slots__ = ("quota", "pages", "accesses", "faults", "touched", "working_set", "fault_rate")
+
+    def __init__(self, quota, pages):
+        self.quota = quota
+        self.pages = pages  # Quotas never go past the process' size
+        self.accesses = 0  # In the current window
+        self.faults = 0
+        self.touched = set()
+        self.working_set = 0  # Estimates from the last full window
+        self.fault_rate = 0.0
+
+class ResidentSetManager:
+    def __init__(self, total_frames, mode="ws", window=1000, lower=0.002, upper=0.02, min_frames=2,
+                 initial_frames=8):
+        if mode not in ("ws", "pff"):
+            raise ValueError(f"Unknown resident set mode: {mode}")
+        self.total_frames = total_frames
+        self.mode = mode
+        self.window = window
+        self.lower = lower
+        self.upper = upper
+        self.min_frames = min_frames
+        self.initial_frames = initial_frames
+        self.active = {}  # pid -> ResidentSet, oldest first
+        self.suspended = OrderedDict()  # pid -> ResidentSet, oldest first
+        self.pending = []  # (pid, "suspended" or "ready") for the Kernel
+        self.trims = set()  # Pids whose quota dropped below what they may hold
+        self.suspensions = self.resumes = 0
+        self.accesses = self.faults = 0
+
+    def admit(self, pid, pages):
+        # Registers a new process; returns how many of its pages to load now
+        self.active[pid] = ResidentSet(min(pages, max(self.initial_frames, self.min_frames)), pages)
+        self._balance()
+        return self.quota(pid)
+
+    def forget(self, pid):
+        self.active.pop(pid, None)
+        self.suspended.pop(pid, None)
+        self.trims.discard(pid)
+        self._balance()
+
+    def quota(self, pid):
+        # Untracked and suspended processes may still touch memory; they get the minimum
+        rs = self.active.get(pid)
+        return rs.quota if rs is not None else (0 if pid in self.suspended else self.min_frames)
+
+    def demand(self):
+        return sum(rs.quota for rs in self.active.values())
+
+    def record(self, pid, page, fault):
+        # One access; at the end of a window the quota is estimated again
+        rs = self.active.get(pid)
+        self.accesses += 1
+        self.faults += fault
+        if rs is None:
+            return
+        rs.accesses += 1
+        rs.faults += fault
+        rs.touched.add(page)
+        if rs.accesses < self.window:
+            return
+        rs.working_set = len(rs.touched)
+        rs.fault_rate = rs.faults / rs.accesses
+        old = rs.quota
+        if self.mode == "ws":
+            rs.quota = max(self.min_frames, rs.working_set)
+        elif rs.fault_rate > self.upper:
+            rs.quota = min(rs.pages, rs.quota + rs.faults)
+        elif rs.fault_rate < self.lower:
+            rs.quota = max(self.min_frames, min(rs.quota, rs.working_set))
+        rs.accesses = rs.faults = 0
+        rs.touched = set()
+        if rs.quota < old:
+            self.trims.add(pid)
+        if rs.quota != old:
+            self._balance()
+
+    def _balance(self):
+        demand = self.demand()
+        while demand > self.total_frames and len(self.active) > 1:
+            pid = next(reversed(self.active))
+            demand -= self.active[pid].quota
+            self.suspended[pid] = self.active.pop(pid)
+            self.pending.append((pid, "suspended"))
+            self.trims.add(pid)
+            self.suspensions += 1
+        while self.suspended:
+            pid, rs = next(iter(self.suspended.items()))
+            if demand + rs.quota > self.total_frames:
+                break
+            del self.suspended[pid]
+            rs.accesses = rs.faults = 0
+            rs.touched = set()
+            self.active[pid] = rs
+            self.pending.append((pid, "ready"))
+            self.resumes += 1
+            demand += rs.quota
+
+    def take_trims(self):
+        trims, self.trims = self.trims, set()
+        return trims
+
+    def take_pending(self):
+        pending, self.pending = self.pending, []
+        return pending
+
+    def stats(self):
+        return {
+            "mode": self.mode,
+            "frames": self.total_frames,
+            "demand": self.demand(),
+            "active": len(self.active),
+            "suspended": list(self.suspended),
+            "suspensions": self.suspensions,
+            "resumes": self.resumes,
+            "fault_rate": self.faults / self.accesses if self.accesses else 0.0,
+            "processes": {pid: {"quota": rs.quota, "working_set": rs.working_set, "fault_rate": rs.fault_rate}
+                          for pid, rs in self.active.items()}
+        }